@@ -1,11 +1,30 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from datetime import timedelta
-from .models import Reservation
+from .models import Reservation, OutboxEmail, OccupancySummary
 from django.urls import path
 from django.shortcuts import redirect
 from django.contrib import messages
 from .models import reset_tables_availability
+from .services import bulk_cancel_reservations, bulk_delete_reservations, is_overlap_violation
+from .allocation import allocate_tables
+from .exporting import astream_reservations_csv, stream_reservations_csv
+
+
+class ExportChangeList(ChangeList):
+    """
+    Список изменений для выгрузки: применяет фильтры и поиск, но не считает строки и не разбивает на страницы.
+    """
+
+    def get_results(self, request):
+        self.result_count = self.full_result_count = None
+        self.result_list = []
+        self.can_show_all = self.multi_page = False
 
 
 @admin.register(Reservation)
@@ -14,9 +33,28 @@ class ReservationAdmin(admin.ModelAdmin):
     Административный интерфейс для управления бронированиями.
     """
     list_display = ("date", "time", "guests", "status", "table", "email")
+    list_select_related = ("table",)
+    # Полный COUNT по всей таблице бронирований нужен только для надписи «всего»
+    show_full_result_count = False
     list_filter = ("status", "date")
     search_fields = ("phone", "email")
-    actions = ["cancel_reservations"]
+    actions = ["cancel_reservations", "allocate_tables", "export_csv"]
+
+    def changeform_view(self, request, object_id=None, form_url="", extra_context=None):
+        """
+        Показывает ошибку формы, если параллельное сохранение заняло столик уже после проверки формы.
+
+        Такую запись отвергает ограничение OVERLAP_CONSTRAINT, и транзакция
+        формы откатывается. Форма обрабатывается ещё раз: теперь пересечение с
+        сохранённой бронью находит Reservation.validate_constraints, и вместо
+        ошибки 500 пользователь видит ошибку у поля «Столик».
+        """
+        try:
+            return super().changeform_view(request, object_id, form_url, extra_context)
+        except IntegrityError as e:
+            if request.method != "POST" or not is_overlap_violation(e):
+                raise
+        return super().changeform_view(request, object_id, form_url, extra_context)
 
     def get_urls(self):
         """
@@ -25,6 +63,11 @@ class ReservationAdmin(admin.ModelAdmin):
         urls = super().get_urls()
         custom_urls = [
             path("reset-tables/", self.reset_tables, name="reset_tables"),
+            path(
+                "export/",
+                self.admin_site.admin_view(self.export_view),
+                name="reservations_reservation_export",
+            ),
         ]
         return custom_urls + urls
 
@@ -42,13 +85,85 @@ class ReservationAdmin(admin.ModelAdmin):
         """
         Отменяет выбранные бронирования и отображает сообщение об успехе.
         """
-        for reservation in queryset:
-            reservation.cancel()
+        cancelled = bulk_cancel_reservations(queryset)
         self.message_user(
-            request, f"{queryset.count()} бронирований было отменено", messages.SUCCESS
+            request, f"{cancelled} бронирований было отменено", messages.SUCCESS
         )
     cancel_reservations.short_description = "Отменить выбранные бронирования"
 
+    def allocate_tables(self, request, queryset):
+        """
+        Автоматически рассаживает выбранные ожидающие бронирования по наименьшим подходящим столикам.
+
+        Если во время распределения столик дня подтвердили вручную, распределение
+        этого дня откатывается и об этом выводится ошибка; остальные дни рассаживаются.
+        """
+        assigned = unassigned = 0
+        for date in queryset.filter(status="pending").values_list("date", flat=True).order_by("date").distinct():
+            try:
+                day_assigned, day_unassigned = allocate_tables(date, reservations=queryset)
+            except IntegrityError as e:
+                if not is_overlap_violation(e):
+                    raise
+                self.message_user(
+                    request,
+                    f"Распределение на {date} отменено: столик одновременно подтвердили вручную, повторите действие",
+                    messages.ERROR,
+                )
+                continue
+            assigned += len(day_assigned)
+            unassigned += len(day_unassigned)
+        self.message_user(
+            request, f"Назначены столики для {assigned} бронирований", messages.SUCCESS
+        )
+        if unassigned:
+            self.message_user(
+                request, f"Для {unassigned} бронирований не нашлось свободного столика", messages.WARNING
+            )
+    allocate_tables.short_description = "Автоматически назначить столики"
+
+    def export_csv(self, request, queryset):
+        """
+        Выгружает выбранные бронирования в CSV потоком.
+        """
+        return self._export_response(request, queryset)
+    export_csv.short_description = "Выгрузить выбранные бронирования в CSV"
+
+    def export_view(self, request):
+        """
+        Выгружает в CSV все бронирования, попадающие под текущие фильтры и поиск списка изменений.
+        """
+        if not self.has_view_or_change_permission(request):
+            raise PermissionDenied
+        request._reservation_export = True
+        changelist = self.get_changelist_instance(request)
+        return self._export_response(request, changelist.queryset)
+
+    def get_changelist(self, request, **kwargs):
+        """
+        Для выгрузки возвращает список изменений без подсчёта строк и пагинации.
+        """
+        if getattr(request, "_reservation_export", False):
+            return ExportChangeList
+        return super().get_changelist(request, **kwargs)
+
+    def _export_response(self, request, queryset):
+        # Под ASGI нужен асинхронный итератор: синхронный обработчик собрал бы в память весь файл
+        if isinstance(request, ASGIRequest):
+            rows = astream_reservations_csv(queryset)
+        else:
+            rows = stream_reservations_csv(queryset)
+        response = StreamingHttpResponse(rows, content_type="text/csv; charset=utf-8")
+        filename = f"reservations_{timezone.now():%Y%m%d_%H%M}.csv"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    def delete_queryset(self, request, queryset):
+        """
+        Удаляет выбранные бронирования пачками, освобождая столики одним запросом.
+        """
+        bulk_delete_reservations(queryset)
+
     def get_queryset(self, request):
         """
         Возвращает queryset бронирований, с возможностью фильтрации недавних бронирований.
@@ -69,3 +184,32 @@ class ReservationAdmin(admin.ModelAdmin):
             extra_context["title"] = "Недавние бронирования (за последний час)"
         extra_context["show_reset_tables"] = True
         return super().changelist_view(request, extra_context=extra_context)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    """
+    Административный интерфейс для просмотра очереди исходящих писем.
+    """
+    list_display = ("subject", "recipient", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("recipient",)
+
+
+@admin.register(OccupancySummary)
+class OccupancySummaryAdmin(admin.ModelAdmin):
+    """
+    Отчёт о загрузке зала по часам (только чтение, данные обновляются автоматически).
+    """
+    list_display = ("date", "hour", "covers", "reservations", "tables_used")
+    list_filter = ("date",)
+    ordering = ("-date", "hour")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
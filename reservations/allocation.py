@@ -0,0 +1,72 @@
+from bisect import bisect_left
+from functools import partial
+from django.db import transaction
+from tables.models import Table
+from .availability import get_day_occupancy, seating_mask
+from .cache import invalidate_day
+from .models import Reservation, OutboxEmail
+from .outbox import build_reservation_email
+from .events import event_payload, schedule_events
+from .summary import schedule_summary_refresh
+
+
+def allocate_tables(date, reservations=None, notify=True):
+    """
+    Автоматически распределяет столики между ожидающими бронированиями дня.
+
+    Бронирования обрабатываются от больших компаний к меньшим (их сложнее
+    рассадить), а внутри — по времени. Каждому достаётся наименьший свободный
+    на всё время посадки столик достаточной вместимости: первый подходящий
+    столик находится двоичным поиском по отсортированному списку вместимостей,
+    занятость проверяется по битовым картам слотов. Все изменения сохраняются
+    фиксированным числом запросов в одной транзакции.
+
+    Args:
+        date: Дата обслуживания
+        reservations: Queryset, ограничивающий распределяемые бронирования (по умолчанию все)
+        notify: Поставить письма о подтверждении в очередь
+
+    Returns:
+        tuple: Списки рассаженных и нерассаженных бронирований
+    """
+    with transaction.atomic():
+        # Блокируем столики от параллельных распределений; параллельный assign_table в PostgreSQL
+        # столик не блокирует, но пересечение с ним отвергнет OVERLAP_CONSTRAINT и транзакция откатится
+        tables = list(
+            Table.objects.select_for_update().only("id", "number", "capacity").order_by("capacity", "number")
+        )
+        occupancy = get_day_occupancy(date, tables=tables)
+        capacities = [table.capacity for table in tables]
+
+        pending = (reservations if reservations is not None else Reservation.objects.all()).filter(
+            date=date, status="pending"
+        )
+        # select_related из списка админки убирается: FOR UPDATE нельзя применить к LEFT JOIN по столику
+        pending = list(pending.select_related(None).select_for_update().order_by("-guests", "time", "id"))
+
+        assigned, unassigned = [], []
+        for reservation in pending:
+            mask = seating_mask(reservation.time)
+            for table in tables[bisect_left(capacities, reservation.guests):]:
+                if not occupancy.bitmaps.get(table.id, 0) & mask:
+                    occupancy.bitmaps[table.id] = occupancy.bitmaps.get(table.id, 0) | mask
+                    reservation.status = "confirmed"
+                    reservation.table = table
+                    assigned.append(reservation)
+                    break
+            else:
+                unassigned.append(reservation)
+
+        if assigned:
+            Reservation.objects.bulk_update(assigned, ["status", "table"], batch_size=500)
+            Table.objects.filter(
+                pk__in={reservation.table_id for reservation in assigned}
+            ).update(is_available=False)
+            if notify:
+                OutboxEmail.objects.bulk_create(
+                    [build_reservation_email(reservation, "подтверждено") for reservation in assigned]
+                )
+            transaction.on_commit(partial(invalidate_day, date))
+            schedule_summary_refresh((reservation.date, reservation.time) for reservation in assigned)
+            schedule_events(event_payload(reservation, "confirmed", "pending") for reservation in assigned)
+    return assigned, unassigned
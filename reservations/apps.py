@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ReservationsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "reservations"
+
+    def ready(self):
+        # Подключаем обработчики сигналов, обновляющие почасовую сводку загрузки
+        # и публикующие события для панели управления
+        from . import events, summary
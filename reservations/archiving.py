@@ -0,0 +1,200 @@
+import gzip
+import json
+import os
+import uuid
+from datetime import date as dt_date
+from pathlib import Path
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from .models import Reservation
+from .services import bulk_delete_reservations
+
+# Поле модели и имя поля в архиве
+ARCHIVE_FIELDS = [
+    ("id", "id"),
+    ("date", "date"),
+    ("time", "time"),
+    ("guests", "guests"),
+    ("phone", "phone"),
+    ("email", "email"),
+    ("status", "status"),
+    ("table_id", "table_id"),
+    ("table__number", "table_number"),
+    ("created_at", "created_at"),
+]
+
+
+class ArchiveVerificationError(Exception):
+    """
+    Количество строк в архиве не совпало с количеством удаляемых бронирований.
+    """
+
+
+def get_archive_dir():
+    """
+    Возвращает каталог архива бронирований.
+    """
+    return Path(getattr(settings, "RESERVATIONS_ARCHIVE_DIR", settings.BASE_DIR / "archive"))
+
+
+def partition_dir(directory, year, month):
+    """
+    Каталог раздела архива за месяц: year=ГГГГ/month=ММ.
+    """
+    return Path(directory) / f"year={year}" / f"month={month:02d}"
+
+
+def _count_lines(path):
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        return sum(1 for _ in archive)
+
+
+class _PartitionWriter:
+    """
+    Файлы архива одного запуска: по одному сжатому JSONL на каждый встретившийся месяц.
+
+    Пока запуск не завершён, файлы пишутся под временными именами.
+    """
+
+    def __init__(self, directory, run_id):
+        self.directory = Path(directory)
+        self.run_id = run_id
+        self.files = {}
+
+    def write(self, row):
+        month = (row["date"].year, row["date"].month)
+        entry = self.files.get(month)
+        if entry is None:
+            folder = partition_dir(self.directory, *month)
+            folder.mkdir(parents=True, exist_ok=True)
+            path = folder / f"part-{self.run_id}.jsonl.gz"
+            temporary = path.with_name(path.name + ".tmp")
+            entry = self.files[month] = {
+                "path": path, "temporary": temporary, "rows": 0,
+                "file": gzip.open(temporary, "wt", encoding="utf-8"),
+            }
+        entry["file"].write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n")
+        entry["rows"] += 1
+
+    def close(self):
+        for entry in self.files.values():
+            entry["file"].close()
+
+    def verify(self):
+        """
+        Перечитывает записанные файлы и сверяет количество строк с записанным.
+        """
+        for entry in self.files.values():
+            written = _count_lines(entry["temporary"])
+            if written != entry["rows"]:
+                raise ArchiveVerificationError(
+                    f"В файле {entry['temporary']} {written} строк вместо {entry['rows']}"
+                )
+
+    def commit(self):
+        for entry in self.files.values():
+            os.replace(entry["temporary"], entry["path"])
+
+    def discard(self):
+        for entry in self.files.values():
+            entry["file"].close()
+            entry["temporary"].unlink(missing_ok=True)
+
+
+def archive_reservations(before, directory=None, batch_size=1000, delete=True):
+    """
+    Переносит бронирования с датой раньше before в сжатые файлы архива и удаляет их из таблицы.
+
+    Строки читаются потоком в порядке первичного ключа и раскладываются по
+    разделам year=ГГГГ/month=ММ, по файлу на месяц за запуск (файлы прошлых
+    запусков не перезаписываются). Перед удалением файлы перечитываются, а
+    количество строк сверяется с количеством удаляемых бронирований; при
+    расхождении файлы удаляются, а таблица остаётся нетронутой. Удаление
+    идёт пачками по batch_size строк через bulk_delete_reservations, поэтому
+    ни одна транзакция не блокирует много строк сразу.
+
+    Returns:
+        dict: Количество архивированных и удалённых строк и список файлов
+    """
+    directory = Path(directory or get_archive_dir())
+    queryset = Reservation.objects.filter(date__lt=before)
+    rows = queryset.order_by("pk").values_list(*[field for field, _ in ARCHIVE_FIELDS])
+
+    writer = _PartitionWriter(directory, f"{timezone.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}")
+    archived = 0
+    last_pk = None
+    try:
+        for values in rows.iterator(chunk_size=batch_size):
+            writer.write({name: value for (_, name), value in zip(ARCHIVE_FIELDS, values)})
+            archived += 1
+            last_pk = values[0]
+        writer.close()
+        writer.verify()
+        # Удаляются только строки, попавшие в архив: новые строки с большим ключом останутся до следующего запуска
+        archived_queryset = queryset.filter(pk__lte=last_pk) if last_pk is not None else queryset.none()
+        remaining = archived_queryset.count()
+        if remaining != archived:
+            raise ArchiveVerificationError(
+                f"В архив записано {archived} строк, а к удалению найдено {remaining}"
+            )
+    except BaseException:
+        writer.discard()
+        raise
+    writer.commit()
+
+    deleted = bulk_delete_reservations(archived_queryset, batch_size=batch_size) if delete else 0
+    return {
+        "archived": archived,
+        "deleted": deleted,
+        "files": [str(entry["path"]) for entry in writer.files.values()],
+    }
+
+
+def _partition_in_range(year, month, date_from, date_to):
+    if date_from and (year, month) < (date_from.year, date_from.month):
+        return False
+    if date_to and (year, month) > (date_to.year, date_to.month):
+        return False
+    return True
+
+
+def iter_archive_files(directory=None, date_from=None, date_to=None):
+    """
+    Возвращает файлы архива, разделы которых пересекаются с периодом (остальные разделы не читаются).
+    """
+    directory = Path(directory or get_archive_dir())
+    files = []
+    for path in sorted(directory.glob("year=*/month=*/part-*.jsonl.gz")):
+        try:
+            year = int(path.parent.parent.name.removeprefix("year="))
+            month = int(path.parent.name.removeprefix("month="))
+        except ValueError:
+            continue
+        if _partition_in_range(year, month, date_from, date_to):
+            files.append(path)
+    return files
+
+
+def search_archive(directory=None, date_from=None, date_to=None, **filters):
+    """
+    Ищет бронирования в архиве (только чтение).
+
+    Args:
+        directory: Каталог архива
+        date_from: Начальная дата (включительно)
+        date_to: Конечная дата (включительно)
+        filters: Точные значения полей архива, например email="guest@example.com" или id=42
+
+    Yields:
+        dict: Найденные строки архива
+    """
+    for path in iter_archive_files(directory, date_from, date_to):
+        with gzip.open(path, "rt", encoding="utf-8") as archive:
+            for line in archive:
+                row = json.loads(line)
+                row_date = dt_date.fromisoformat(row["date"])
+                if date_from and row_date < date_from or date_to and row_date > date_to:
+                    continue
+                if all(row.get(name) == value for name, value in filters.items()):
+                    yield row
@@ -0,0 +1,192 @@
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from tables.models import Table
+from .models import Reservation
+
+
+def get_slot_minutes():
+    """
+    Возвращает длину одного временного слота в минутах.
+    """
+    return getattr(settings, "RESERVATION_SLOT_MINUTES", 30)
+
+
+def get_duration_minutes():
+    """
+    Возвращает длительность посадки (сколько гости занимают столик) в минутах.
+    """
+    return getattr(settings, "RESERVATION_DURATION_MINUTES", 120)
+
+
+def parse_time(value):
+    """
+    Преобразует строку вида "ЧЧ:ММ" в объект time (объекты time возвращаются как есть).
+    """
+    if isinstance(value, time):
+        return value
+    return datetime.strptime(value, "%H:%M").time()
+
+
+def slot_index(start_time):
+    """
+    Возвращает номер слота, в который попадает указанное время (отсчёт от полуночи).
+    """
+    return (start_time.hour * 60 + start_time.minute) // get_slot_minutes()
+
+
+def seating_mask(start_time):
+    """
+    Возвращает битовую маску слотов, которые занимает посадка, начинающаяся в start_time.
+
+    Бит i установлен, если посадка пересекается со слотом i.
+    """
+    slot = get_slot_minutes()
+    start = start_time.hour * 60 + start_time.minute
+    end = start + get_duration_minutes()
+    first = start // slot
+    last = (end + slot - 1) // slot
+    return ((1 << (last - first)) - 1) << first
+
+
+def service_slots():
+    """
+    Возвращает список времён начала посадки в течение дня обслуживания.
+
+    Последний слот выбирается так, чтобы посадка заканчивалась не позже закрытия.
+    """
+    opening = parse_time(getattr(settings, "RESERVATION_OPENING_TIME", "12:00"))
+    closing = parse_time(getattr(settings, "RESERVATION_CLOSING_TIME", "23:00"))
+    step = timedelta(minutes=get_slot_minutes())
+    current = datetime.combine(datetime.min, opening)
+    last_start = datetime.combine(datetime.min, closing) - timedelta(minutes=get_duration_minutes())
+    slots = []
+    while current <= last_start:
+        slots.append(current.time())
+        current += step
+    return slots
+
+
+class DayOccupancy:
+    """
+    Занятость столиков на один день обслуживания.
+
+    Для каждого столика хранится битовая карта: бит i установлен, если слот i
+    (с шагом RESERVATION_SLOT_MINUTES от полуночи) занят подтверждённым бронированием.
+    Любая проверка доступности сводится к побитовому AND для каждого столика.
+    """
+
+    def __init__(self, date, tables, bitmaps):
+        self.date = date
+        self.tables = tables
+        self.bitmaps = bitmaps
+
+    def is_table_free(self, table_id, start_time):
+        """
+        Проверяет, свободен ли столик на всё время посадки, начинающейся в start_time.
+        """
+        return not self.bitmaps.get(table_id, 0) & seating_mask(start_time)
+
+    def free_tables(self, start_time, guests):
+        """
+        Возвращает свободные столики подходящей вместимости, от меньших к большим.
+        """
+        mask = seating_mask(start_time)
+        return [
+            table for table in self.tables
+            if table.capacity >= guests and not self.bitmaps.get(table.id, 0) & mask
+        ]
+
+    def is_available(self, start_time, guests):
+        """
+        Проверяет, есть ли хотя бы один свободный столик для компании на указанное время.
+        """
+        mask = seating_mask(start_time)
+        return any(
+            table.capacity >= guests and not self.bitmaps.get(table.id, 0) & mask
+            for table in self.tables
+        )
+
+    def day_grid(self, guests):
+        """
+        Возвращает доступность всех слотов дня обслуживания для компании из guests человек.
+
+        Returns:
+            list: Список словарей с ключами time, available, free_tables и free_seats
+        """
+        suitable = [table for table in self.tables if table.capacity >= guests]
+        grid = []
+        for start_time in service_slots():
+            mask = seating_mask(start_time)
+            free = [table for table in suitable if not self.bitmaps.get(table.id, 0) & mask]
+            grid.append({
+                "time": start_time.strftime("%H:%M"),
+                "available": bool(free),
+                "free_tables": len(free),
+                "free_seats": sum(table.capacity for table in free),
+            })
+        return grid
+
+
+def _capacities_queryset():
+    return Table.objects.order_by("capacity").values_list("capacity", flat=True).distinct()
+
+
+def load_capacities():
+    """
+    Возвращает различные вместимости столиков по возрастанию.
+    """
+    return list(_capacities_queryset())
+
+
+async def aload_capacities():
+    """
+    Асинхронный вариант load_capacities.
+    """
+    return [capacity async for capacity in _capacities_queryset()]
+
+
+def _occupancy_querysets(date, exclude_pk):
+    tables = Table.objects.only("id", "number", "capacity").order_by("capacity", "number")
+    reservations = Reservation.objects.filter(
+        date=date, status="confirmed", table__isnull=False
+    )
+    if exclude_pk is not None:
+        reservations = reservations.exclude(pk=exclude_pk)
+    return tables, reservations.values_list("table_id", "time")
+
+
+def _build_occupancy(date, tables, rows):
+    bitmaps = {}
+    for table_id, start_time in rows:
+        bitmaps[table_id] = bitmaps.get(table_id, 0) | seating_mask(start_time)
+    return DayOccupancy(date, tables, bitmaps)
+
+
+def get_day_occupancy(date, exclude_pk=None, tables=None):
+    """
+    Строит занятость всех столиков на указанную дату.
+
+    Выполняет один запрос к столикам и один запрос к бронированиям дня
+    (по индексу date, time), после чего собирает битовые карты в памяти.
+
+    Args:
+        date: Дата обслуживания
+        exclude_pk: Первичный ключ бронирования, которое не нужно учитывать
+        tables: Уже загруженные столики, упорядоченные по вместимости (если не переданы, загружаются)
+
+    Returns:
+        DayOccupancy: Занятость столиков на день
+    """
+    tables_queryset, rows = _occupancy_querysets(date, exclude_pk)
+    if tables is None:
+        tables = list(tables_queryset)
+    return _build_occupancy(date, tables, rows)
+
+
+async def aget_day_occupancy(date, exclude_pk=None):
+    """
+    Асинхронный вариант get_day_occupancy для async-представлений (те же два запроса).
+    """
+    tables_queryset, rows = _occupancy_querysets(date, exclude_pk)
+    tables = [table async for table in tables_queryset]
+    return _build_occupancy(date, tables, [row async for row in rows])
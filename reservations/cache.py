@@ -0,0 +1,191 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+TABLES_VERSION_KEY = "availability:tables:version"
+DASHBOARD_VERSION_KEY = "dashboard:version"
+TABLE_CATALOG_VERSION_KEY = "tables:catalog:version"
+# Пара (версия столиков, вместимости по возрастанию); устаревает вместе с версией столиков
+CAPACITIES_KEY = "availability:tables:capacities"
+
+
+def get_timeout():
+    """
+    Возвращает время жизни закэшированных ответов о доступности в секундах.
+    """
+    return getattr(settings, "AVAILABILITY_CACHE_TIMEOUT", 3600)
+
+
+def _day_version_key(date):
+    return f"availability:day:{date.isoformat()}:version"
+
+
+def _initial_version():
+    # Версия, заведённая после вытеснения счётчика из кэша, не должна совпасть
+    # ни с одной из уже выданных, поэтому начинаем с текущего времени.
+    return time.time_ns()
+
+
+def bump_version(key):
+    """
+    Увеличивает счётчик версии, делая недоступными все ответы, построенные на старой версии.
+    """
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), None)
+
+
+def invalidate_day(date):
+    """
+    Сбрасывает закэшированную доступность на указанную дату и фрагменты панели управления.
+    """
+    if date is not None:
+        bump_version(_day_version_key(date))
+        invalidate_dashboard()
+
+
+def invalidate_tables():
+    """
+    Сбрасывает закэшированную доступность на все даты (изменился набор столиков).
+    """
+    bump_version(TABLES_VERSION_KEY)
+    invalidate_table_catalog()
+    invalidate_dashboard()
+
+
+def invalidate_table_catalog():
+    """
+    Сбрасывает закэшированные страницы со списком столиков (изменились номера или вместимость).
+    """
+    bump_version(TABLE_CATALOG_VERSION_KEY)
+
+
+def invalidate_dashboard():
+    """
+    Сбрасывает закэшированные фрагменты панели управления.
+    """
+    bump_version(DASHBOARD_VERSION_KEY)
+
+
+def _get_or_init_versions(keys, versions=None):
+    if versions is None:
+        versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+async def _aget_or_init_versions(keys, versions=None):
+    if versions is None:
+        versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, _initial_version(), None)
+            versions[key] = await cache.aget(key)
+    return [versions[key] for key in keys]
+
+
+def get_versions(date):
+    """
+    Возвращает пару версий (столики, день) для даты, заводя отсутствующие счётчики.
+    """
+    return tuple(_get_or_init_versions([TABLES_VERSION_KEY, _day_version_key(date)]))
+
+
+def get_dashboard_version():
+    """
+    Возвращает версию данных панели управления: меняется при любом изменении бронирований или столиков.
+    """
+    return _get_or_init_versions([DASHBOARD_VERSION_KEY])[0]
+
+
+async def aget_dashboard_version():
+    """
+    Асинхронный вариант get_dashboard_version.
+    """
+    return (await _aget_or_init_versions([DASHBOARD_VERSION_KEY]))[0]
+
+
+def _availability_key(date, tables_version, day_version, parts):
+    return ":".join(
+        ["availability", date.isoformat(), str(tables_version), str(day_version)]
+        + [str(part) for part in parts]
+    )
+
+
+def capacity_bucket(guests, capacities):
+    """
+    Возвращает наименьшую вместимость столика, в который помещается компания (None, если такого нет).
+
+    Компаниям с одинаковым значением подходят одни и те же столики, поэтому и
+    ответы о доступности для них совпадают.
+
+    Args:
+        guests: Количество гостей
+        capacities: Различные вместимости столиков по возрастанию
+    """
+    return next((capacity for capacity in capacities if capacity >= guests), None)
+
+
+def get_or_compute(date, parts, compute, guests=None, load_capacities=None):
+    """
+    Возвращает закэшированный ответ для даты или вычисляет и сохраняет его.
+
+    Ключ строится из даты, текущих версий и частей parts (например, слот), поэтому
+    после изменения бронирований или столиков старые ответы больше не читаются
+    и просто истекают.
+
+    Размер компании guests входит в ключ не сам по себе, а через capacity_bucket:
+    при столиках на 2, 4 и 6 мест компании из 3 и 4 человек получают один и тот
+    же закэшированный ответ. Вместимости загружает load_capacities; они хранятся
+    в кэше до следующего изменения столиков и читаются одним запросом с версиями.
+
+    Args:
+        date: Дата обслуживания
+        parts: Кортеж дополнительных частей ключа
+        compute: Функция без аргументов, вычисляющая ответ
+        guests: Размер компании, если ответ от него зависит
+        load_capacities: Функция без аргументов, возвращающая различные вместимости столиков по возрастанию
+
+    Returns:
+        Закэшированный или только что вычисленный ответ
+    """
+    version_keys = [TABLES_VERSION_KEY, _day_version_key(date)]
+    found = cache.get_many(version_keys + [CAPACITIES_KEY])
+    tables_version, day_version = _get_or_init_versions(version_keys, found)
+    if guests is not None:
+        cached_version, capacities = found.get(CAPACITIES_KEY, (None, None))
+        if cached_version != tables_version:
+            capacities = load_capacities()
+            cache.set(CAPACITIES_KEY, (tables_version, capacities), get_timeout())
+        parts = (*parts, capacity_bucket(guests, capacities))
+    key = _availability_key(date, tables_version, day_version, parts)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, get_timeout())
+    return value
+
+
+async def aget_or_compute(date, parts, compute, guests=None, load_capacities=None):
+    """
+    Асинхронный вариант get_or_compute: compute и load_capacities — корутинные функции без аргументов.
+    """
+    version_keys = [TABLES_VERSION_KEY, _day_version_key(date)]
+    found = await cache.aget_many(version_keys + [CAPACITIES_KEY])
+    tables_version, day_version = await _aget_or_init_versions(version_keys, found)
+    if guests is not None:
+        cached_version, capacities = found.get(CAPACITIES_KEY, (None, None))
+        if cached_version != tables_version:
+            capacities = await load_capacities()
+            await cache.aset(CAPACITIES_KEY, (tables_version, capacities), get_timeout())
+        parts = (*parts, capacity_bucket(guests, capacities))
+    key = _availability_key(date, tables_version, day_version, parts)
+    value = await cache.aget(key)
+    if value is None:
+        value = await compute()
+        await cache.aset(key, value, get_timeout())
+    return value
@@ -0,0 +1,125 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models import Count, Sum
+from django.utils import timezone
+from .availability import aget_day_occupancy, get_day_occupancy, slot_index
+from .models import Reservation, OccupancySummary
+
+# Имена фрагментов {% cache %} в reservations/admin_dashboard.html
+DAILY_SUMMARY_FRAGMENT = "dashboard_daily_summary"
+FREE_TABLES_FRAGMENT = "dashboard_free_tables"
+
+
+def get_dashboard_days():
+    """
+    Возвращает количество дней, за которые панель управления показывает сводку.
+    """
+    return getattr(settings, "DASHBOARD_DAYS", 14)
+
+
+def _summary_querysets(today, days):
+    last_day = today + timedelta(days=days - 1)
+    counts = (
+        Reservation.objects.filter(date__range=(today, last_day))
+        .values_list("date", "status")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    covers = (
+        OccupancySummary.objects.filter(date__range=(today, last_day))
+        .values("date")
+        .annotate(covers=Sum("covers"))
+        .order_by()
+        .values_list("date", "covers")
+    )
+    return counts, covers
+
+
+def _build_summary(today, days, count_rows, covers):
+    counts = defaultdict(dict)
+    for date, status, count in count_rows:
+        counts[date][status] = count
+    summary = []
+    for offset in range(days):
+        date = today + timedelta(days=offset)
+        statuses = [counts[date].get(status, 0) for status, _ in Reservation.STATUS_CHOICES]
+        summary.append({
+            "date": date,
+            "statuses": statuses,
+            "total": sum(statuses),
+            "covers": covers.get(date, 0),
+        })
+    return summary
+
+
+def daily_summary(today, days=None):
+    """
+    Сводка по дням: количество бронирований в каждом статусе и подтверждённые гости.
+
+    Выполняет два сгруппированных запроса независимо от числа бронирований:
+    по бронированиям (дата, статус) и по почасовой сводке (дата).
+
+    Returns:
+        list: Словари с ключами date, statuses, total и covers, по одному на каждый день
+    """
+    days = days or get_dashboard_days()
+    counts, covers = _summary_querysets(today, days)
+    return _build_summary(today, days, list(counts), dict(covers))
+
+
+async def adaily_summary(today, days=None):
+    """
+    Асинхронный вариант daily_summary.
+    """
+    days = days or get_dashboard_days()
+    counts, covers = _summary_querysets(today, days)
+    return _build_summary(today, days, [row async for row in counts], {date: value async for date, value in covers})
+
+
+def _group_tables(occupancy, start_time):
+    groups = {}
+    for table in occupancy.tables:
+        group = groups.setdefault(table.capacity, {"capacity": table.capacity, "total": 0, "free": 0})
+        group["total"] += 1
+        if occupancy.is_table_free(table.id, start_time):
+            group["free"] += 1
+    return list(groups.values())
+
+
+def tables_by_capacity(now):
+    """
+    Количество столов каждой вместимости и сколько из них свободно для посадки, начинающейся сейчас.
+
+    Returns:
+        list: Словари с ключами capacity, total и free, по возрастанию вместимости
+    """
+    local_now = timezone.localtime(now)
+    return _group_tables(get_day_occupancy(local_now.date()), local_now.time())
+
+
+async def atables_by_capacity(now):
+    """
+    Асинхронный вариант tables_by_capacity.
+    """
+    local_now = timezone.localtime(now)
+    return _group_tables(await aget_day_occupancy(local_now.date()), local_now.time())
+
+
+def current_slot_key(now):
+    """
+    Возвращает ключ текущего слота: блок свободных столов меняется вместе со слотом.
+    """
+    local_now = timezone.localtime(now)
+    return f"{local_now.date().isoformat()}:{slot_index(local_now.time())}"
+
+
+def fragment_keys(dashboard_version, today, slot_key):
+    """
+    Возвращает ключи кэша обоих фрагментов панели так же, как их строит тег {% cache %}.
+    """
+    return (
+        make_template_fragment_key(DAILY_SUMMARY_FRAGMENT, [dashboard_version, today]),
+        make_template_fragment_key(FREE_TABLES_FRAGMENT, [dashboard_version, slot_key]),
+    )
@@ -0,0 +1,206 @@
+import json
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+from .cache import _initial_version
+from .models import Reservation
+
+EVENTS_SEQUENCE_KEY = "events:sequence"
+
+# Изменение статуса, о котором сообщается в потоке событий панели управления
+STATUS_EVENTS = {"confirmed": "confirmed", "cancelled": "cancelled"}
+
+
+def get_retention():
+    """
+    Возвращает время хранения событий в секундах (за это время клиент может переподключиться без потерь).
+    """
+    return getattr(settings, "RESERVATION_EVENTS_RETENTION", 3600)
+
+
+def _event_key(event_id):
+    return f"events:{event_id}"
+
+
+def event_payload(reservation, kind, previous_status=None):
+    """
+    Описание события для клиента: сам вид события и поля бронирования, нужные панели.
+    """
+    # Дату и время могли присвоить строками ("2030-01-01", "19:00")
+    date = Reservation._meta.get_field("date").to_python(reservation.date)
+    start_time = Reservation._meta.get_field("time").to_python(reservation.time)
+    return {
+        "kind": kind,
+        "reservation": reservation.pk,
+        "date": date.isoformat(),
+        "time": start_time.strftime("%H:%M"),
+        "guests": reservation.guests,
+        "status": reservation.status,
+        "previous_status": previous_status,
+        "table": reservation.table_id,
+    }
+
+
+def publish_events(payloads):
+    """
+    Записывает события в кэш под последовательными номерами.
+
+    Номера выдаются одним атомарным incr на всю пачку, поэтому события
+    разных процессов не перемешиваются и не теряются (при общем кэше, например Redis).
+
+    Returns:
+        int: Номер последнего записанного события или None, если событий нет
+    """
+    payloads = list(payloads)
+    if not payloads:
+        return None
+    try:
+        last_id = cache.incr(EVENTS_SEQUENCE_KEY, len(payloads))
+    except ValueError:
+        # Счётчик ещё не создан или вытеснен: новая последовательность начинается со времени,
+        # поэтому её номера больше всех выданных раньше
+        cache.add(EVENTS_SEQUENCE_KEY, _initial_version(), None)
+        last_id = cache.incr(EVENTS_SEQUENCE_KEY, len(payloads))
+    first_id = last_id - len(payloads) + 1
+    cache.set_many(
+        {_event_key(first_id + offset): payload for offset, payload in enumerate(payloads)},
+        get_retention(),
+    )
+    return last_id
+
+
+def schedule_events(payloads):
+    """
+    Публикует события после фиксации текущей транзакции (при откате они не появятся).
+    """
+    payloads = list(payloads)
+    if payloads:
+        transaction.on_commit(lambda: publish_events(payloads))
+
+
+def get_last_event_id():
+    """
+    Возвращает номер последнего опубликованного события (None, если событий ещё не было).
+    """
+    return cache.get(EVENTS_SEQUENCE_KEY)
+
+
+async def aget_last_event_id():
+    """
+    Асинхронный вариант get_last_event_id.
+    """
+    return await cache.aget(EVENTS_SEQUENCE_KEY)
+
+
+def read_events(after_id, limit=500):
+    """
+    Читает опубликованные события с номерами больше after_id.
+
+    Returns:
+        tuple: Список пар (номер, событие), номер, с которого продолжать чтение,
+        и признак того, что клиент отстал больше чем на limit событий
+    """
+    last_id = get_last_event_id()
+    if last_id is None or after_id is None or last_id <= after_id:
+        return [], after_id if after_id is not None else last_id, False
+    if last_id - after_id > limit:
+        return [], last_id, True
+    ids = range(after_id + 1, last_id + 1)
+    found = cache.get_many([_event_key(event_id) for event_id in ids])
+    events = []
+    for event_id in ids:
+        payload = found.get(_event_key(event_id))
+        if payload is None:
+            # Номер выдан, но событие ещё не записано: вернёмся к нему при следующем опросе
+            break
+        events.append((event_id, payload))
+    next_id = events[-1][0] if events else after_id
+    return events, next_id, False
+
+
+def format_sse(event_id, kind, payload):
+    """
+    Форматирует одно событие в формате text/event-stream.
+    """
+    data = json.dumps(payload, ensure_ascii=False)
+    return f"id: {event_id}\nevent: {kind}\ndata: {data}\n\n"
+
+
+class EventStream:
+    """
+    Поток событий для одного клиента: опрашивает кэш и отдаёт новые события в формате SSE.
+
+    Поток ограничен по времени: по истечении max_duration соединение
+    закрывается, и EventSource переподключается с заголовком Last-Event-ID,
+    не теряя событий. Пока событий нет, раз в heartbeat секунд отправляется
+    комментарий, чтобы прокси не закрывали соединение.
+    """
+
+    def __init__(self, last_event_id, poll_interval, heartbeat, max_duration, stale_after=5.0):
+        self.last_id = last_event_id
+        self.poll_interval = poll_interval
+        self.heartbeat = heartbeat
+        self.max_duration = max_duration
+        self.stale_after = stale_after
+        self._started = time.monotonic()
+        self._last_sent = self._started
+        self._waiting_since = None
+
+    def expired(self):
+        return time.monotonic() - self._started >= self.max_duration
+
+    def poll(self):
+        """
+        Возвращает готовые к отправке фрагменты потока (возможно, пустой список).
+        """
+        chunks = []
+        if self.last_id is None:
+            self.last_id = get_last_event_id() or 0
+            chunks.append("retry: 3000\n\n")
+        events, next_id, lagging = read_events(self.last_id)
+        now = time.monotonic()
+        if lagging:
+            chunks.append(format_sse(next_id, "reset", {}))
+        elif not events and next_id is not None and (get_last_event_id() or 0) > next_id:
+            # Событие с номером next_id + 1 не появилось за stale_after секунд (истекло или
+            # процесс упал до записи): пропускаем его
+            if self._waiting_since is None:
+                self._waiting_since = now
+            elif now - self._waiting_since >= self.stale_after:
+                next_id += 1
+                self._waiting_since = None
+        else:
+            self._waiting_since = None
+        for event_id, payload in events:
+            chunks.append(format_sse(event_id, payload["kind"], payload))
+        self.last_id = next_id
+        if chunks:
+            self._last_sent = now
+        elif now - self._last_sent >= self.heartbeat:
+            chunks.append(": heartbeat\n\n")
+            self._last_sent = now
+        return chunks
+
+
+@receiver(post_init, sender=Reservation)
+def remember_event_status(sender, instance, **kwargs):
+    """
+    Запоминает исходный статус бронирования, чтобы отличить подтверждение и отмену от прочих изменений.
+    """
+    instance._event_status = instance.__dict__.get("status")
+
+
+@receiver(post_save, sender=Reservation)
+def publish_reservation_event(sender, instance, created, **kwargs):
+    """
+    Публикует событие о создании, подтверждении или отмене бронирования.
+    """
+    previous_status = instance._event_status
+    instance._event_status = instance.status
+    if created:
+        schedule_events([event_payload(instance, "created")])
+    elif instance.status != previous_status and instance.status in STATUS_EVENTS:
+        schedule_events([event_payload(instance, STATUS_EVENTS[instance.status], previous_status)])
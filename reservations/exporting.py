@@ -0,0 +1,76 @@
+import csv
+from itertools import islice
+from asgiref.sync import sync_to_async
+
+EXPORT_FIELDS = [
+    ("id", "ID"),
+    ("date", "Дата"),
+    ("time", "Время"),
+    ("guests", "Гости"),
+    ("phone", "Телефон"),
+    ("email", "Email"),
+    ("status", "Статус"),
+    ("table__number", "Стол"),
+    ("created_at", "Создано"),
+]
+
+
+class Echo:
+    """
+    Псевдофайл для csv.writer: вместо записи возвращает строку, чтобы её можно было отдать в поток.
+    """
+
+    def write(self, value):
+        return value
+
+
+def _export_rows(queryset):
+    return queryset.order_by("date", "time", "id").values_list(*[field for field, _ in EXPORT_FIELDS])
+
+
+def _header(writer):
+    # BOM, чтобы Excel правильно определил кодировку UTF-8
+    return "\ufeff" + writer.writerow([title for _, title in EXPORT_FIELDS])
+
+
+def stream_reservations_csv(queryset, chunk_size=2000):
+    """
+    Построчно формирует CSV с бронированиями из queryset.
+
+    Строки читаются через values_list(...).iterator(), поэтому в памяти
+    находится не больше одной пачки из chunk_size строк, а первые байты
+    уходят клиенту сразу после выполнения запроса. Номер стола берётся
+    через JOIN в том же запросе.
+
+    Yields:
+        str: Очередная строка CSV
+    """
+    writer = csv.writer(Echo())
+    yield _header(writer)
+    for row in _export_rows(queryset).iterator(chunk_size=chunk_size):
+        yield writer.writerow(row)
+
+
+async def astream_reservations_csv(queryset, chunk_size=2000):
+    """
+    Асинхронный вариант stream_reservations_csv для ASGI.
+
+    Синхронный итератор обработчик ASGI собрал бы целиком в список до
+    отправки первого байта; асинхронный отдаётся клиенту по пачкам.
+    QuerySet.aiterator() здесь не подходит: для values_list он выполняет
+    запрос прямо в цикле событий, поэтому пачки читаются одним и тем же
+    курсором в потоке для синхронного ORM.
+    """
+    writer = csv.writer(Echo())
+    yield _header(writer)
+    rows = None
+
+    def fetch_chunk():
+        nonlocal rows
+        if rows is None:
+            rows = _export_rows(queryset).iterator(chunk_size=chunk_size)
+        return list(islice(rows, chunk_size))
+
+    fetch_chunk = sync_to_async(fetch_chunk)
+    while chunk := await fetch_chunk():
+        yield "".join(writer.writerow(row) for row in chunk)
@@ -0,0 +1,121 @@
+import csv
+import json
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from .cache import invalidate_day
+from .events import event_payload, schedule_events
+from .forms import ReservationForm
+from .models import Reservation
+from .summary import schedule_summary_refresh
+
+STATUSES = {status for status, _ in Reservation.STATUS_CHOICES}
+
+
+def iter_rows(stream, fmt):
+    """
+    Построчно читает бронирования из CSV (с заголовком) или JSONL, не загружая файл целиком.
+
+    Yields:
+        tuple: Номер строки файла и словарь значений (или None для нечитаемой строки JSONL)
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def validate_row(row):
+    """
+    Проверяет строку по тем же правилам, что ReservationForm и Reservation.save.
+
+    Returns:
+        tuple: Несохранённое бронирование и None либо None и словарь ошибок
+    """
+    if row is None:
+        return None, {"__all__": ["Строка не является JSON-объектом"]}
+
+    form = ReservationForm(data=row)
+    if not form.is_valid():
+        return None, {field: list(errors) for field, errors in form.errors.items()}
+
+    reservation = form.instance
+    errors = {}
+    email = row.get("email")
+    if email:
+        try:
+            reservation.email = Reservation._meta.get_field("email").clean(email, reservation)
+        except ValidationError as e:
+            errors["email"] = e.messages
+    status = row.get("status")
+    if status:
+        if status not in STATUSES:
+            errors["status"] = [f"Неизвестный статус: {status}"]
+        reservation.status = status
+    try:
+        reservation.check_lead_time()
+    except ValueError as e:
+        errors["__all__"] = [str(e)]
+    if errors:
+        return None, errors
+    return reservation, None
+
+
+def import_reservations(rows, chunk_size=1000, rejects=None, dry_run=False):
+    """
+    Проверяет и сохраняет бронирования пачками через bulk_create.
+
+    В памяти одновременно находится не больше одной пачки, каждая пачка
+    вставляется одним INSERT в своей транзакции. Отклонённые строки пишутся в
+    rejects по одному JSON-объекту на строку.
+
+    Args:
+        rows: Итератор пар (номер строки, словарь значений), например из iter_rows
+        chunk_size: Количество строк в одной пачке
+        rejects: Файловый объект для отклонённых строк (или None)
+        dry_run: Только проверить строки, ничего не сохраняя
+
+    Returns:
+        tuple: Количество импортированных и отклонённых строк
+    """
+    imported = rejected = 0
+    chunk = []
+
+    def flush():
+        if not chunk:
+            return 0
+        if not dry_run:
+            with transaction.atomic():
+                Reservation.objects.bulk_create(chunk)
+                # bulk_create не вызывает post_save, поэтому кэш и сводку обновляем сами
+                for date in {reservation.date for reservation in chunk}:
+                    transaction.on_commit(lambda date=date: invalidate_day(date))
+                schedule_summary_refresh((reservation.date, reservation.time) for reservation in chunk)
+                schedule_events(event_payload(reservation, "created") for reservation in chunk)
+        count = len(chunk)
+        chunk.clear()
+        return count
+
+    for line_number, row in rows:
+        reservation, errors = validate_row(row)
+        if errors:
+            rejected += 1
+            if rejects is not None:
+                rejects.write(json.dumps(
+                    {"line": line_number, "row": row, "errors": errors}, ensure_ascii=False
+                ) + "\n")
+            continue
+        chunk.append(reservation)
+        if len(chunk) >= chunk_size:
+            imported += flush()
+    imported += flush()
+    return imported, rejected
@@ -0,0 +1,325 @@
+import html
+import json
+import math
+import random
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from datetime import time as dt_time, timedelta
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Max
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from tables.models import Table
+from .models import Reservation, OccupancySummary, OutboxEmail
+from .services import bulk_delete_reservations
+
+LOADTEST_EMAIL_DOMAIN = "loadtest.invalid"
+DEFAULT_MIX = "check_availability=60,create_reservation=20,confirm_reservation=10,cancel_reservation=10"
+SEATING_TIMES = [dt_time(hour, minute) for hour in range(12, 22) for minute in (0, 30)]
+
+
+def parse_mix(value):
+    """
+    Разбирает состав нагрузки вида "check_availability=60,create_reservation=20".
+
+    Returns:
+        dict: Вес каждого сценария
+
+    Raises:
+        ValueError: Если сценарий неизвестен или вес некорректен
+    """
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Неизвестный сценарий: {name}")
+        mix[name] = int(weight) if weight else 1
+        if mix[name] < 0:
+            raise ValueError(f"Вес сценария {name} не может быть отрицательным")
+    if not any(mix.values()):
+        raise ValueError("Сумма весов сценариев должна быть положительной")
+    return mix
+
+
+def percentile(sorted_values, q):
+    """
+    Возвращает перцентиль q (0–100) отсортированного списка методом ближайшего ранга.
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def is_test_database():
+    """
+    Проверяет, что прогон пойдёт в одноразовую базу: тестовую базу Django (имя с префиксом test_) или базу в памяти.
+    """
+    name = str(connection.settings_dict["NAME"] or "")
+    return name.startswith("test_") or connection.creation.is_in_memory_db(name)
+
+
+class LoadTestState:
+    """
+    Общие данные прогона: даты, столики и пулы бронирований для подтверждения и отмены.
+    """
+
+    def __init__(self, users, tables, dates, pending):
+        self.users = users
+        self.table_ids = [table.id for table in tables]
+        self.dates = dates
+        self._pending = pending
+        self._lock = threading.Lock()
+
+    def take_pending(self):
+        with self._lock:
+            return self._pending.pop() if self._pending else None
+
+
+def seed_loadtest(workers, pending_count, days=30, seed=0):
+    """
+    Создаёт столики по tables_fixture.json, по пользователю на поток и пул ожидающих бронирований.
+
+    Все данные размещаются на даты через десять лет и помечаются доменом
+    LOADTEST_EMAIL_DOMAIN, чтобы не пересекаться с рабочими бронированиями.
+
+    Returns:
+        LoadTestState: Состояние прогона
+    """
+    rng = random.Random(seed)
+    with open(settings.BASE_DIR / "tables_fixture.json", encoding="utf-8") as fixture:
+        capacities = [item["fields"]["capacity"] for item in json.load(fixture) if item["model"] == "tables.table"]
+    first_number = (Table.objects.aggregate(Max("number"))["number__max"] or 0) + 1
+    tables = Table.objects.bulk_create(
+        Table(number=first_number + i, capacity=capacity) for i, capacity in enumerate(capacities)
+    )
+
+    users = [
+        User.objects.create_user(f"loadtest-{i}", f"loadtest-{i}@{LOADTEST_EMAIL_DOMAIN}")
+        for i in range(workers)
+    ]
+    first_date = timezone.now().date() + timedelta(days=3650)
+    dates = [first_date + timedelta(days=offset) for offset in range(days)]
+    pending = Reservation.objects.bulk_create(
+        Reservation(
+            date=rng.choice(dates),
+            time=rng.choice(SEATING_TIMES),
+            guests=rng.randint(1, 4),
+            phone="0000000000",
+            email=users[i % workers].email,
+        )
+        for i in range(pending_count)
+    )
+    return LoadTestState(users, tables, dates, [reservation.pk for reservation in pending])
+
+
+def cleanup_loadtest(state):
+    """
+    Удаляет всё, что создали seed_loadtest и сами запросы прогона.
+    """
+    emails = [user.email for user in state.users]
+    bulk_delete_reservations(Reservation.objects.filter(email__in=emails))
+    # Удаление пересчитало сводку прогона в нулевые строки; строки с чужими бронированиями остаются
+    OccupancySummary.objects.filter(date__in=state.dates, reservations=0).delete()
+    OutboxEmail.objects.filter(recipient__in=emails).delete()
+    User.objects.filter(pk__in=[user.pk for user in state.users]).delete()
+    Table.objects.filter(pk__in=state.table_ids).delete()
+
+
+def check_availability(client, state, rng):
+    return client.get(reverse("check_availability"), {
+        "date": rng.choice(state.dates).isoformat(),
+        "time": rng.choice(SEATING_TIMES).strftime("%H:%M"),
+        "guests": rng.randint(1, 6),
+    })
+
+
+def create_reservation(client, state, rng):
+    return client.post(reverse("create_reservation"), {
+        "date": rng.choice(state.dates).isoformat(),
+        "time": rng.choice(SEATING_TIMES).strftime("%H:%M"),
+        "guests": rng.randint(1, 6),
+        "phone": "0000000000",
+    })
+
+
+def confirm_reservation(client, state, rng):
+    pk = state.take_pending()
+    if pk is None:
+        return None
+    return client.post(reverse("confirm_reservation", args=[pk]), {"table": rng.choice(state.table_ids)})
+
+
+def cancel_reservation(client, state, rng):
+    pk = state.take_pending()
+    if pk is None:
+        return None
+    return client.post(reverse("cancel_reservation", args=[pk]))
+
+
+# Сценарий и коды ответа, которые считаются успешными (409 — ожидаемый конфликт столика)
+SCENARIOS = {
+    "check_availability": (check_availability, {200}),
+    "create_reservation": (create_reservation, {200, 302}),
+    "confirm_reservation": (confirm_reservation, {302, 409}),
+    "cancel_reservation": (cancel_reservation, {302}),
+}
+
+
+def run_loadtest(state, mix, workers, requests=None, duration=None, seed=0, host="localhost"):
+    """
+    Выполняет запросы из нескольких потоков через обработчик приложения в том же процессе.
+
+    Каждый поток работает со своим клиентом (сессией пользователя) и своим
+    соединением с БД и выбирает сценарии случайно с весами из mix. Прогон
+    завершается после requests запросов или по истечении duration секунд.
+
+    Returns:
+        tuple: Список замеров (сценарий, задержка в секундах, код ответа, успех) и длительность прогона
+    """
+    names = [name for name, weight in mix.items() if weight]
+    weights = [mix[name] for name in names]
+    samples = []
+    lock = threading.Lock()
+    issued = [0]
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+
+    def next_request():
+        with lock:
+            if requests is not None and issued[0] >= requests:
+                return False
+            issued[0] += 1
+        return deadline is None or time.perf_counter() < deadline
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        client = Client(HTTP_HOST=host, raise_request_exception=False)
+        client.force_login(state.users[index])
+        local = []
+        try:
+            while next_request():
+                name = rng.choices(names, weights)[0]
+                scenario, ok_statuses = SCENARIOS[name]
+                request_started = time.perf_counter()
+                response = scenario(client, state, rng)
+                elapsed = time.perf_counter() - request_started
+                if response is None:
+                    continue
+                local.append((name, elapsed, response.status_code, response.status_code in ok_statuses))
+        finally:
+            connection.close()
+            with lock:
+                samples.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def _stats(samples, elapsed):
+    latencies = sorted(latency for _, latency, _, _ in samples)
+    statuses = defaultdict(int)
+    for _, _, status, _ in samples:
+        statuses[str(status)] += 1
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for *_, ok in samples if not ok),
+        "rps": round(len(samples) / elapsed, 2) if elapsed else None,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else None,
+        **{
+            f"p{q}_ms": round(percentile(latencies, q) * 1000, 3) if latencies else None
+            for q in (50, 95, 99)
+        },
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else None,
+        "statuses": dict(statuses),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(samples, elapsed, mix, workers, seed):
+    """
+    Собирает отчёт: параметры прогона, общая статистика и статистика по каждому сценарию.
+
+    Параметры (состав нагрузки, число потоков, seed, СУБД и коммит) входят в
+    отчёт, чтобы сравнивать только сопоставимые прогоны.
+    """
+    by_scenario = defaultdict(list)
+    for sample in samples:
+        by_scenario[sample[0]].append(sample)
+    return {
+        "commit": _git_commit(),
+        "started_at": timezone.now().isoformat(),
+        "database": connection.vendor,
+        "workers": workers,
+        "seed": seed,
+        "mix": mix,
+        "duration_s": round(elapsed, 3),
+        "total": _stats(samples, elapsed),
+        "scenarios": {name: _stats(by_scenario[name], elapsed) for name in sorted(by_scenario)},
+    }
+
+
+def compare_reports(report, baseline):
+    """
+    Сравнивает перцентили и RPS с отчётом предыдущего прогона.
+
+    Returns:
+        dict: Для каждого сценария — относительное изменение p50, p95, p99 и rps в процентах
+    """
+    changes = {}
+    for name, stats in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        changes[name] = {
+            key: round((stats[key] - previous[key]) / previous[key] * 100, 1)
+            for key in ("p50_ms", "p95_ms", "p99_ms", "rps")
+            if stats.get(key) is not None and previous.get(key)
+        }
+    return changes
+
+
+def render_html_report(report):
+    """
+    Возвращает отчёт в виде самостоятельной HTML-страницы.
+    """
+    columns = ("requests", "errors", "rps", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")
+    rows = [("Всего", report["total"])] + list(report["scenarios"].items())
+    body = "".join(
+        "<tr><th>{}</th>{}</tr>".format(
+            html.escape(name), "".join(f"<td>{html.escape(str(stats[column]))}</td>" for column in columns)
+        )
+        for name, stats in rows
+    )
+    header = "".join(f"<th>{column}</th>" for column in columns)
+    meta = ", ".join(
+        f"{key}: {html.escape(str(report[key]))}"
+        for key in ("commit", "started_at", "database", "workers", "seed", "duration_s")
+    )
+    return (
+        "<!DOCTYPE html><html lang=\"ru\"><head><meta charset=\"utf-8\">"
+        "<title>Нагрузочный тест</title></head><body>"
+        f"<h1>Нагрузочный тест</h1><p>{meta}</p>"
+        f"<p>Состав нагрузки: {html.escape(json.dumps(report['mix'], ensure_ascii=False))}</p>"
+        f"<table border=\"1\" cellpadding=\"4\"><thead><tr><th></th>{header}</tr></thead>"
+        f"<tbody>{body}</tbody></table></body></html>"
+    )
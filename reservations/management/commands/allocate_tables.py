@@ -0,0 +1,33 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+from reservations.allocation import allocate_tables
+from reservations.services import is_overlap_violation
+
+
+class Command(BaseCommand):
+    help = "Автоматически назначает столики ожидающим бронированиям на указанную дату (наименьший подходящий столик)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", required=True, help="Дата обслуживания ГГГГ-ММ-ДД")
+        parser.add_argument("--no-notify", action="store_true", help="Не отправлять письма о подтверждении")
+
+    def handle(self, *args, **options):
+        try:
+            date = datetime.strptime(options["date"], "%Y-%m-%d").date()
+        except ValueError:
+            raise CommandError("Дата должна быть в формате ГГГГ-ММ-ДД")
+
+        try:
+            assigned, unassigned = allocate_tables(date, notify=not options["no_notify"])
+        except IntegrityError as e:
+            if not is_overlap_violation(e):
+                raise
+            raise CommandError("Распределение отменено: столик одновременно подтвердили вручную, повторите команду")
+        for reservation in assigned:
+            self.stdout.write(f"{reservation}: {reservation.table}")
+        for reservation in unassigned:
+            self.stdout.write(self.style.WARNING(f"{reservation}: нет свободного столика"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Рассажено {len(assigned)} бронирований, без столика осталось {len(unassigned)}"
+        ))
@@ -0,0 +1,41 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from reservations.archiving import ArchiveVerificationError, archive_reservations, get_archive_dir
+from reservations.models import Reservation
+
+
+class Command(BaseCommand):
+    help = "Переносит бронирования до указанной даты в сжатые файлы архива по месяцам и удаляет их пачками"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--before", required=True, help="Архивировать бронирования с датой раньше ГГГГ-ММ-ДД")
+        parser.add_argument("--dir", help="Каталог архива вместо RESERVATIONS_ARCHIVE_DIR")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Количество строк в одной пачке")
+        parser.add_argument("--keep", action="store_true", help="Только записать архив, не удаляя строки")
+        parser.add_argument("--dry-run", action="store_true", help="Только посчитать, ничего не записывая")
+
+    def handle(self, *args, **options):
+        try:
+            before = datetime.strptime(options["before"], "%Y-%m-%d").date()
+        except ValueError:
+            raise CommandError("Дата должна быть в формате ГГГГ-ММ-ДД")
+        if options["batch_size"] <= 0:
+            raise CommandError("Размер пачки должен быть положительным")
+
+        if options["dry_run"]:
+            count = Reservation.objects.filter(date__lt=before).count()
+            self.stdout.write(f"Будет архивировано {count} бронирований")
+            return
+
+        try:
+            result = archive_reservations(
+                before, directory=options["dir"], batch_size=options["batch_size"], delete=not options["keep"],
+            )
+        except ArchiveVerificationError as e:
+            raise CommandError(f"Проверка архива не пройдена, строки не удалены: {e}")
+        for path in result["files"]:
+            self.stdout.write(path)
+        self.stdout.write(self.style.SUCCESS(
+            f"Архивировано {result['archived']} бронирований, удалено {result['deleted']} "
+            f"(каталог {options['dir'] or get_archive_dir()})"
+        ))
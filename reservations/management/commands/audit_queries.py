@@ -0,0 +1,42 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from reservations.query_audit import isolated_cache, run_audit, seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Проверяет все страницы на наборе данных реалистичного объёма: количество запросов, "
+        "время в БД и планы запросов. Данные создаются во временной транзакции и откатываются"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reservations", type=int, default=50000, help="Количество бронирований в наборе данных")
+        parser.add_argument("--tables", type=int, default=30, help="Количество столиков в наборе данных")
+        parser.add_argument("--report", help="Файл для отчёта в формате JSON")
+
+    def handle(self, *args, **options):
+        # Данные откатываются, поэтому и построенные по ним записи кэша не должны пережить проверку
+        with isolated_cache(), transaction.atomic():
+            users = seed_dataset(reservations=options["reservations"], tables=options["tables"])
+            reports = run_audit(users)
+            transaction.set_rollback(True)
+
+        failed = 0
+        for report in reports:
+            if report["violations"]:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"{report['name']}: {'; '.join(report['violations'])}"))
+            else:
+                self.stdout.write(
+                    f"{report['name']}: {report['queries']}/{report['budget']} запросов, "
+                    f"{report['db_time'] * 1000:.1f} мс в БД"
+                )
+
+        if options["report"]:
+            with open(options["report"], "w", encoding="utf-8") as report_file:
+                json.dump(reports, report_file, ensure_ascii=False, indent=2, default=str)
+
+        if failed:
+            raise CommandError(f"Страниц с нарушениями: {failed}")
+        self.stdout.write(self.style.SUCCESS("Все страницы укладываются в бюджет запросов"))
@@ -0,0 +1,142 @@
+import queue
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import time as dt_time, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+from reservations.availability import seating_mask
+from reservations.models import Reservation
+from reservations.services import TableConflictError, assign_table
+from tables.models import Table
+
+
+def describe_error(error):
+    """
+    Краткое описание ошибки для сводки: класс и первая строка сообщения (у ошибок psycopg она содержит суть).
+    """
+    lines = str(error).strip().splitlines()
+    message = lines[0][:200] if lines else ""
+    return f"{type(error).__name__}: {message}" if message else type(error).__name__
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест подтверждения бронирований: параллельные потоки назначают "
+        "столики из одного пула и проверяют отсутствие двойных бронирований"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tables", type=int, default=5, help="Количество столиков в пуле")
+        parser.add_argument("--reservations", type=int, default=200, help="Количество бронирований")
+        parser.add_argument("--workers", type=int, default=16, help="Количество параллельных потоков")
+        parser.add_argument("--seed", type=int, default=None, help="Начальное значение генератора случайных чисел")
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            raise CommandError("Тест требует СУБД с блокировками строк (PostgreSQL)")
+
+        rng = random.Random(options["seed"])
+        tables, reservations = self._seed(options["tables"], options["reservations"])
+        table_ids = [table.id for table in tables]
+        work = queue.Queue()
+        for reservation in reservations:
+            # Каждый подтверждающий перебирает столики в своём порядке, пока не найдёт свободный
+            candidates = table_ids[:]
+            rng.shuffle(candidates)
+            work.put((reservation.pk, candidates))
+        results = defaultdict(int)
+        # Тип и текст каждой ошибки: ради взаимных блокировок и ошибок сериализации тест и запускается
+        errors = Counter()
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                while True:
+                    try:
+                        reservation_pk, candidates = work.get_nowait()
+                    except queue.Empty:
+                        return
+                    outcome = "unassigned"
+                    for table_id in candidates:
+                        try:
+                            assign_table(reservation_pk, table_id, notify=False)
+                        except TableConflictError:
+                            with lock:
+                                results["conflicts"] += 1
+                            continue
+                        except Exception as e:
+                            with lock:
+                                errors[describe_error(e)] += 1
+                            outcome = "errors"
+                            break
+                        outcome = "confirmed"
+                        break
+                    with lock:
+                        results[outcome] += 1
+            finally:
+                connection.close()
+
+        try:
+            threads = [threading.Thread(target=worker) for _ in range(options["workers"])]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+
+            double_booked = self._count_double_bookings(reservations)
+            self.stdout.write(f"Потоков: {options['workers']}, столиков: {len(tables)}, бронирований: {len(reservations)}")
+            self.stdout.write(f"Подтверждено: {results['confirmed']}, без столика: {results['unassigned']}, конфликтов: {results['conflicts']}, ошибок: {results['errors']}")
+            for description, count in errors.most_common():
+                self.stdout.write(self.style.ERROR(f"  {count} × {description}"))
+            self.stdout.write(f"Время: {elapsed:.3f} с, пропускная способность: {len(reservations) / elapsed:.1f} подтверждений/с")
+            if double_booked:
+                raise CommandError(f"Обнаружено двойных бронирований: {double_booked}")
+            self.stdout.write(self.style.SUCCESS("Двойных бронирований не обнаружено"))
+        finally:
+            Reservation.objects.filter(pk__in=[reservation.pk for reservation in reservations]).delete()
+            Table.objects.filter(pk__in=table_ids).delete()
+
+    def _seed(self, table_count, reservation_count):
+        """
+        Создаёт временный пул столиков и бронирований на один вечер в далёком будущем.
+        """
+        first_number = (Table.objects.aggregate(Max("number"))["number__max"] or 0) + 1
+        tables = [
+            Table.objects.create(number=first_number + i, capacity=4)
+            for i in range(table_count)
+        ]
+        date = timezone.now().date() + timedelta(days=3650)
+        times = [dt_time(hour, minute) for hour in range(17, 22) for minute in (0, 30)]
+        reservations = [
+            Reservation.objects.create(
+                date=date,
+                time=times[i % len(times)],
+                guests=2,
+                phone="0000000000",
+                email="benchmark@example.com",
+            )
+            for i in range(reservation_count)
+        ]
+        return tables, reservations
+
+    def _count_double_bookings(self, reservations):
+        """
+        Считает пары подтверждённых бронирований, пересекающихся по времени на одном столике.
+        """
+        by_table = defaultdict(list)
+        confirmed = Reservation.objects.filter(
+            pk__in=[reservation.pk for reservation in reservations], status="confirmed"
+        ).values_list("table_id", "time")
+        for table_id, start_time in confirmed:
+            by_table[table_id].append(seating_mask(start_time))
+        overlaps = 0
+        for masks in by_table.values():
+            for i, mask in enumerate(masks):
+                overlaps += sum(1 for other in masks[i + 1:] if other & mask)
+        return overlaps
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from restaurant_booking.responsive_images import build_images, get_output_dir
+
+
+class Command(BaseCommand):
+    help = "Строит уменьшенные копии изображений статики (AVIF, WebP, JPEG/PNG) для srcset"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--widths", help="Ширины через запятую вместо RESPONSIVE_IMAGE_WIDTHS, например 320,640,1280",
+        )
+
+    def handle(self, *args, **options):
+        widths = None
+        if options["widths"]:
+            try:
+                widths = [int(width) for width in options["widths"].split(",")]
+            except ValueError:
+                raise CommandError("Ширины должны быть целыми числами через запятую")
+            if any(width <= 0 for width in widths):
+                raise CommandError("Ширины должны быть положительными")
+        try:
+            stats = build_images(widths=widths)
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Собрано изображений: {stats['built']}, без изменений: {stats['skipped']}, "
+            f"удалено устаревших файлов: {stats['removed']} (каталог {get_output_dir()})"
+        ))
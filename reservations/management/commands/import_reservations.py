@@ -0,0 +1,40 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from reservations.importing import import_reservations, iter_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Потоково импортирует бронирования из CSV или JSONL: строки проверяются по правилам "
+        "формы бронирования и вставляются пачками, отклонённые строки пишутся в отдельный файл"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к файлу CSV (с заголовком) или JSONL")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Формат файла (по умолчанию по расширению)")
+        parser.add_argument("--rejects", help="Файл для отклонённых строк (по умолчанию <path>.rejects.jsonl)")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Количество строк в одной пачке")
+        parser.add_argument("--dry-run", action="store_true", help="Только проверить файл, ничего не сохраняя")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+        rejects_path = options["rejects"] or f"{path}.rejects.jsonl"
+        if not os.path.exists(path):
+            raise CommandError(f"Файл {path} не найден")
+
+        with open(path, encoding="utf-8-sig", newline="") as stream, \
+                open(rejects_path, "w", encoding="utf-8") as rejects:
+            imported, rejected = import_reservations(
+                iter_rows(stream, fmt),
+                chunk_size=options["chunk_size"],
+                rejects=rejects,
+                dry_run=options["dry_run"],
+            )
+
+        if not rejected:
+            os.remove(rejects_path)
+        verb = "Проверено" if options["dry_run"] else "Импортировано"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {imported} бронирований"))
+        if rejected:
+            self.stdout.write(self.style.WARNING(f"Отклонено {rejected} строк, подробности в {rejects_path}"))
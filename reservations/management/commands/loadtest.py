@@ -0,0 +1,86 @@
+import json
+import math
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from reservations.loadtest import (
+    DEFAULT_MIX, build_report, cleanup_loadtest, compare_reports, is_test_database, parse_mix,
+    render_html_report, run_loadtest, seed_loadtest,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест сценария бронирования: параллельные потоки выполняют смесь запросов "
+        "к приложению, отчёт содержит p50/p95/p99 и запросы в секунду по каждому сценарию"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mix", default=DEFAULT_MIX, help="Веса сценариев: имя=вес через запятую")
+        parser.add_argument("--workers", type=int, default=8, help="Количество параллельных потоков")
+        parser.add_argument("--requests", type=int, default=2000, help="Общее количество запросов")
+        parser.add_argument("--duration", type=float, default=None, help="Ограничение по времени в секундах")
+        parser.add_argument("--seed", type=int, default=0, help="Начальное значение генератора случайных чисел")
+        parser.add_argument("--host", default=None, help="Значение заголовка Host (по умолчанию из ALLOWED_HOSTS)")
+        parser.add_argument("--json", dest="json_path", help="Файл для отчёта в формате JSON")
+        parser.add_argument("--html", dest="html_path", help="Файл для отчёта в формате HTML")
+        parser.add_argument("--baseline", help="JSON-отчёт предыдущего прогона для сравнения")
+        parser.add_argument("--keep-data", action="store_true", help="Не удалять созданные данные")
+        parser.add_argument(
+            "--allow-database", metavar="NAME",
+            help="Разрешить прогон в нетестовой базе; значение должно совпадать с именем базы из настроек",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options["mix"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options["workers"] < 1:
+            raise CommandError("Нужен хотя бы один поток")
+        # Прогон пишет в базу тысячи бронирований и столики: рабочую базу нужно назвать явно
+        database = connection.settings_dict["NAME"]
+        if not is_test_database() and options["allow_database"] != str(database):
+            raise CommandError(
+                f"База {database} не похожа на тестовую; для прогона в ней укажите --allow-database {database}"
+            )
+
+        # Пул ожидающих бронирований с запасом покрывает подтверждения и отмены прогона
+        share = (mix.get("confirm_reservation", 0) + mix.get("cancel_reservation", 0)) / sum(mix.values())
+        pending_count = math.ceil(options["requests"] * share * 1.2) + options["workers"]
+        state = seed_loadtest(options["workers"], pending_count, seed=options["seed"])
+        try:
+            samples, elapsed = run_loadtest(
+                state, mix, options["workers"],
+                requests=options["requests"], duration=options["duration"],
+                seed=options["seed"], host=options["host"] or self._default_host(),
+            )
+        finally:
+            if not options["keep_data"]:
+                cleanup_loadtest(state)
+
+        report = build_report(samples, elapsed, mix, options["workers"], options["seed"])
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as baseline:
+                report["baseline_change_pct"] = compare_reports(report, json.load(baseline))
+
+        for name, stats in [("всего", report["total"])] + list(report["scenarios"].items()):
+            self.stdout.write(
+                f"{name}: {stats['requests']} запросов, ошибок {stats['errors']}, {stats['rps']} запр/с, "
+                f"p50 {stats['p50_ms']} мс, p95 {stats['p95_ms']} мс, p99 {stats['p99_ms']} мс"
+            )
+        for name, change in report.get("baseline_change_pct", {}).items():
+            self.stdout.write(f"{name} относительно базового прогона: {change}")
+
+        if options["json_path"]:
+            with open(options["json_path"], "w", encoding="utf-8") as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+        if options["html_path"]:
+            with open(options["html_path"], "w", encoding="utf-8") as output:
+                output.write(render_html_report(report))
+
+    def _default_host(self):
+        for host in settings.ALLOWED_HOSTS:
+            if host and host != "*":
+                return host.lstrip(".")
+        return "localhost"
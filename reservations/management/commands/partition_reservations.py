@@ -0,0 +1,57 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, NotSupportedError
+from reservations.partitioning import (
+    convert_to_partitioned, create_future_partitions, detach_partitions, list_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Секционирование таблицы бронирований по месяцам в PostgreSQL: convert — перевести таблицу, "
+        "create — создать разделы наперёд, detach — отсоединить старые разделы, status — показать разделы"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["convert", "create", "detach", "status"])
+        parser.add_argument("--months-ahead", type=int, default=12, help="На сколько месяцев вперёд создавать разделы")
+        parser.add_argument("--before", help="Для detach: отсоединить разделы целиком раньше ГГГГ-ММ-ДД")
+        parser.add_argument("--drop", action="store_true", help="Для detach: удалить отсоединённые разделы")
+
+    def handle(self, *args, **options):
+        try:
+            getattr(self, f"handle_{options['action']}")(options)
+        except NotSupportedError as e:
+            raise CommandError(str(e))
+        except DatabaseError as e:
+            raise CommandError(f"Ошибка базы данных: {e}")
+
+    def handle_convert(self, options):
+        created = convert_to_partitioned(months_ahead=options["months_ahead"])
+        self.stdout.write(self.style.SUCCESS(f"Таблица секционирована, создано месячных разделов: {created}"))
+
+    def handle_create(self, options):
+        created = create_future_partitions(months_ahead=options["months_ahead"])
+        for name in created:
+            self.stdout.write(name)
+        self.stdout.write(self.style.SUCCESS(f"Создано разделов: {len(created)}"))
+
+    def handle_detach(self, options):
+        if not options["before"]:
+            raise CommandError("Для detach укажите --before")
+        try:
+            before = datetime.strptime(options["before"], "%Y-%m-%d").date()
+        except ValueError:
+            raise CommandError("Дата должна быть в формате ГГГГ-ММ-ДД")
+        detached = detach_partitions(before, drop=options["drop"])
+        for name in detached:
+            self.stdout.write(name)
+        verb = "Удалено" if options["drop"] else "Отсоединено"
+        self.stdout.write(self.style.SUCCESS(f"{verb} разделов: {len(detached)}"))
+
+    def handle_status(self, options):
+        partitions = list_partitions()
+        if not partitions:
+            self.stdout.write("Таблица бронирований не секционирована")
+        for name, rows in partitions:
+            self.stdout.write(f"{name}\t~{rows} строк")
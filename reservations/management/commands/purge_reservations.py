@@ -0,0 +1,34 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from reservations.models import Reservation
+from reservations.services import bulk_delete_reservations
+
+
+class Command(BaseCommand):
+    help = "Удаляет бронирования до указанной даты пачками, освобождая столики одним запросом на пачку"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--before", required=True, help="Удалить бронирования с датой раньше ГГГГ-ММ-ДД")
+        parser.add_argument(
+            "--status", action="append", choices=[choice for choice, _ in Reservation.STATUS_CHOICES],
+            help="Удалять только бронирования с этим статусом (можно указать несколько раз)",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="Количество строк в одной пачке")
+        parser.add_argument("--dry-run", action="store_true", help="Только посчитать, ничего не удаляя")
+
+    def handle(self, *args, **options):
+        try:
+            before = datetime.strptime(options["before"], "%Y-%m-%d").date()
+        except ValueError:
+            raise CommandError("Дата должна быть в формате ГГГГ-ММ-ДД")
+
+        queryset = Reservation.objects.filter(date__lt=before)
+        if options["status"]:
+            queryset = queryset.filter(status__in=options["status"])
+
+        if options["dry_run"]:
+            self.stdout.write(f"Будет удалено {queryset.count()} бронирований")
+            return
+
+        deleted = bulk_delete_reservations(queryset, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Удалено {deleted} бронирований"))
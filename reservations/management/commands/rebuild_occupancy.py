@@ -0,0 +1,22 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from reservations.summary import rebuild_summary
+
+
+class Command(BaseCommand):
+    help = "Пересобирает почасовую сводку загрузки зала по бронированиям"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", help="Начальная дата ГГГГ-ММ-ДД (включительно)")
+        parser.add_argument("--to", dest="date_to", help="Конечная дата ГГГГ-ММ-ДД (включительно)")
+
+    def handle(self, *args, **options):
+        dates = {}
+        for name in ("date_from", "date_to"):
+            if options[name]:
+                try:
+                    dates[name] = datetime.strptime(options[name], "%Y-%m-%d").date()
+                except ValueError:
+                    raise CommandError("Дата должна быть в формате ГГГГ-ММ-ДД")
+        written = rebuild_summary(**dates)
+        self.stdout.write(self.style.SUCCESS(f"Записано {written} строк сводки"))
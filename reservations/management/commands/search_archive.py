@@ -0,0 +1,40 @@
+import json
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from reservations.archiving import search_archive
+
+
+class Command(BaseCommand):
+    help = "Ищет бронирования в архиве, созданном archive_reservations (только чтение)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", help="Каталог архива вместо RESERVATIONS_ARCHIVE_DIR")
+        parser.add_argument("--from", dest="date_from", help="Начальная дата ГГГГ-ММ-ДД (включительно)")
+        parser.add_argument("--to", dest="date_to", help="Конечная дата ГГГГ-ММ-ДД (включительно)")
+        parser.add_argument("--id", type=int, help="Номер бронирования")
+        parser.add_argument("--email", help="Email гостя")
+        parser.add_argument("--phone", help="Телефон гостя")
+        parser.add_argument("--status", help="Статус бронирования")
+        parser.add_argument("--limit", type=int, default=100, help="Максимальное количество результатов")
+
+    def handle(self, *args, **options):
+        dates = {}
+        for name in ("date_from", "date_to"):
+            if options[name]:
+                try:
+                    dates[name] = datetime.strptime(options[name], "%Y-%m-%d").date()
+                except ValueError:
+                    raise CommandError("Дата должна быть в формате ГГГГ-ММ-ДД")
+        filters = {name: options[name] for name in ("id", "email", "phone", "status") if options[name] is not None}
+        if not filters and not dates:
+            raise CommandError("Укажите хотя бы одно условие поиска")
+
+        found = 0
+        for row in search_archive(options["dir"], **dates, **filters):
+            if found >= options["limit"]:
+                self.stderr.write(f"Показаны первые {options['limit']} результатов")
+                break
+            self.stdout.write(json.dumps(row, ensure_ascii=False))
+            found += 1
+        if not found:
+            self.stderr.write("Ничего не найдено")
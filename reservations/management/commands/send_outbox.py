@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand
+from reservations.outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    help = "Отправляет письма из очереди исходящих писем (outbox)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Количество писем в одной пачке")
+        parser.add_argument("--loop", action="store_true", help="Работать непрерывно, опрашивая очередь")
+        parser.add_argument("--interval", type=float, default=5.0, help="Пауза между опросами пустой очереди, с")
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = drain_outbox(batch_size=options["batch_size"])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f"Отправлено: {sent}, отложено: {failed}")
+            # Полная пачка означает, что в очереди, скорее всего, есть ещё письма
+            if sent + failed >= options["batch_size"]:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS(f"Всего отправлено {total_sent} писем, отложено {total_failed}"))
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reservations", "0005_outboxemail"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OccupancySummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Дата")),
+                ("hour", models.PositiveSmallIntegerField(verbose_name="Час")),
+                (
+                    "covers",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Гостей (подтверждено)"
+                    ),
+                ),
+                (
+                    "reservations",
+                    models.PositiveIntegerField(default=0, verbose_name="Бронирований"),
+                ),
+                (
+                    "tables_used",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Занято столов"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Загрузка за час",
+                "verbose_name_plural": "Загрузка по часам",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("date", "hour"), name="unique_occupancy_date_hour"
+                    )
+                ],
+            },
+        ),
+    ]
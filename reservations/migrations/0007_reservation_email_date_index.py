@@ -0,0 +1,20 @@
+# Generated by Django 5.1.4 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reservations", "0006_occupancysummary"),
+        ("tables", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(
+                fields=["email", "date", "time"], name="reservation_email_463fde_idx"
+            ),
+        ),
+    ]
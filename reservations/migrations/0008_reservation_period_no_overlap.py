@@ -0,0 +1,139 @@
+import sys
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+TABLE = "reservations_reservation"
+CONSTRAINT_NAME = "reservation_table_no_overlap"
+# Копия на разделе секционированной таблицы называется "<раздел>_no_overlap"
+CONSTRAINT_SUFFIX = "_no_overlap"
+EXCLUSION = (
+    "EXCLUDE USING gist (table_id WITH =, \"date\" WITH =, tstzrange(starts_at, ends_at, '[)') WITH &&) "
+    "WHERE (status = 'confirmed')"
+)
+
+
+def fill_period(apps, schema_editor):
+    Reservation = apps.get_model("reservations", "Reservation")
+    duration = timedelta(minutes=getattr(settings, "RESERVATION_DURATION_MINUTES", 120))
+    batch = []
+    for reservation in Reservation.objects.only("pk", "date", "time").order_by("pk").iterator(chunk_size=1000):
+        reservation.starts_at = timezone.make_aware(datetime.combine(reservation.date, reservation.time))
+        reservation.ends_at = reservation.starts_at + duration
+        batch.append(reservation)
+        if len(batch) == 1000:
+            Reservation.objects.bulk_update(batch, ["starts_at", "ends_at"])
+            batch = []
+    if batch:
+        Reservation.objects.bulk_update(batch, ["starts_at", "ends_at"])
+
+
+def resolve_overlaps(apps, schema_editor):
+    """
+    Возвращает в ожидание подтверждённые брони, пересекающиеся с более ранними бронями того же столика.
+
+    Без этого ограничение исключения не создастся на базе, где уже есть
+    двойные бронирования. Из пересекающихся броней столика остаётся
+    подтверждённой начавшаяся раньше (при равенстве — созданная раньше),
+    остальные получают статус pending без столика, чтобы администратор
+    назначил им другой столик. Номера изменённых броней выводятся в отчёт.
+
+    Returns:
+        list: Первичные ключи бронирований, возвращённых в ожидание
+    """
+    Reservation = apps.get_model("reservations", "Reservation")
+    confirmed = (
+        Reservation.objects.filter(status="confirmed", table__isnull=False)
+        .order_by("table_id", "date", "starts_at", "pk")
+        .values_list("pk", "table_id", "date", "starts_at", "ends_at")
+    )
+    demoted = []
+    current, busy_until = None, None
+    for pk, table_id, date, starts_at, ends_at in confirmed.iterator(chunk_size=2000):
+        if (table_id, date) != current:
+            current, busy_until = (table_id, date), ends_at
+        elif starts_at < busy_until:
+            demoted.append(pk)
+        else:
+            busy_until = ends_at
+    for start in range(0, len(demoted), 1000):
+        Reservation.objects.filter(pk__in=demoted[start:start + 1000]).update(status="pending", table=None)
+    if demoted:
+        sys.stdout.write(
+            f"\n  Пересекающиеся подтверждённые брони возвращены в ожидание ({len(demoted)}): "
+            f"{', '.join(map(str, demoted))}\n"
+        )
+    return demoted
+
+
+def constrained_tables(schema_editor):
+    """
+    Пары (таблица, имя ограничения): сама таблица или, если она секционирована, каждый её раздел.
+
+    PostgreSQL до 17 не допускает ограничений исключения на секционированной
+    таблице; условие "date" WITH = гарантирует, что пересекающиеся брони
+    всегда лежат в одном разделе, так что ограничения на разделах достаточно.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE])
+        if cursor.fetchone()[0] != "p":
+            return [(TABLE, CONSTRAINT_NAME)]
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass ORDER BY child.relname",
+            [TABLE],
+        )
+        return [(name, name + CONSTRAINT_SUFFIX) for name, in cursor.fetchall()]
+
+
+def add_exclusion_constraint(apps, schema_editor):
+    # Ограничения исключения и btree_gist есть только в PostgreSQL; на других СУБД остаётся проверка в services
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    quote = schema_editor.quote_name
+    for table, name in constrained_tables(schema_editor):
+        schema_editor.execute(f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(name)} {EXCLUSION}")
+
+
+def drop_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    quote = schema_editor.quote_name
+    for table, name in constrained_tables(schema_editor):
+        schema_editor.execute(f"ALTER TABLE {quote(table)} DROP CONSTRAINT IF EXISTS {quote(name)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reservations", "0007_reservation_email_date_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reservation",
+            name="starts_at",
+            field=models.DateTimeField(editable=False, null=True, verbose_name="Начало посадки"),
+        ),
+        migrations.AddField(
+            model_name="reservation",
+            name="ends_at",
+            field=models.DateTimeField(editable=False, null=True, verbose_name="Конец посадки"),
+        ),
+        migrations.RunPython(fill_period, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="reservation",
+            name="starts_at",
+            field=models.DateTimeField(editable=False, verbose_name="Начало посадки"),
+        ),
+        migrations.AlterField(
+            model_name="reservation",
+            name="ends_at",
+            field=models.DateTimeField(editable=False, verbose_name="Конец посадки"),
+        ),
+        migrations.RunPython(resolve_overlaps, migrations.RunPython.noop),
+        migrations.RunPython(add_exclusion_constraint, drop_exclusion_constraint),
+    ]
@@ -1,10 +1,13 @@
+from datetime import datetime, timedelta
+from functools import partial
 from django.db import models
 from django.utils import timezone
-from django.db.models.signals import pre_delete
+from django.db.models.signals import pre_delete, post_init, post_save, post_delete
 from django.dispatch import receiver
 from django.core.exceptions import ValidationError
-from django.db import connection
+from django.db import connection, transaction
 from tables.models import Table
+from .cache import invalidate_day, invalidate_table_catalog, invalidate_tables
 
 
 def validate_positive_guests(value):
@@ -15,6 +18,23 @@ def validate_positive_guests(value):
         raise ValidationError("Количество гостей должно быть положительным числом.")
 
 
+# Ограничение PostgreSQL, запрещающее пересекающиеся подтверждённые брони одного столика (миграция 0008).
+# В секционированной таблице оно стоит на каждом разделе под именем "<раздел>_no_overlap"
+OVERLAP_CONSTRAINT = "reservation_table_no_overlap"
+OVERLAP_CONSTRAINT_SUFFIX = "_no_overlap"
+
+
+class ReservationQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Заполняет начало и конец посадки, которые при массовой вставке не вычисляет save().
+        """
+        objs = list(objs)
+        for obj in objs:
+            obj.set_period()
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class Reservation(models.Model):
     """
     Модель для представления бронирования столика в ресторане.
@@ -34,11 +54,18 @@ class Reservation(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending", verbose_name="Статус")
     table = models.ForeignKey(Table, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Столик")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    # Период, на который гости занимают столик: вычисляется в save() по дате, времени и длительности посадки
+    starts_at = models.DateTimeField(editable=False, verbose_name="Начало посадки")
+    ends_at = models.DateTimeField(editable=False, verbose_name="Конец посадки")
+
+    objects = ReservationQuerySet.as_manager()
 
     class Meta:
         indexes = [
             models.Index(fields=["date", "time"]),
             models.Index(fields=["status"]),
+            # «Мои бронирования»: фильтр по почте с сортировкой от новых к старым
+            models.Index(fields=["email", "date", "time"]),
         ]
         verbose_name = "Бронирование"
         verbose_name_plural = "Бронирования"
@@ -46,20 +73,70 @@ class Reservation(models.Model):
     def __str__(self):
         return f"Бронь на {self.date} в {self.time} для {self.guests} гостей"
 
+    def check_lead_time(self):
+        """
+        Проверяет, что бронирование создается не менее чем за 3 часа до желаемого времени.
+        """
+        current_time = timezone.now()
+        if (
+            self.date == current_time.date() and
+            (current_time + timezone.timedelta(hours=3)).time() > self.time
+        ):
+            raise ValueError(
+                "Бронирование должно быть сделано не менее чем за 3 часа"
+            )
+
+    def set_period(self):
+        """
+        Вычисляет начало и конец посадки по дате, времени и RESERVATION_DURATION_MINUTES.
+        """
+        from .availability import get_duration_minutes
+
+        date = self._meta.get_field("date").to_python(self.date)
+        start_time = self._meta.get_field("time").to_python(self.time)
+        self.starts_at = timezone.make_aware(datetime.combine(date, start_time))
+        self.ends_at = self.starts_at + timedelta(minutes=get_duration_minutes())
+
+    def overlapping(self):
+        """
+        Возвращает подтверждённые бронирования того же столика, пересекающиеся по времени посадки.
+        """
+        return (
+            Reservation.objects.filter(
+                table_id=self.table_id, status="confirmed", date=self.date,
+                starts_at__lt=self.ends_at, ends_at__gt=self.starts_at,
+            )
+            .exclude(pk=self.pk)
+        )
+
+    def validate_constraints(self, exclude=None):
+        """
+        Дополнительно проверяет пересечение с другими бронями столика, чтобы форма показала ошибку.
+
+        Окончательно пересечения запрещает ограничение OVERLAP_CONSTRAINT в
+        PostgreSQL; эта проверка нужна только для понятного сообщения в формах.
+        """
+        super().validate_constraints(exclude=exclude)
+        if exclude and {"date", "time", "status", "table"} & set(exclude):
+            return
+        if self.status != "confirmed" or self.table_id is None:
+            return
+        self.set_period()
+        if self.overlapping().exists():
+            raise ValidationError({"table": f"Стол уже занят на {self.date} в {self.time}"})
+
     def save(self, *args, **kwargs):
         """
         Переопределенный метод сохранения.
-        Проверяет, что бронирование создается не менее чем за 3 часа до желаемого времени.
+        Проверяет, что бронирование создается не менее чем за 3 часа до желаемого времени,
+        и пересчитывает период посадки.
         """
         if not self.pk:  # Только для новых объектов
-            current_time = timezone.now()
-            if (
-                self.date == current_time.date() and
-                (current_time + timezone.timedelta(hours=3)).time() > self.time
-            ):
-                raise ValueError(
-                    "Бронирование должно быть сделано не менее чем за 3 часа"
-                )
+            self.check_lead_time()
+        self.set_period()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"date", "time"} & set(update_fields):
+            kwargs["update_fields"] = set(update_fields) | {"starts_at", "ends_at"}
         super().save(*args, **kwargs)
 
     def cancel(self):
@@ -73,6 +150,93 @@ class Reservation(models.Model):
             self.table.save()
 
 
+class OutboxEmail(models.Model):
+    """
+    Письмо, ожидающее отправки фоновым обработчиком (команда send_outbox).
+
+    Записывается в той же транзакции, что и изменение статуса бронирования,
+    поэтому письмо не теряется и не отправляется по откаченным изменениям.
+    """
+    STATUS_CHOICES = [
+        ("pending", "Ожидает отправки"),
+        ("sent", "Отправлено"),
+        ("failed", "Ошибка"),
+    ]
+
+    subject = models.CharField(max_length=255, verbose_name="Тема")
+    body = models.TextField(verbose_name="Текст")
+    from_email = models.CharField(max_length=254, blank=True, verbose_name="Отправитель")
+    recipient = models.EmailField(verbose_name="Получатель")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending", verbose_name="Статус")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Попыток отправки")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Следующая попытка")
+    last_error = models.TextField(blank=True, verbose_name="Последняя ошибка")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Дата отправки")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+        verbose_name = "Исходящее письмо"
+        verbose_name_plural = "Исходящие письма"
+
+    def __str__(self):
+        return f"{self.subject} для {self.recipient}"
+
+
+class OccupancySummary(models.Model):
+    """
+    Почасовая сводка загрузки зала, обновляемая при каждом изменении бронирований.
+
+    Бронирование относится к часу, в который начинается посадка.
+    """
+    date = models.DateField(verbose_name="Дата")
+    hour = models.PositiveSmallIntegerField(verbose_name="Час")
+    covers = models.PositiveIntegerField(default=0, verbose_name="Гостей (подтверждено)")
+    reservations = models.PositiveIntegerField(default=0, verbose_name="Бронирований")
+    tables_used = models.PositiveIntegerField(default=0, verbose_name="Занято столов")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "hour"], name="unique_occupancy_date_hour"),
+        ]
+        verbose_name = "Загрузка за час"
+        verbose_name_plural = "Загрузка по часам"
+
+    def __str__(self):
+        return f"{self.date} {self.hour:02d}:00 — {self.covers} гостей"
+
+
+@receiver(post_init, sender=Reservation)
+def remember_reservation_date(sender, instance, **kwargs):
+    """
+    Запоминает исходную дату бронирования, чтобы при переносе сбросить кэш обеих дат.
+    """
+    instance._original_date = instance.__dict__.get("date")
+
+
+def _reservation_date(value):
+    # Дату могли присвоить строкой ("2030-01-01"): ключи кэша строятся по объекту date
+    return Reservation._meta.get_field("date").to_python(value)
+
+
+@receiver(post_save, sender=Reservation)
+def invalidate_reservation_availability(sender, instance, **kwargs):
+    """
+    Сбрасывает закэшированную доступность после фиксации транзакции, сохранившей бронирование.
+
+    Если сменить версию раньше, параллельный запрос успеет прочитать ещё старые
+    строки и закэширует устаревший ответ уже под новой версией.
+    """
+    date = _reservation_date(instance.date)
+    original_date = _reservation_date(instance._original_date)
+    transaction.on_commit(partial(invalidate_day, date))
+    if original_date != date:
+        transaction.on_commit(partial(invalidate_day, original_date))
+    instance._original_date = date
+
+
 @receiver(pre_delete, sender=Reservation)
 def release_table(sender, instance, **kwargs):
     """
@@ -81,6 +245,40 @@ def release_table(sender, instance, **kwargs):
     if instance.table:
         instance.table.is_available = True
         instance.table.save()
+    transaction.on_commit(partial(invalidate_day, _reservation_date(instance.date)))
+
+
+@receiver(post_init, sender=Table)
+def remember_table_capacity(sender, instance, **kwargs):
+    """
+    Запоминает исходные вместимость и номер столика.
+    """
+    instance._original_capacity = instance.__dict__.get("capacity")
+    instance._original_number = instance.__dict__.get("number")
+
+
+@receiver(post_save, sender=Table)
+def invalidate_table_availability(sender, instance, created, **kwargs):
+    """
+    Сбрасывает закэшированную доступность при добавлении столика или изменении его вместимости.
+
+    Переключение флага is_available на расчёт доступности не влияет и кэш не сбрасывает;
+    смена номера сбрасывает только страницы со списком столиков.
+    """
+    if created or instance._original_capacity != instance.capacity:
+        invalidate_tables()
+    elif instance._original_number != instance.number:
+        invalidate_table_catalog()
+    instance._original_capacity = instance.capacity
+    instance._original_number = instance.number
+
+
+@receiver(post_delete, sender=Table)
+def invalidate_deleted_table_availability(sender, instance, **kwargs):
+    """
+    Сбрасывает закэшированную доступность при удалении столика.
+    """
+    invalidate_tables()
 
 
 def reset_tables_availability():
@@ -0,0 +1,121 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+def build_reservation_email(reservation, status):
+    """
+    Формирует (но не сохраняет) письмо об изменении статуса бронирования.
+
+    Args:
+        reservation: Бронирование
+        status: Новый статус в читаемом виде, например "подтверждено"
+
+    Returns:
+        OutboxEmail: Несохранённое письмо
+    """
+    return OutboxEmail(
+        subject=f"Статус вашего бронирования: {status}",
+        body=f"Ваше бронирование на {reservation.date} в {reservation.time} было {status}.",
+        from_email=settings.DEFAULT_FROM_EMAIL or "",
+        recipient=reservation.email,
+    )
+
+
+def enqueue_reservation_email(reservation, status):
+    """
+    Ставит письмо об изменении статуса бронирования в очередь на отправку.
+
+    Вызывается внутри транзакции, меняющей статус, чтобы письмо и изменение
+    сохранялись (или откатывались) вместе.
+    """
+    email = build_reservation_email(reservation, status)
+    email.save()
+    return email
+
+
+def get_retry_delay(attempts):
+    """
+    Возвращает задержку перед следующей попыткой: экспоненциально растущую, но не больше часа.
+    """
+    base = getattr(settings, "OUTBOX_RETRY_BASE_SECONDS", 30)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 3600))
+
+
+def drain_outbox(batch_size=100, connection=None):
+    """
+    Отправляет пачку готовых к отправке писем через одно SMTP-соединение.
+
+    Строки пачки блокируются с SKIP LOCKED, поэтому несколько обработчиков
+    могут работать параллельно, не отправляя одно письмо дважды. Неудачные
+    письма откладываются с экспоненциальной задержкой, а после
+    OUTBOX_MAX_ATTEMPTS попыток помечаются как ошибочные.
+
+    Args:
+        batch_size: Максимальное количество писем в пачке
+        connection: Соединение почтового бэкенда (по умолчанию из настроек)
+
+    Returns:
+        tuple: Количество отправленных и неотправленных писем
+    """
+    max_attempts = getattr(settings, "OUTBOX_MAX_ATTEMPTS", 5)
+    sent = failed = 0
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=timezone.now())
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        if not emails:
+            return sent, failed
+
+        connection = connection or get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            logger.error(f"Не удалось подключиться к почтовому серверу: {e}")
+            open_error = e
+        else:
+            open_error = None
+
+        now = timezone.now()
+        try:
+            for email in emails:
+                email.attempts += 1
+                error = open_error
+                if error is None:
+                    message = EmailMessage(
+                        email.subject, email.body, email.from_email or None, [email.recipient],
+                        connection=connection,
+                    )
+                    try:
+                        connection.send_messages([message])
+                    except Exception as e:
+                        error = e
+                if error is None:
+                    email.status = "sent"
+                    email.sent_at = now
+                    email.last_error = ""
+                    sent += 1
+                else:
+                    email.last_error = str(error)
+                    if email.attempts >= max_attempts:
+                        email.status = "failed"
+                        logger.error(f"Письмо {email.pk} не отправлено после {email.attempts} попыток: {error}")
+                    else:
+                        email.next_attempt_at = now + get_retry_delay(email.attempts)
+                    failed += 1
+        finally:
+            if open_error is None:
+                connection.close()
+
+        OutboxEmail.objects.bulk_update(
+            emails, ["status", "attempts", "next_attempt_at", "last_error", "sent_at"]
+        )
+    return sent, failed
@@ -0,0 +1,105 @@
+import hashlib
+from functools import wraps
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_vary_headers
+from django.utils.translation import get_language
+from .cache import _get_or_init_versions
+
+# Подставляется вместо токена CSRF в сохраняемую страницу и заменяется свежим токеном при каждой выдаче
+CSRF_PLACEHOLDER = "__page_cache_csrf_token__"
+
+# Параметры рекламных ссылок не влияют на содержимое страницы и не должны дробить кэш
+IGNORED_QUERY_PARAMS = {"gclid", "fbclid", "yclid", "_openstat"}
+IGNORED_QUERY_PREFIXES = ("utm_",)
+
+
+def get_timeout():
+    """
+    Возвращает время жизни закэшированных страниц в секундах.
+    """
+    return getattr(settings, "PAGE_CACHE_TIMEOUT", 600)
+
+
+def csrf_placeholder(request):
+    """
+    Контекстный процессор: пока страница отрисовывается для кэша, {% csrf_token %} выводит заглушку.
+
+    Должен идти в списке context_processors после процессоров, задающих csrf_token.
+    """
+    if getattr(request, "_page_cache_rendering", False):
+        return {"csrf_token": CSRF_PLACEHOLDER}
+    return {}
+
+
+def _is_cacheable_request(request):
+    if request.method not in ("GET", "HEAD"):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # len() загружает сообщения, но не помечает их прочитанными: их покажет обычная отрисовка
+    return not len(get_messages(request))
+
+
+def _page_key(request, versions):
+    params = sorted(
+        (name, value)
+        for name, values in request.GET.lists()
+        if name not in IGNORED_QUERY_PARAMS and not name.startswith(IGNORED_QUERY_PREFIXES)
+        for value in values
+    )
+    digest = hashlib.md5(repr((request.path, params)).encode(), usedforsecurity=False).hexdigest()
+    return ":".join(["page", get_language() or "", digest] + [str(version) for version in versions])
+
+
+def _with_csrf_token(request, content):
+    if CSRF_PLACEHOLDER.encode() in content:
+        content = content.replace(CSRF_PLACEHOLDER.encode(), get_token(request).encode())
+    return content
+
+
+def cache_anonymous_page(versions=()):
+    """
+    Кэширует страницу целиком для анонимных посетителей.
+
+    Ключ зависит от пути, значимых GET-параметров, языка и текущих версий
+    счётчиков versions (например, TABLE_CATALOG_VERSION_KEY): после их увеличения
+    старые страницы больше не читаются. Авторизованным пользователям и
+    посетителям с непоказанными сообщениями страница отрисовывается заново,
+    поскольку её шапка и блок сообщений зависят от них. Токен CSRF хранится
+    в кэше как заглушка и заменяется токеном текущего посетителя.
+
+    Args:
+        versions: Ключи счётчиков версий, от которых зависит содержимое страницы
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _is_cacheable_request(request):
+                return view(request, *args, **kwargs)
+
+            key = _page_key(request, _get_or_init_versions(list(versions)))
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(_with_csrf_token(request, content), content_type=content_type)
+            else:
+                request._page_cache_rendering = True
+                try:
+                    response = view(request, *args, **kwargs)
+                finally:
+                    request._page_cache_rendering = False
+                if not response.streaming:
+                    if response.status_code == 200 and not response.cookies:
+                        cache.set(key, (response.content, response["Content-Type"]), get_timeout())
+                    response.content = _with_csrf_token(request, response.content)
+            # Содержимое зависит от того, вошёл ли посетитель, то есть от cookie сессии
+            patch_vary_headers(response, ("Cookie",))
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,163 @@
+import base64
+from datetime import date as date_type, datetime, time as time_type
+from django.conf import settings
+from django.db.models import Q
+
+
+def get_page_size():
+    """
+    Возвращает количество бронирований на одной странице списка.
+    """
+    return getattr(settings, "RESERVATIONS_PAGE_SIZE", 50)
+
+
+def encode_cursor(reservation):
+    """
+    Кодирует позицию бронирования (date, time, id) в строку для параметра cursor.
+    """
+    raw = f"{reservation.date.isoformat()}|{reservation.time.isoformat()}|{reservation.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(value):
+    """
+    Декодирует параметр cursor в кортеж (date, time, id).
+
+    Returns:
+        tuple: Позиция или None, если курсор отсутствует или повреждён
+    """
+    if not value:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode()
+        date, time, pk = raw.split("|")
+        return date_type.fromisoformat(date), time_type.fromisoformat(time), int(pk)
+    except ValueError:
+        return None
+
+
+def filter_date_range(queryset, params):
+    """
+    Применяет необязательные фильтры date_from и date_to (формат ГГГГ-ММ-ДД).
+
+    Некорректные значения игнорируются.
+
+    Returns:
+        tuple: Отфильтрованный queryset и словарь применённых фильтров
+    """
+    filters = {}
+    for name, lookup in (("date_from", "date__gte"), ("date_to", "date__lte")):
+        value = params.get(name)
+        if not value:
+            continue
+        try:
+            filters[name] = datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            continue
+        queryset = queryset.filter(**{lookup: filters[name]})
+    return queryset, filters
+
+
+class KeysetPage:
+    """
+    Страница результатов keyset-пагинации.
+    """
+
+    def __init__(self, items, next_cursor, is_first):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.is_first = is_first
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def _keyset_queryset(queryset, position, page_size, descending):
+    if descending:
+        queryset = queryset.order_by("-date", "-time", "-id")
+        op = "lt"
+    else:
+        queryset = queryset.order_by("date", "time", "id")
+        op = "gt"
+
+    if position:
+        date, time, pk = position
+        # Условие date >= (<=) отдельно от OR задаёт границу, с которой начинается просмотр индекса
+        # (date, time); без неё PostgreSQL читает индекс с начала и отбрасывает все прошлые страницы
+        queryset = queryset.filter(**{f"date__{op}e": date}).filter(
+            Q(**{f"date__{op}": date})
+            | Q(date=date, **{f"time__{op}": time})
+            | Q(date=date, time=time, **{f"id__{op}": pk})
+        )
+    return queryset[:page_size + 1]
+
+
+def _build_page(items, page_size, position):
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        next_cursor = encode_cursor(items[-1])
+    return KeysetPage(items, next_cursor, position is None)
+
+
+def keyset_paginate(queryset, cursor, page_size=None, descending=False):
+    """
+    Возвращает страницу бронирований, следующую за позицией cursor.
+
+    Вместо OFFSET используется условие по ключу (date, time, id), поэтому
+    стоимость запроса не растёт с номером страницы, а в память загружается
+    только одна страница.
+
+    Args:
+        queryset: Queryset бронирований
+        cursor: Значение параметра cursor из запроса (или None для первой страницы)
+        page_size: Размер страницы (по умолчанию RESERVATIONS_PAGE_SIZE)
+        descending: Сортировать от новых к старым
+
+    Returns:
+        KeysetPage: Страница бронирований
+    """
+    page_size = page_size or get_page_size()
+    position = decode_cursor(cursor)
+    items = list(_keyset_queryset(queryset, position, page_size, descending))
+    return _build_page(items, page_size, position)
+
+
+async def akeyset_paginate(queryset, cursor, page_size=None, descending=False):
+    """
+    Асинхронный вариант keyset_paginate.
+    """
+    page_size = page_size or get_page_size()
+    position = decode_cursor(cursor)
+    items = [item async for item in _keyset_queryset(queryset, position, page_size, descending)]
+    return _build_page(items, page_size, position)
+
+
+def pagination_context(request, page, filters):
+    """
+    Возвращает переменные шаблона для фильтра по датам и ссылок между страницами.
+    """
+    first_query = request.GET.copy()
+    first_query.pop("cursor", None)
+    context = {
+        "page": page,
+        "date_from": filters.get("date_from"),
+        "date_to": filters.get("date_to"),
+        "first_page_query": first_query.urlencode(),
+        "next_page_query": None,
+    }
+    if page.has_next:
+        next_query = request.GET.copy()
+        next_query["cursor"] = page.next_cursor
+        context["next_page_query"] = next_query.urlencode()
+    return context
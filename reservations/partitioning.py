@@ -0,0 +1,247 @@
+import re
+from datetime import date as dt_date
+from django.db import NotSupportedError, connection, transaction
+from django.utils import timezone
+from .models import OVERLAP_CONSTRAINT_SUFFIX, Reservation
+
+PARENT_TABLE = Reservation._meta.db_table
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+SEQUENCE_NAME = f"{PARENT_TABLE}_id_partitioned_seq"
+_PARTITION_RE = re.compile(rf"^{PARENT_TABLE}_p(\d{{4}})_(\d{{2}})$")
+
+# Определение OVERLAP_CONSTRAINT (миграция 0008). PostgreSQL до 17 не допускает ограничений
+# исключения на секционированной таблице, поэтому оно создаётся на каждом разделе: условие
+# "date" WITH = гарантирует, что пересекающиеся брони всегда попадают в один раздел
+OVERLAP_EXCLUSION = (
+    "EXCLUDE USING gist (table_id WITH =, \"date\" WITH =, tstzrange(starts_at, ends_at, '[)') WITH &&) "
+    "WHERE (status = 'confirmed')"
+)
+
+
+def month_start(value):
+    return value.replace(day=1)
+
+
+def add_months(value, months):
+    """
+    Возвращает первое число месяца, отстоящего от value на months месяцев.
+    """
+    index = value.year * 12 + value.month - 1 + months
+    return dt_date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{PARENT_TABLE}_p{month.year}_{month.month:02d}"
+
+
+def partition_month(name):
+    """
+    Возвращает первое число месяца раздела по его имени или None, если это не месячный раздел.
+    """
+    match = _PARTITION_RE.match(name)
+    return dt_date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def iter_months(first, last):
+    """
+    Первые числа всех месяцев от first до last включительно.
+    """
+    month = month_start(first)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def overlap_constraint_sql(table):
+    """
+    SQL ограничения исключения пересекающихся броней для раздела table.
+    """
+    qn = connection.ops.quote_name
+    return f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(table + OVERLAP_CONSTRAINT_SUFFIX)} {OVERLAP_EXCLUSION}"
+
+
+def create_partition_sql(month):
+    """
+    Возвращает SQL создания месячного раздела вместе с его ограничением исключения.
+    """
+    qn = connection.ops.quote_name
+    name = partition_name(month)
+    return [
+        f"CREATE TABLE {qn(name)} PARTITION OF {qn(PARENT_TABLE)} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')",
+        overlap_constraint_sql(name),
+    ]
+
+
+def conversion_statements(old_table, indexes, foreign_keys, first_month, last_month):
+    """
+    Возвращает SQL перевода таблицы бронирований в секционированную по месяцам.
+
+    Старая таблица к этому моменту переименована в old_table. Новая таблица
+    получает те же столбцы и ограничения CHECK, собственную последовательность
+    для id (столбцы identity секционированные таблицы до PostgreSQL 17 не
+    поддерживают), месячные разделы и раздел по умолчанию. Первичный ключ
+    становится (id, date): уникальный индекс секционированной таблицы обязан
+    включать ключ секционирования. Ограничение исключения пересекающихся
+    броней создаётся на каждом разделе до копирования строк, а не на
+    родительской таблице. Индексы и внешние ключи создаются заново по
+    определениям старой таблицы после её удаления, чтобы имена не совпали.
+
+    Args:
+        old_table: Имя переименованной исходной таблицы
+        indexes: Определения неуникальных индексов (pg_get_indexdef) исходной таблицы
+        foreign_keys: Пары (имя, определение) внешних ключей исходной таблицы
+        first_month: Первый месяц, для которого создаётся раздел
+        last_month: Последний месяц, для которого создаётся раздел
+    """
+    qn = connection.ops.quote_name
+    parent, old, sequence = qn(PARENT_TABLE), qn(old_table), qn(SEQUENCE_NAME)
+    statements = [
+        f"CREATE TABLE {parent} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE "
+        f"INCLUDING COMMENTS) PARTITION BY RANGE (\"date\")",
+        f"CREATE SEQUENCE {sequence} OWNED BY {parent}.\"id\"",
+        f"ALTER TABLE {parent} ALTER COLUMN \"id\" SET DEFAULT nextval('{SEQUENCE_NAME}')",
+    ]
+    for month in iter_months(first_month, last_month):
+        statements += create_partition_sql(month)
+    statements += [
+        f"CREATE TABLE {qn(DEFAULT_PARTITION)} PARTITION OF {parent} DEFAULT",
+        overlap_constraint_sql(DEFAULT_PARTITION),
+        f"INSERT INTO {parent} SELECT * FROM {old}",
+        f"SELECT setval('{SEQUENCE_NAME}', COALESCE((SELECT MAX(\"id\") FROM {parent}), 0) + 1, false)",
+        f"DROP TABLE {old}",
+        f"ALTER TABLE {parent} ADD CONSTRAINT {qn(PARENT_TABLE + '_pkey')} PRIMARY KEY (\"id\", \"date\")",
+    ]
+    statements += list(indexes)
+    statements += [f"ALTER TABLE {parent} ADD CONSTRAINT {qn(name)} {definition}" for name, definition in foreign_keys]
+    return statements
+
+
+def _require_postgresql():
+    if connection.vendor != "postgresql":
+        raise NotSupportedError("Секционирование таблицы бронирований поддерживается только в PostgreSQL")
+
+
+def is_partitioned():
+    _require_postgresql()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [PARENT_TABLE])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def convert_to_partitioned(months_ahead=12):
+    """
+    Переводит таблицу бронирований в секционированную по месяцам даты.
+
+    Выполняется в одной транзакции под блокировкой ACCESS EXCLUSIVE и копирует
+    все строки, поэтому на время перевода приложение нужно остановить (или
+    сначала перенести историю в архив командой archive_reservations).
+
+    Returns:
+        int: Количество созданных месячных разделов
+    """
+    _require_postgresql()
+    if is_partitioned():
+        raise NotSupportedError("Таблица бронирований уже секционирована")
+    qn = connection.ops.quote_name
+    old_table = f"{PARENT_TABLE}_unpartitioned"
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {qn(PARENT_TABLE)} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(
+            "SELECT pg_get_indexdef(ix.indexrelid), ix.indisunique, ix.indisprimary, ix.indisexclusion "
+            "FROM pg_index ix WHERE ix.indrelid = %s::regclass",
+            [PARENT_TABLE],
+        )
+        indexes = []
+        for definition, unique, primary, exclusion in cursor.fetchall():
+            # Ограничение исключения удаляется вместе со старой таблицей и создаётся на разделах
+            if primary or exclusion:
+                continue
+            if unique:
+                raise NotSupportedError(
+                    f"Уникальный индекс без столбца date несовместим с секционированием: {definition}"
+                )
+            indexes.append(definition)
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [PARENT_TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f"SELECT MIN(\"date\"), MAX(\"date\") FROM {qn(PARENT_TABLE)}")
+        first, last = cursor.fetchone()
+        today = timezone.now().date()
+        first_month = month_start(first or today)
+        last_month = max(month_start(last or today), add_months(today, months_ahead))
+
+        cursor.execute(f"ALTER TABLE {qn(PARENT_TABLE)} RENAME TO {qn(old_table)}")
+        for statement in conversion_statements(old_table, indexes, foreign_keys, first_month, last_month):
+            cursor.execute(statement)
+    return len(list(iter_months(first_month, last_month)))
+
+
+def list_partitions():
+    """
+    Возвращает разделы таблицы бронирований: пары (имя, оценка количества строк).
+    """
+    _require_postgresql()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname, GREATEST(child.reltuples, 0)::bigint FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass ORDER BY child.relname",
+            [PARENT_TABLE],
+        )
+        return cursor.fetchall()
+
+
+def create_future_partitions(months_ahead=12):
+    """
+    Создаёт недостающие месячные разделы от текущего месяца на months_ahead месяцев вперёд.
+
+    Если в разделе по умолчанию уже есть строки за новый месяц, PostgreSQL
+    откажет в создании раздела: такие строки нужно сначала перенести.
+
+    Returns:
+        list: Имена созданных разделов
+    """
+    if not is_partitioned():
+        raise NotSupportedError("Таблица бронирований не секционирована: сначала выполните convert")
+    existing = {name for name, _ in list_partitions()}
+    today = timezone.now().date()
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for month in iter_months(today, add_months(today, months_ahead)):
+            if partition_name(month) not in existing:
+                for statement in create_partition_sql(month):
+                    cursor.execute(statement)
+                created.append(partition_name(month))
+    return created
+
+
+def detach_partitions(before, drop=False):
+    """
+    Отсоединяет месячные разделы, целиком лежащие раньше даты before.
+
+    Отсоединённый раздел остаётся отдельной таблицей (её можно выгрузить и
+    удалить вручную) или удаляется сразу при drop=True. Строки отсоединённых
+    разделов приложению больше не видны.
+
+    Returns:
+        list: Имена отсоединённых разделов
+    """
+    if not is_partitioned():
+        raise NotSupportedError("Таблица бронирований не секционирована: сначала выполните convert")
+    qn = connection.ops.quote_name
+    detached = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for name, _ in list_partitions():
+            month = partition_month(name)
+            if month is None or add_months(month, 1) > before:
+                continue
+            cursor.execute(f"ALTER TABLE {qn(PARENT_TABLE)} DETACH PARTITION {qn(name)}")
+            if drop:
+                cursor.execute(f"DROP TABLE {qn(name)}")
+            detached.append(name)
+    return detached
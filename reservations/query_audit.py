@@ -0,0 +1,366 @@
+import json
+import random
+import time
+from contextlib import contextmanager
+from datetime import time as dt_time, timedelta
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test import Client, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+from tables.models import Table
+from .availability import seating_mask
+from .models import Reservation, OutboxEmail, OccupancySummary
+from .summary import rebuild_summary
+
+# Таблицы, которые растут вместе с историей бронирований: полный просмотр с условием на них недопустим
+LARGE_TABLES = (
+    Reservation._meta.db_table,
+    OutboxEmail._meta.db_table,
+    OccupancySummary._meta.db_table,
+)
+
+AUDITED_URLCONFS = ("reservations.urls", "tables.urls", "accounts.urls")
+
+ADMIN_PASSWORD = "audit-password"
+
+# Кэш на время проверки: страницы, сетки доступности и фрагменты панели строятся по данным,
+# которые потом откатываются, и в общем кэше (Redis) их увидели бы посетители
+AUDIT_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "query-audit",
+    },
+}
+
+
+@contextmanager
+def isolated_cache():
+    """
+    Подменяет кэш по умолчанию пустым кэшем в памяти процесса и очищает его по выходе.
+    """
+    with override_settings(CACHES=AUDIT_CACHES):
+        cache.clear()
+        try:
+            yield
+        finally:
+            cache.clear()
+
+
+class Endpoint:
+    """
+    Проверяемый URL с бюджетом запросов.
+
+    Args:
+        name: Имя URL
+        budget: Максимально допустимое количество запросов к БД
+        user: Под кем выполнять запрос: None, "customer" или "admin"
+        params: GET-параметры запроса
+        reservation_arg: Подставить первичный ключ бронирования в аргумент pk
+    """
+
+    def __init__(self, name, budget, user=None, params=None, reservation_arg=False):
+        self.name = name
+        self.budget = budget
+        self.user = user
+        self.params = params or {}
+        self.reservation_arg = reservation_arg
+
+
+def _future_date(days=7):
+    return (timezone.now() + timedelta(days=days)).date().isoformat()
+
+
+# Бюджеты не включают запросы сессии и пользователя, которые выполняет любая страница с авторизацией
+ENDPOINTS = [
+    Endpoint("create_reservation", 0, user="customer"),
+    Endpoint("reservation_list", 1, user="customer"),
+    Endpoint("reservation_list", 1, user="customer", params={"date_from": _future_date(), "date_to": _future_date(14)}),
+    Endpoint("reservation_detail", 1, user="customer", reservation_arg=True),
+    Endpoint("confirm_reservation", 3, user="customer", reservation_arg=True),
+    Endpoint("cancel_reservation", 1, user="customer", reservation_arg=True),
+    Endpoint("admin_dashboard", 7, user="admin"),
+    # Потоковый ответ: события читаются из кэша при отправке, а не при обработке запроса
+    Endpoint("reservation_events", 0, user="admin"),
+    # Третий запрос — вместимости столиков для ключа кэша; они кэшируются до следующего изменения столиков
+    Endpoint("check_availability", 3, params={"date": _future_date(), "time": "19:00", "guests": "2"}),
+    Endpoint("day_availability", 3, params={"date": _future_date(), "guests": "2"}),
+    Endpoint("user_reservations", 1, user="customer"),
+    Endpoint("feedback", 0),
+    Endpoint("about", 0),
+    Endpoint("table_list", 1),
+    Endpoint("register", 0),
+    Endpoint("profile", 0, user="customer"),
+    Endpoint("login", 0),
+    Endpoint("logout", 0, user="customer"),
+]
+
+# Списки изменений админки: подсчёт строк, общий подсчёт, выборка страницы и значения фильтра
+ADMIN_CHANGELIST_BUDGET = 4
+
+
+def seed_dataset(reservations=5000, tables=30, days=120, seed=0, batch_size=1000):
+    """
+    Заполняет базу данными реалистичного объёма для проверки запросов.
+
+    Бронирования распределяются по столикам, датам вокруг сегодняшнего дня,
+    статусам и адресам почты нескольких сотен гостей.
+
+    Returns:
+        dict: Созданные пользователи "customer" и "admin"
+    """
+    rng = random.Random(seed)
+    first_number = (Table.objects.aggregate(Max("number"))["number__max"] or 0) + 1
+    pool = Table.objects.bulk_create(
+        Table(number=first_number + i, capacity=rng.choice((2, 2, 4, 4, 6, 8)))
+        for i in range(tables)
+    )
+    customer = User.objects.create_user("audit-customer", "audit-customer@example.com", ADMIN_PASSWORD)
+    admin_user = User.objects.create_superuser("audit-admin", "audit-admin@example.com", ADMIN_PASSWORD)
+    emails = [customer.email] + [f"guest{i}@example.com" for i in range(500)]
+    statuses = [status for status, _ in Reservation.STATUS_CHOICES]
+    today = timezone.now().date()
+
+    # Занятые слоты (столик, дата): подтверждённые брони не должны пересекаться, иначе их отвергнет OVERLAP_CONSTRAINT
+    busy = {}
+    batch = []
+    for _ in range(reservations):
+        status = rng.choice(statuses)
+        date = today + timedelta(days=rng.randint(-days // 2, days // 2))
+        start = dt_time(rng.randint(12, 21), rng.choice((0, 30)))
+        table = None
+        if status == "confirmed":
+            mask = seating_mask(start)
+            free = [candidate for candidate in pool if not busy.get((candidate.pk, date), 0) & mask]
+            if free:
+                table = rng.choice(free)
+                busy[(table.pk, date)] = busy.get((table.pk, date), 0) | mask
+            else:
+                status = "pending"
+        batch.append(Reservation(
+            date=date,
+            time=start,
+            guests=rng.randint(1, 8),
+            phone=f"+7900{rng.randint(0, 9999999):07d}",
+            email=rng.choice(emails),
+            status=status,
+            table=table,
+        ))
+        if len(batch) >= batch_size:
+            Reservation.objects.bulk_create(batch)
+            batch = []
+    Reservation.objects.bulk_create(batch)
+    rebuild_summary()
+
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+    return {"customer": customer, "admin": admin_user}
+
+
+def iter_url_names(urlconf):
+    """
+    Возвращает имена всех URL из модуля urlconf (включая вложенные include).
+    """
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                yield from walk(pattern.url_patterns)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                yield pattern.name
+
+    return list(walk(get_resolver(urlconf).url_patterns))
+
+
+def missing_endpoints():
+    """
+    Возвращает имена URL из проверяемых модулей, для которых не задан бюджет.
+    """
+    covered = {endpoint.name for endpoint in ENDPOINTS}
+    return [
+        name for urlconf in AUDITED_URLCONFS for name in iter_url_names(urlconf)
+        if name not in covered
+    ]
+
+
+def admin_changelist_endpoints():
+    """
+    Возвращает по одной проверке на список изменений каждой зарегистрированной модели проекта.
+    """
+    endpoints = []
+    for model in admin.site._registry:
+        if model._meta.app_label not in ("reservations", "tables"):
+            continue
+        name = f"admin:{model._meta.app_label}_{model._meta.model_name}_changelist"
+        endpoints.append(Endpoint(name, ADMIN_CHANGELIST_BUDGET, user="admin"))
+    return sorted(endpoints, key=lambda endpoint: endpoint.name)
+
+
+class QueryRecorder:
+    """
+    Обёртка execute_wrapper: запоминает SQL, параметры и длительность каждого запроса.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                "sql": sql,
+                "params": params,
+                "many": many,
+                "time": time.perf_counter() - started,
+            })
+
+    @property
+    def total_time(self):
+        return sum(query["time"] for query in self.queries)
+
+
+def _touched_large_tables(sql):
+    return [table for table in LARGE_TABLES if f'"{table}"' in sql]
+
+
+def explain(sql, params):
+    """
+    Возвращает план запроса: строки EXPLAIN QUERY PLAN в SQLite или дерево EXPLAIN (FORMAT JSON) в PostgreSQL.
+
+    В PostgreSQL план строится с выключенным enable_seqscan: если и тогда
+    остаётся полный просмотр, подходящего индекса нет вовсе, и результат не
+    зависит от объёма тестовых данных.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cursor.fetchone()[0]
+            return json.loads(plan)[0]["Plan"] if isinstance(plan, str) else plan[0]["Plan"]
+        if connection.vendor == "sqlite":
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+    return None
+
+
+def _walk_plan(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk_plan(child)
+
+
+def _large_table(relation):
+    """
+    Возвращает большую таблицу, к которой относится relation (для разделов — родительскую), или None.
+    """
+    for table in LARGE_TABLES:
+        if relation == table or relation and relation.startswith(table + "_"):
+            return table
+    return None
+
+
+def find_full_scans(sql, plan):
+    """
+    Находит в плане просмотры больших таблиц, которые проверяют условие на каждой строке.
+
+    Это Seq Scan с фильтром, а также Index Scan без условия по индексу, когда
+    индекс используется только для сортировки (в SQLite — шаг SCAN вместо
+    SEARCH). Просмотр без условия, например COUNT(*) для списка в админке,
+    считается допустимым: индекс ему всё равно не поможет.
+    """
+    if plan is None or " WHERE " not in sql:
+        return []
+    scans = []
+    if isinstance(plan, dict):
+        for node in _walk_plan(plan):
+            # У секционированной таблицы в плане видны разделы, например reservations_reservation_p2025_01
+            table = _large_table(node.get("Relation Name"))
+            if table is None or "Filter" not in node:
+                continue
+            if node["Node Type"] == "Seq Scan" or (
+                node["Node Type"] in ("Index Scan", "Index Only Scan") and "Index Cond" not in node
+            ):
+                scans.append(table)
+        return scans
+    for line in plan:
+        for table in LARGE_TABLES:
+            if line == f"SCAN {table}" or line.startswith(f"SCAN {table} USING"):
+                scans.append(table)
+    return scans
+
+
+def audit_endpoint(endpoint, users, reservation_pk=None):
+    """
+    Выполняет GET-запрос к URL и проверяет количество запросов и их планы.
+
+    Returns:
+        dict: Отчёт: url, статус ответа, количество запросов, время в БД,
+        планы запросов к большим таблицам и список нарушений
+    """
+    kwargs = {"pk": reservation_pk} if endpoint.reservation_arg else None
+    url = reverse(endpoint.name, kwargs=kwargs)
+    client = Client(raise_request_exception=False)
+    if endpoint.user:
+        client.force_login(users[endpoint.user])
+
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        response = client.get(url, endpoint.params)
+
+    # Запросы сессии и пользователя не относятся к самой странице
+    page_queries = [
+        query for query in recorder.queries
+        if '"django_session"' not in query["sql"] and '"auth_user"' not in query["sql"]
+    ]
+    violations = []
+    if response.status_code >= 500:
+        violations.append(f"ответ {response.status_code}")
+    if len(page_queries) > endpoint.budget:
+        violations.append(f"{len(page_queries)} запросов при бюджете {endpoint.budget}")
+
+    plans = []
+    for query in page_queries:
+        if query["many"] or not query["sql"].lstrip().upper().startswith("SELECT"):
+            continue
+        if not _touched_large_tables(query["sql"]):
+            continue
+        plan = explain(query["sql"], query["params"])
+        plans.append({"sql": query["sql"], "plan": plan})
+        for table in find_full_scans(query["sql"], plan):
+            violations.append(f"полный просмотр {table}: {query['sql']}")
+
+    return {
+        "name": endpoint.name,
+        "url": url,
+        "params": endpoint.params,
+        "status": response.status_code,
+        "queries": len(page_queries),
+        "budget": endpoint.budget,
+        "db_time": round(recorder.total_time, 6),
+        "plans": plans,
+        "violations": violations,
+    }
+
+
+def run_audit(users):
+    """
+    Проверяет все URL из AUDITED_URLCONFS и списки изменений админки.
+
+    Returns:
+        list: Отчёты audit_endpoint; URL без бюджета попадают в отчёт с нарушением
+    """
+    reservation_pk = (
+        Reservation.objects.filter(email=users["customer"].email).values_list("pk", flat=True).first()
+    )
+    reports = [
+        audit_endpoint(endpoint, users, reservation_pk)
+        for endpoint in ENDPOINTS + admin_changelist_endpoints()
+    ]
+    for name in missing_endpoints():
+        reports.append({"name": name, "violations": ["для URL не задан бюджет запросов"]})
+    return reports
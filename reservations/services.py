@@ -0,0 +1,194 @@
+import re
+from functools import partial
+from django.db import IntegrityError, connection, transaction
+from tables.models import Table
+from .availability import seating_mask
+from .cache import invalidate_day
+from .events import event_payload, schedule_events
+from .models import OVERLAP_CONSTRAINT_SUFFIX, Reservation, OutboxEmail
+from .outbox import build_reservation_email, enqueue_reservation_email
+from .summary import schedule_summary_refresh
+
+
+class TableConflictError(Exception):
+    """
+    Столик нельзя назначить: он занят на это время или слишком мал для компании.
+    """
+
+
+def is_overlap_violation(error):
+    """
+    Проверяет, что IntegrityError вызвана ограничением OVERLAP_CONSTRAINT или его копией на разделе таблицы.
+    """
+    diag = getattr(error.__cause__, "diag", None)
+    constraint_name = getattr(diag, "constraint_name", None)
+    if constraint_name:
+        return constraint_name.endswith(OVERLAP_CONSTRAINT_SUFFIX)
+    return re.search(rf'"\w+{OVERLAP_CONSTRAINT_SUFFIX}"', str(error)) is not None
+
+
+def assign_table(reservation_pk, table_id, notify=True):
+    """
+    Атомарно назначает столик бронированию и подтверждает его.
+
+    В PostgreSQL пересечения подтверждённых броней одного столика запрещает
+    ограничение исключения OVERLAP_CONSTRAINT: параллельные подтверждения не
+    ждут друг друга на блокировке столика, а проигравшее получает нарушение
+    ограничения, которое превращается в TableConflictError. На других СУБД
+    строка столика блокируется через SELECT ... FOR UPDATE, и пересечение
+    проверяется по уже сохранённым бронированиям.
+
+    Args:
+        reservation_pk: Первичный ключ подтверждаемого бронирования
+        table_id: Идентификатор назначаемого столика
+        notify: Поставить письмо о подтверждении в очередь в той же транзакции
+
+    Returns:
+        Reservation: Подтверждённое бронирование
+
+    Raises:
+        Table.DoesNotExist: Если столик не найден
+        Reservation.DoesNotExist: Если бронирование не найдено
+        TableConflictError: Если столик занят или не подходит по вместимости
+    """
+    enforced_by_database = connection.vendor == "postgresql"
+    with transaction.atomic():
+        if enforced_by_database:
+            table = Table.objects.get(pk=table_id)
+        else:
+            # Порядок блокировок всегда одинаков (столик, затем бронирование), чтобы избежать взаимных блокировок
+            table = Table.objects.select_for_update().get(pk=table_id)
+        reservation = Reservation.objects.select_for_update().get(pk=reservation_pk)
+        conflict = TableConflictError(
+            f"Стол №{table.number} уже занят на {reservation.date} в {reservation.time}"
+        )
+
+        if table.capacity < reservation.guests:
+            raise TableConflictError(
+                f"Стол №{table.number} вмещает только {table.capacity} гостей"
+            )
+
+        if not enforced_by_database:
+            busy_times = (
+                Reservation.objects.filter(date=reservation.date, status="confirmed", table=table)
+                .exclude(pk=reservation.pk)
+                .values_list("time", flat=True)
+            )
+            mask = seating_mask(reservation.time)
+            if any(seating_mask(busy_time) & mask for busy_time in busy_times):
+                raise conflict
+
+        reservation.status = "confirmed"
+        reservation.table = table
+        try:
+            # Вложенный atomic откатывает только неудачный UPDATE, а не всю транзакцию
+            with transaction.atomic():
+                reservation.save()
+        except IntegrityError as error:
+            if is_overlap_violation(error):
+                raise conflict from error
+            raise
+        Table.objects.filter(pk=table.pk).update(is_available=False)
+        if notify:
+            enqueue_reservation_email(reservation, "подтверждено")
+    return reservation
+
+
+def bulk_cancel_reservations(queryset, notify=True):
+    """
+    Отменяет все бронирования из queryset фиксированным числом запросов.
+
+    В одной транзакции блокирует и читает затронутые строки, одним UPDATE
+    меняет их статус, одним UPDATE освобождает столики и одним INSERT ставит
+    письма в очередь. Уже отменённые бронирования не затрагиваются.
+
+    Args:
+        queryset: Queryset отменяемых бронирований
+        notify: Поставить письма об отмене в очередь
+
+    Returns:
+        int: Количество отменённых бронирований
+    """
+    with transaction.atomic():
+        reservations = list(
+            # queryset из списка админки приходит с select_related("table"): FOR UPDATE в PostgreSQL
+            # нельзя применить к LEFT JOIN по необязательному столику, поэтому соединение убирается
+            queryset.exclude(status="cancelled")
+            .select_related(None)
+            .select_for_update()
+            .only("id", "date", "time", "guests", "status", "email", "table_id")
+        )
+        if not reservations:
+            return 0
+
+        cancelled = Reservation.objects.filter(
+            pk__in=[reservation.pk for reservation in reservations]
+        ).update(status="cancelled")
+
+        table_ids = {reservation.table_id for reservation in reservations if reservation.table_id}
+        if table_ids:
+            Table.objects.filter(pk__in=table_ids).update(is_available=True)
+
+        if notify:
+            OutboxEmail.objects.bulk_create(
+                [build_reservation_email(reservation, "отменено") for reservation in reservations]
+            )
+
+        for date in {reservation.date for reservation in reservations}:
+            transaction.on_commit(partial(invalidate_day, date))
+        schedule_summary_refresh((reservation.date, reservation.time) for reservation in reservations)
+
+        payloads = []
+        for reservation in reservations:
+            previous_status, reservation.status = reservation.status, "cancelled"
+            payloads.append(event_payload(reservation, "cancelled", previous_status))
+        schedule_events(payloads)
+    return cancelled
+
+
+def bulk_delete_reservations(queryset, batch_size=1000):
+    """
+    Удаляет бронирования из queryset пачками, не вызывая сигнал release_table для каждой строки.
+
+    Для каждой пачки в отдельной транзакции столики освобождаются одним UPDATE,
+    а строки удаляются одним DELETE. Итоговое состояние столиков совпадает с
+    удалением через Model.delete(): каждый столик удалённого бронирования
+    становится доступным.
+
+    Args:
+        queryset: Queryset удаляемых бронирований
+        batch_size: Максимальное количество строк в одной пачке
+
+    Returns:
+        int: Количество удалённых бронирований
+    """
+    deleted = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                queryset.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .select_related(None)
+                .select_for_update()
+                .values_list("id", "table_id", "date", "time")[:batch_size]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+
+            table_ids = {table_id for _, table_id, _, _ in rows if table_id}
+            if table_ids:
+                Table.objects.filter(pk__in=table_ids).update(is_available=True)
+
+            # _raw_delete выполняет один DELETE без сбора объектов и сигналов;
+            # у Reservation нет зависимых моделей, поэтому каскад не нужен
+            batch = Reservation.objects.filter(pk__in=[pk for pk, _, _, _ in rows])
+            deleted += batch._raw_delete(batch.db)
+
+            for date in {date for _, _, date, _ in rows}:
+                transaction.on_commit(partial(invalidate_day, date))
+            schedule_summary_refresh((date, start_time) for _, _, date, start_time in rows)
+        if len(rows) < batch_size:
+            break
+    return deleted
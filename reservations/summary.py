@@ -0,0 +1,164 @@
+from collections import defaultdict
+from datetime import time
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractHour
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from .cache import invalidate_dashboard
+from .models import Reservation, OccupancySummary
+
+ACTIVE_STATUSES = ("pending", "confirmed")
+SUMMARY_FIELDS = ["covers", "reservations", "tables_used"]
+
+
+def _aggregate(queryset):
+    """
+    Группирует бронирования по дате и часу начала посадки.
+    """
+    return (
+        queryset.filter(status__in=ACTIVE_STATUSES)
+        .annotate(hour=ExtractHour("time"))
+        .values("date", "hour")
+        .annotate(
+            covers=Sum("guests", filter=Q(status="confirmed"), default=0),
+            reservations=Count("id"),
+            tables_used=Count("table", filter=Q(status="confirmed"), distinct=True),
+        )
+        .order_by("date", "hour")
+    )
+
+
+def _hours_filter(hours):
+    """
+    Условие на время начала посадки в пределах часов hours: по диапазону на каждый час, а не по EXTRACT.
+    """
+    condition = Q()
+    for hour in sorted(hours):
+        bounds = Q(time__gte=time(hour))
+        if hour < 23:
+            bounds &= Q(time__lt=time(hour + 1))
+        condition |= bounds
+    return condition
+
+
+def refresh_summary(buckets):
+    """
+    Пересчитывает строки сводки для указанных пар (дата, час).
+
+    Для каждой даты выполняется один сгруппированный запрос только по
+    затронутым часам (диапазоны времени по индексу (date, time)) и один
+    UPSERT, поэтому стоимость не зависит ни от размера таблицы, ни от
+    загруженности остальных часов дня. Часы, в которых не осталось
+    бронирований, обнуляются.
+
+    Пересчёт даты идёт в транзакции под блокировкой строк сводки её часов
+    (недостающие строки сначала создаются). Иначе два параллельных
+    пересчёта одного часа могли бы завершиться в обратном порядке, и
+    более медленный записал бы устаревшие числа поверх свежих; с
+    блокировкой второй пересчёт ждёт первого и читает уже его данные.
+
+    Args:
+        buckets: Итерируемое пар (дата, час)
+    """
+    hours_by_date = defaultdict(set)
+    for date, hour in buckets:
+        if date is not None and hour is not None:
+            hours_by_date[date].add(hour)
+
+    for date, hours in sorted(hours_by_date.items()):
+        hours = sorted(hours)
+        with transaction.atomic():
+            # Строки блокируются в одном порядке (дата, час), чтобы пересчёты не ждали друг друга по кругу
+            OccupancySummary.objects.bulk_create(
+                [OccupancySummary(date=date, hour=hour) for hour in hours], ignore_conflicts=True
+            )
+            list(
+                OccupancySummary.objects.select_for_update()
+                .filter(date=date, hour__in=hours).order_by("hour").values_list("pk", flat=True)
+            )
+            rows = {hour: OccupancySummary(date=date, hour=hour) for hour in hours}
+            for row in _aggregate(Reservation.objects.filter(_hours_filter(hours), date=date)):
+                rows[row["hour"]] = OccupancySummary(**row)
+            OccupancySummary.objects.bulk_create(
+                rows.values(),
+                update_conflicts=True,
+                unique_fields=["date", "hour"],
+                update_fields=SUMMARY_FIELDS,
+            )
+    if hours_by_date:
+        invalidate_dashboard()
+
+
+def schedule_summary_refresh(items):
+    """
+    Откладывает пересчёт сводки до фиксации текущей транзакции.
+
+    Args:
+        items: Итерируемое пар (дата, время) затронутых бронирований
+    """
+    # Дату и время могли присвоить строками ("2030-01-01", "19:00")
+    date_field, time_field = Reservation._meta.get_field("date"), Reservation._meta.get_field("time")
+    buckets = {
+        (date_field.to_python(date), time_field.to_python(start_time).hour)
+        for date, start_time in items if date and start_time
+    }
+    if buckets:
+        transaction.on_commit(lambda: refresh_summary(buckets))
+
+
+def rebuild_summary(date_from=None, date_to=None, batch_size=1000):
+    """
+    Полностью пересобирает сводку за период (для первичного заполнения и сверки).
+
+    Returns:
+        int: Количество записанных строк сводки
+    """
+    reservations = Reservation.objects.all()
+    existing = OccupancySummary.objects.all()
+    if date_from:
+        reservations = reservations.filter(date__gte=date_from)
+        existing = existing.filter(date__gte=date_from)
+    if date_to:
+        reservations = reservations.filter(date__lte=date_to)
+        existing = existing.filter(date__lte=date_to)
+
+    written = 0
+    with transaction.atomic():
+        existing.delete()
+        batch = []
+        for row in _aggregate(reservations).iterator(chunk_size=batch_size):
+            batch.append(OccupancySummary(**row))
+            if len(batch) >= batch_size:
+                OccupancySummary.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        OccupancySummary.objects.bulk_create(batch)
+        written += len(batch)
+    invalidate_dashboard()
+    return written
+
+
+@receiver(post_init, sender=Reservation)
+def remember_summary_bucket(sender, instance, **kwargs):
+    """
+    Запоминает исходные дату и время бронирования, чтобы при переносе обновить оба часа сводки.
+    """
+    instance._summary_origin = (instance.__dict__.get("date"), instance.__dict__.get("time"))
+
+
+@receiver(post_save, sender=Reservation)
+def refresh_saved_reservation_summary(sender, instance, **kwargs):
+    """
+    Обновляет сводку после сохранения бронирования (в том числе при отмене).
+    """
+    schedule_summary_refresh([(instance.date, instance.time), instance._summary_origin])
+    instance._summary_origin = (instance.date, instance.time)
+
+
+@receiver(post_delete, sender=Reservation)
+def refresh_deleted_reservation_summary(sender, instance, **kwargs):
+    """
+    Обновляет сводку после удаления бронирования.
+    """
+    schedule_summary_refresh([(instance.date, instance.time)])
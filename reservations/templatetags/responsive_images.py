@@ -0,0 +1,59 @@
+from django import template
+from django.forms.utils import flatatt
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from restaurant_booking.responsive_images import FORMATS, get_static_prefix, load_manifest
+
+register = template.Library()
+
+
+def _variant_url(file):
+    return static(f"{get_static_prefix()}/{file}")
+
+
+def _srcset(variants):
+    return ", ".join(f"{_variant_url(file)} {width}w" for width, file in variants)
+
+
+@register.simple_tag
+def responsive_image(name, alt="", sizes="100vw", **attrs):
+    """
+    Выводит <picture> с производными изображения разной ширины (AVIF, WebP и запасной формат).
+
+    Браузер сам выбирает формат и ширину по sizes и плотности пикселей экрана.
+    Если производные не собраны (не запускался build_images), выводится
+    обычный <img> с исходным файлом.
+
+    Пример: {% responsive_image "images/rest_trikota.png" alt="Три кота" sizes="50px" %}
+    """
+    entry = load_manifest().get(name)
+    if entry is None:
+        return format_html('<img src="{}" alt="{}"{}>', static(name), alt, flatatt(attrs))
+
+    variants = dict(entry["variants"])
+    fallback_format = "png" if "png" in variants else "jpeg"
+    fallback = variants.pop(fallback_format)
+    sources = format_html_join(
+        "", '<source type="{}" srcset="{}" sizes="{}">',
+        ((FORMATS[format_name][2], _srcset(items), sizes) for format_name, items in variants.items()),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}"{}></picture>',
+        sources, _variant_url(fallback[-1][1]), _srcset(fallback), sizes,
+        entry["width"], entry["height"], alt, flatatt(attrs),
+    )
+
+
+@register.simple_tag
+def responsive_image_url(name, width):
+    """
+    Возвращает адрес наименьшей производной запасного формата не уже width (например, для иконки сайта).
+    """
+    entry = load_manifest().get(name)
+    if entry is None:
+        return static(name)
+    variants = entry["variants"].get("png") or entry["variants"]["jpeg"]
+    for variant_width, file in variants:
+        if variant_width >= width:
+            return _variant_url(file)
+    return _variant_url(variants[-1][1])
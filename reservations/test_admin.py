@@ -2,7 +2,9 @@ from django.test import TestCase, RequestFactory
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from datetime import timedelta, date
+from datetime import timedelta, date, time
+from unittest.mock import patch
+from django.db.models import QuerySet
 from django.contrib.admin.sites import AdminSite
 from django.contrib.messages.storage.fallback import FallbackStorage
 from django.contrib.sessions.middleware import SessionMiddleware
@@ -110,3 +112,48 @@ class TestReservationAdmin(TestCase):
         request = self._create_request("/?this_week=1")
         qs = self.admin.get_queryset(request)
         self.assertEqual(qs.count(), 1)
+
+
+class AdminActionLockingTestCase(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        User.objects.create_superuser("admin", "admin@example.com", "12345")
+        self.client.login(username="admin", password="12345")
+        self.table = Table.objects.create(number=1, capacity=4)
+        day = timezone.now().date() + timedelta(days=1)
+        self.reservation = Reservation.objects.create(date=day, time=time(19, 0), guests=2, phone="1")
+
+    def run_action(self, action):
+        """
+        Выполняет действие через список админки и возвращает SQL всех запросов бронирований с блокировкой строк.
+        """
+        locked = []
+        original = QuerySet.select_for_update
+
+        def record(queryset, *args, **kwargs):
+            locked_queryset = original(queryset, *args, **kwargs)
+            if queryset.model is Reservation:
+                locked.append(locked_queryset)
+            return locked_queryset
+
+        with patch.object(QuerySet, "select_for_update", record):
+            response = self.client.post(
+                reverse("admin:reservations_reservation_changelist"),
+                {"action": action, "_selected_action": [self.reservation.pk]},
+            )
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(locked)
+        # Запрос строится после всех цепочек вызовов, поэтому SQL берётся в конце
+        return [str(queryset.query) for queryset in locked]
+
+    def test_cancel_action_locks_without_join(self):
+        for sql in self.run_action("cancel_reservations"):
+            self.assertNotIn("JOIN", sql)
+        self.reservation.refresh_from_db()
+        self.assertEqual(self.reservation.status, "cancelled")
+
+    def test_allocate_action_locks_without_join(self):
+        for sql in self.run_action("allocate_tables"):
+            self.assertNotIn("JOIN", sql)
+        self.reservation.refresh_from_db()
+        self.assertEqual(self.reservation.table, self.table)
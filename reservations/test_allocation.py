@@ -0,0 +1,105 @@
+import time as clock
+from datetime import time, timedelta
+from io import StringIO
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from tables.models import Table
+from reservations.allocation import allocate_tables
+from reservations.availability import seating_mask
+from reservations.models import Reservation
+from reservations.testing import ReservationFactoryMixin
+
+
+class AllocateTablesTestCase(ReservationFactoryMixin, TestCase):
+    def setUp(self):
+        self.date = (timezone.now() + timedelta(days=1)).date()
+
+    def test_smallest_adequate_table(self):
+        large = Table.objects.create(number=1, capacity=8)
+        small = Table.objects.create(number=2, capacity=2)
+        medium = Table.objects.create(number=3, capacity=4)
+        couple = self.reserve(time(19, 0), 2)
+        family = self.reserve(time(19, 0), 4)
+        assigned, unassigned = allocate_tables(self.date, notify=False)
+        self.assertEqual(unassigned, [])
+        couple.refresh_from_db()
+        family.refresh_from_db()
+        self.assertEqual((couple.status, couple.table), ("confirmed", small))
+        self.assertEqual(family.table, medium)
+        self.assertNotIn(large, [reservation.table for reservation in assigned])
+
+    def test_overlaps_and_confirmed_bookings_are_honored(self):
+        table = Table.objects.create(number=1, capacity=2)
+        self.reserve(time(18, 0), 2, status="confirmed", table=table)
+        overlapping = self.reserve(time(19, 0), 2)
+        later = self.reserve(time(20, 0), 2)
+        assigned, unassigned = allocate_tables(self.date, notify=False)
+        self.assertEqual(unassigned, [overlapping])
+        self.assertEqual(assigned, [later])
+
+    def test_only_selected_reservations(self):
+        Table.objects.create(number=1, capacity=2)
+        selected = self.reserve(time(19, 0), 2)
+        other = self.reserve(time(13, 0), 2)
+        allocate_tables(self.date, reservations=Reservation.objects.filter(pk=selected.pk), notify=False)
+        other.refresh_from_db()
+        self.assertEqual(other.status, "pending")
+
+    def test_service_day_allocates_quickly(self):
+        for number in range(40):
+            Table.objects.create(number=number + 1, capacity=(2, 4, 6, 8)[number % 4])
+        starts = [time(hour, minute) for hour in range(12, 22) for minute in (0, 30)]
+        Reservation.objects.bulk_create([
+            Reservation(date=self.date, time=starts[i % len(starts)], guests=1 + i % 8, phone="1")
+            for i in range(300)
+        ])
+
+        started = clock.perf_counter()
+        assigned, unassigned = allocate_tables(self.date, notify=False)
+        self.assertLess(clock.perf_counter() - started, 1.0)
+        self.assertEqual(len(assigned) + len(unassigned), 300)
+
+        masks = {}
+        for reservation in Reservation.objects.filter(status="confirmed").select_related("table"):
+            self.assertGreaterEqual(reservation.table.capacity, reservation.guests)
+            mask = seating_mask(reservation.time)
+            self.assertFalse(masks.get(reservation.table_id, 0) & mask)
+            masks[reservation.table_id] = masks.get(reservation.table_id, 0) | mask
+
+
+OVERLAP_ERROR = IntegrityError('conflicting key value violates exclusion constraint "reservation_table_no_overlap"')
+
+
+class AllocationConflictTestCase(TestCase):
+    def setUp(self):
+        self.date = (timezone.now() + timedelta(days=1)).date()
+        self.reservation = Reservation.objects.create(date=self.date, time=time(19, 0), guests=2, phone="1")
+
+    def test_command_reports_overlap_conflict(self):
+        with patch("reservations.management.commands.allocate_tables.allocate_tables", side_effect=OVERLAP_ERROR):
+            with self.assertRaisesMessage(CommandError, "повторите команду"):
+                call_command("allocate_tables", "--date", self.date.isoformat(), stdout=StringIO())
+
+    def test_command_reraises_other_integrity_errors(self):
+        with patch("reservations.management.commands.allocate_tables.allocate_tables",
+                   side_effect=IntegrityError("NOT NULL constraint failed")):
+            with self.assertRaises(IntegrityError):
+                call_command("allocate_tables", "--date", self.date.isoformat(), stdout=StringIO())
+
+    def test_admin_action_reports_overlap_conflict(self):
+        User.objects.create_superuser("admin", "admin@example.com", "12345")
+        self.client.login(username="admin", password="12345")
+        with patch("reservations.admin.allocate_tables", side_effect=OVERLAP_ERROR):
+            response = self.client.post(
+                reverse("admin:reservations_reservation_changelist"),
+                {"action": "allocate_tables", "_selected_action": [self.reservation.pk]},
+                follow=True,
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("повторите действие", [str(message) for message in response.context["messages"]][0])
@@ -0,0 +1,71 @@
+import gzip
+import json
+import tempfile
+from datetime import date, time
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from tables.models import Table
+from reservations.archiving import archive_reservations, search_archive
+from reservations.models import Reservation
+
+
+class ArchivingTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.table = Table.objects.create(number=5, capacity=4)
+        self.old = [
+            Reservation.objects.create(date=date(2023, 1, 10), time=time(19, 0), guests=2, phone="1",
+                                       email="anna@example.com", status="confirmed", table=self.table),
+            Reservation.objects.create(date=date(2023, 1, 20), time=time(20, 0), guests=3, phone="2",
+                                       email="boris@example.com", status="cancelled"),
+            Reservation.objects.create(date=date(2023, 2, 5), time=time(18, 30), guests=4, phone="3",
+                                       email="anna@example.com"),
+        ]
+        self.recent = Reservation.objects.create(date=date(2023, 3, 1), time=time(19, 0), guests=2, phone="4")
+
+    def test_archives_by_month_and_deletes(self):
+        result = archive_reservations(date(2023, 3, 1), directory=self.directory.name, batch_size=2)
+
+        self.assertEqual((result["archived"], result["deleted"]), (3, 3))
+        self.assertEqual(list(Reservation.objects.values_list("pk", flat=True)), [self.recent.pk])
+        january, = Path(self.directory.name).glob("year=2023/month=01/part-*.jsonl.gz")
+        with gzip.open(january, "rt", encoding="utf-8") as archive:
+            rows = [json.loads(line) for line in archive]
+        self.assertEqual([row["id"] for row in rows], [self.old[0].pk, self.old[1].pk])
+        self.assertEqual(rows[0]["table_number"], 5)
+        self.assertEqual(rows[0]["time"], "19:00:00")
+
+    def test_search_reads_only_matching_partitions(self):
+        archive_reservations(date(2023, 3, 1), directory=self.directory.name)
+
+        found = list(search_archive(self.directory.name, email="anna@example.com"))
+        self.assertEqual([row["id"] for row in found], [self.old[0].pk, self.old[2].pk])
+
+        with patch("reservations.archiving.gzip.open", wraps=gzip.open) as opened:
+            found = list(search_archive(self.directory.name, date_from=date(2023, 2, 1)))
+        self.assertEqual([row["id"] for row in found], [self.old[2].pk])
+        self.assertEqual(opened.call_count, 1)
+
+    def test_count_mismatch_keeps_rows_and_removes_files(self):
+        with patch("reservations.archiving._count_lines", return_value=0):
+            with self.assertRaises(CommandError):
+                call_command("archive_reservations", "--before", "2023-03-01", "--dir", self.directory.name,
+                             stdout=StringIO())
+
+        self.assertEqual(Reservation.objects.count(), 4)
+        self.assertEqual(list(Path(self.directory.name).rglob("*.gz*")), [])
+
+    def test_search_command_prints_jsonl(self):
+        call_command("archive_reservations", "--before", "2023-03-01", "--dir", self.directory.name,
+                     stdout=StringIO())
+        out = StringIO()
+
+        call_command("search_archive", "--dir", self.directory.name, "--id", str(self.old[1].pk),
+                     stdout=out, stderr=StringIO())
+
+        self.assertEqual(json.loads(out.getvalue())["email"], "boris@example.com")
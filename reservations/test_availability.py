@@ -0,0 +1,71 @@
+from datetime import time, timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from tables.models import Table
+from reservations.models import Reservation
+from reservations.availability import get_day_occupancy, seating_mask, service_slots
+
+
+@override_settings(
+    RESERVATION_SLOT_MINUTES=30,
+    RESERVATION_DURATION_MINUTES=120,
+    RESERVATION_OPENING_TIME="12:00",
+    RESERVATION_CLOSING_TIME="16:00",
+)
+class DayOccupancyTestCase(TestCase):
+    def setUp(self):
+        self.date = (timezone.now() + timedelta(days=1)).date()
+        self.small = Table.objects.create(number=1, capacity=2)
+        self.large = Table.objects.create(number=2, capacity=6)
+        Reservation.objects.create(
+            date=self.date,
+            time=time(13, 0),
+            guests=2,
+            phone="1234567890",
+            status="confirmed",
+            table=self.small,
+        )
+
+    def test_seating_mask_covers_duration(self):
+        self.assertEqual(seating_mask(time(0, 0)), 0b1111)
+        self.assertEqual(seating_mask(time(0, 45)), 0b111110)
+
+    def test_service_slots(self):
+        slots = service_slots()
+        self.assertEqual(slots[0], time(12, 0))
+        self.assertEqual(slots[-1], time(14, 0))
+
+    def test_overlapping_slot_is_busy(self):
+        occupancy = get_day_occupancy(self.date)
+        self.assertFalse(occupancy.is_table_free(self.small.id, time(14, 30)))
+        self.assertTrue(occupancy.is_table_free(self.small.id, time(15, 0)))
+        self.assertTrue(occupancy.is_table_free(self.small.id, time(11, 0)))
+        self.assertFalse(occupancy.is_table_free(self.small.id, time(11, 30)))
+
+    def test_free_tables_ordered_by_capacity(self):
+        occupancy = get_day_occupancy(self.date)
+        self.assertEqual(occupancy.free_tables(time(13, 0), 2), [self.large])
+        self.assertEqual(occupancy.free_tables(time(18, 0), 2), [self.small, self.large])
+
+    def test_pending_and_other_days_are_ignored(self):
+        Reservation.objects.create(
+            date=self.date, time=time(18, 0), guests=6, phone="1", table=self.large
+        )
+        Reservation.objects.create(
+            date=self.date + timedelta(days=1), time=time(18, 0), guests=6, phone="1",
+            status="confirmed", table=self.large,
+        )
+        occupancy = get_day_occupancy(self.date)
+        self.assertTrue(occupancy.is_available(time(18, 0), 6))
+
+    def test_day_grid(self):
+        grid = get_day_occupancy(self.date).day_grid(2)
+        by_time = {slot["time"]: slot for slot in grid}
+        self.assertEqual(by_time["12:00"]["free_tables"], 1)
+        self.assertEqual(by_time["12:00"]["free_seats"], 6)
+        self.assertEqual(by_time["14:00"]["free_tables"], 1)
+        self.assertEqual(len(grid), 5)
+
+    def test_single_reservation_query(self):
+        with self.assertNumQueries(2):
+            get_day_occupancy(self.date).is_available(time(13, 0), 2)
@@ -0,0 +1,114 @@
+from datetime import time, timedelta
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from tables.models import Table
+from reservations.models import Reservation
+
+
+class AvailabilityCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.table = Table.objects.create(number=1, capacity=4)
+        self.date = (timezone.now() + timedelta(days=1)).date()
+        self.params = {"date": self.date.strftime("%Y-%m-%d"), "time": "19:00", "guests": 2}
+
+    def check(self):
+        response = self.client.get(reverse("check_availability"), self.params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["available"]
+
+    def test_repeated_lookup_hits_cache(self):
+        self.assertTrue(self.check())
+        with self.assertNumQueries(0):
+            self.assertTrue(self.check())
+
+    def test_reservation_save_invalidates_day(self):
+        self.assertTrue(self.check())
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation = Reservation.objects.create(
+                date=self.date, time=time(18, 30), guests=2, phone="1", status="confirmed",
+                table=self.table,
+            )
+        self.assertFalse(self.check())
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.cancel()
+        self.assertTrue(self.check())
+
+    def test_invalidation_waits_for_commit(self):
+        self.assertTrue(self.check())
+        with self.captureOnCommitCallbacks(execute=True):
+            Reservation.objects.create(
+                date=self.date, time=time(19, 0), guests=2, phone="1", status="confirmed",
+                table=self.table,
+            )
+            # До фиксации версия дня не меняется: закэшированный ответ не подменяется устаревшим под новой версией
+            self.assertTrue(self.check())
+        self.assertFalse(self.check())
+
+    def test_reservation_with_string_date_invalidates_day(self):
+        self.assertTrue(self.check())
+        with self.captureOnCommitCallbacks(execute=True):
+            Reservation.objects.create(
+                date=self.date.isoformat(), time="19:00", guests=2, phone="1", status="confirmed",
+                table=self.table,
+            )
+        self.assertFalse(self.check())
+
+    def test_reservation_delete_invalidates_day(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation = Reservation.objects.create(
+                date=self.date, time=time(19, 0), guests=2, phone="1", status="confirmed",
+                table=self.table,
+            )
+        self.assertFalse(self.check())
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.delete()
+        self.assertTrue(self.check())
+
+    def test_table_edits_invalidate_all_days(self):
+        self.params["guests"] = 6
+        self.assertFalse(self.check())
+        self.table.capacity = 6
+        self.table.save()
+        self.assertTrue(self.check())
+
+    def test_invalid_parameters(self):
+        self.params["time"] = "вечером"
+        response = self.client.get(reverse("check_availability"), self.params)
+        self.assertEqual(response.status_code, 400)
+
+    def test_day_grid_is_cached(self):
+        url = reverse("day_availability")
+        params = {"date": self.params["date"], "guests": 2}
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, params).json(), response.json())
+
+    def test_party_sizes_share_capacity_bucket(self):
+        Table.objects.create(number=2, capacity=6)
+        self.params["guests"] = 3
+        self.assertTrue(self.check())
+        # 3 и 4 гостям подходят одни и те же столики (на 4 и 6 мест)
+        self.params["guests"] = 4
+        with self.assertNumQueries(0):
+            self.assertTrue(self.check())
+        self.params["guests"] = 5
+        with self.assertNumQueries(2):
+            self.assertTrue(self.check())
+
+    def test_new_capacity_splits_bucket(self):
+        self.params["guests"] = 2
+        self.assertTrue(self.check())
+        Table.objects.create(number=2, capacity=2)
+        Reservation.objects.create(
+            date=self.date, time=time(19), guests=4, phone="1", email="a@example.com",
+            table=self.table, status="confirmed",
+        )
+        # Стол на 2 места появился после первого ответа: у компании из 2 человек теперь своя корзина
+        self.assertTrue(self.check())
+        self.params["guests"] = 3
+        self.assertFalse(self.check())
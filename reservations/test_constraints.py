@@ -0,0 +1,161 @@
+from datetime import datetime, time, timedelta
+from importlib import import_module
+from io import StringIO
+from unittest.mock import patch
+from django.apps import apps
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from tables.models import Table
+from reservations.models import OVERLAP_CONSTRAINT, Reservation
+from reservations.services import is_overlap_violation
+
+
+def admin_form(data):
+    """
+    Форма, которую строит админка бронирований (ReservationAdmin.get_form).
+    """
+    request = RequestFactory().get("/")
+    request.user = User(is_staff=True, is_superuser=True)
+    return admin.site._registry[Reservation].get_form(request)(data=data)
+
+
+class SeatingPeriodTestCase(TestCase):
+    def setUp(self):
+        self.date = (timezone.now() + timedelta(days=1)).date()
+        self.table = Table.objects.create(number=1, capacity=4)
+
+    @override_settings(RESERVATION_DURATION_MINUTES=90)
+    def test_save_sets_period(self):
+        reservation = Reservation.objects.create(date=self.date, time=time(19, 0), guests=2, phone="1")
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.starts_at, timezone.make_aware(datetime.combine(self.date, time(19, 0))))
+        self.assertEqual(reservation.ends_at - reservation.starts_at, timedelta(minutes=90))
+
+    def test_update_fields_include_period(self):
+        reservation = Reservation.objects.create(date=self.date, time=time(19, 0), guests=2, phone="1")
+        reservation.time = time(20, 30)
+        reservation.save(update_fields=["time"])
+        reservation.refresh_from_db()
+        self.assertEqual(timezone.localtime(reservation.starts_at).time(), time(20, 30))
+
+    def test_bulk_create_sets_period(self):
+        Reservation.objects.bulk_create([Reservation(date=self.date, time=time(18, 0), guests=2, phone="1")])
+        reservation = Reservation.objects.get()
+        self.assertEqual(timezone.localtime(reservation.starts_at).time(), time(18, 0))
+        self.assertGreater(reservation.ends_at, reservation.starts_at)
+
+
+class OverlapValidationTestCase(TestCase):
+    def setUp(self):
+        self.date = (timezone.now() + timedelta(days=1)).date()
+        self.table = Table.objects.create(number=1, capacity=4)
+        Reservation.objects.create(
+            date=self.date, time=time(19, 0), guests=2, phone="1", status="confirmed", table=self.table
+        )
+
+    def form_data(self, start, status="confirmed"):
+        return {
+            "date": self.date, "time": start, "guests": 2, "phone": "2",
+            "email": "guest@example.com", "status": status, "table": self.table.pk,
+        }
+
+    def test_overlapping_confirmed_booking_is_form_error(self):
+        form = admin_form(self.form_data(time(20, 0)))
+        self.assertFalse(form.is_valid())
+        self.assertIn("table", form.errors)
+
+    def test_adjacent_booking_is_valid(self):
+        # Посадка [19:00, 21:00) и [21:00, 23:00) не пересекаются
+        self.assertTrue(admin_form(self.form_data(time(21, 0))).is_valid())
+
+    def test_pending_booking_is_not_checked(self):
+        self.assertTrue(admin_form(self.form_data(time(19, 0), status="pending")).is_valid())
+
+    def test_change_view_reports_concurrent_overlap_as_form_error(self):
+        User.objects.create_superuser("admin", "admin@example.com", "12345")
+        self.client.login(username="admin", password="12345")
+        pending = Reservation.objects.create(date=self.date, time=time(20, 0), guests=2, phone="2")
+        model_admin = admin.site._registry[Reservation]
+        original_validate = Reservation.validate_constraints
+        original_save = type(model_admin).save_model
+        calls = {"validate": 0, "save": 0}
+
+        # Первая проверка проходит, как если бы пересекающаяся бронь ещё не была зафиксирована,
+        # а запись отвергает ограничение в базе
+        def validate(instance, exclude=None):
+            calls["validate"] += 1
+            if calls["validate"] > 1:
+                original_validate(instance, exclude=exclude)
+
+        def save_model(model_admin, request, obj, form, change):
+            calls["save"] += 1
+            if calls["save"] == 1:
+                raise IntegrityError(f'violates exclusion constraint "{OVERLAP_CONSTRAINT}"')
+            original_save(model_admin, request, obj, form, change)
+
+        data = self.form_data(time(20, 0))
+        data.update({"date": self.date.isoformat(), "time": "20:00"})
+        with patch.object(Reservation, "validate_constraints", validate), \
+                patch.object(type(model_admin), "save_model", save_model):
+            response = self.client.post(reverse("admin:reservations_reservation_change", args=[pending.pk]), data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("table", response.context["adminform"].form.errors)
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, "pending")
+
+    def test_model_validation_excludes_itself(self):
+        reservation = Reservation.objects.get()
+        reservation.full_clean()
+        other = Reservation(
+            date=self.date, time=time(19, 30), guests=2, phone="3", status="confirmed", table=self.table
+        )
+        with self.assertRaises(ValidationError):
+            other.full_clean()
+
+
+class OverlapViolationTestCase(TestCase):
+    def test_detects_constraint_name(self):
+        self.assertTrue(is_overlap_violation(IntegrityError(
+            f'conflicting key value violates exclusion constraint "{OVERLAP_CONSTRAINT}"'
+        )))
+
+    def test_detects_partition_constraint_name(self):
+        self.assertTrue(is_overlap_violation(IntegrityError(
+            'conflicting key value violates exclusion constraint "reservations_reservation_p2024_03_no_overlap"'
+        )))
+
+    def test_ignores_other_integrity_errors(self):
+        self.assertFalse(is_overlap_violation(IntegrityError("NOT NULL constraint failed")))
+
+
+class ResolveOverlapsMigrationTestCase(TestCase):
+    def test_later_overlapping_booking_returns_to_pending(self):
+        migration = import_module("reservations.migrations.0008_reservation_period_no_overlap")
+        date = (timezone.now() + timedelta(days=1)).date()
+        table = Table.objects.create(number=1, capacity=4)
+        other_table = Table.objects.create(number=2, capacity=4)
+        # bulk_create не проверяет пересечения, как и данные, созданные до миграции
+        first, overlapping, adjacent, elsewhere = Reservation.objects.bulk_create([
+            Reservation(date=date, time=time(19, 0), guests=2, phone="1", status="confirmed", table=table),
+            Reservation(date=date, time=time(20, 0), guests=2, phone="2", status="confirmed", table=table),
+            Reservation(date=date, time=time(21, 0), guests=2, phone="3", status="confirmed", table=table),
+            Reservation(date=date, time=time(19, 30), guests=2, phone="4", status="confirmed", table=other_table),
+        ])
+
+        with patch("sys.stdout", new_callable=StringIO) as output:
+            demoted = migration.resolve_overlaps(apps, None)
+
+        self.assertEqual(demoted, [overlapping.pk])
+        self.assertIn(str(overlapping.pk), output.getvalue())
+        overlapping.refresh_from_db()
+        self.assertEqual((overlapping.status, overlapping.table), ("pending", None))
+        self.assertEqual(
+            set(Reservation.objects.filter(status="confirmed").values_list("pk", flat=True)),
+            {first.pk, adjacent.pk, elsewhere.pk},
+        )
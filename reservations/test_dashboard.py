@@ -0,0 +1,73 @@
+from datetime import time, timedelta
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from tables.models import Table
+from reservations.dashboard import daily_summary, tables_by_capacity
+from reservations.testing import ReservationFactoryMixin
+
+
+class DashboardTestCase(ReservationFactoryMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        self.date = self.today + timedelta(days=2)
+        self.table = Table.objects.create(number=1, capacity=4)
+        Table.objects.create(number=2, capacity=4)
+        Table.objects.create(number=3, capacity=6)
+
+    def test_daily_summary_uses_two_queries(self):
+        self.reserve(guests=4, status="confirmed", table=self.table)
+        self.reserve(guests=2)
+        self.reserve(guests=3, status="cancelled")
+
+        with self.assertNumQueries(2):
+            summary = daily_summary(self.today, days=7)
+
+        self.assertEqual(len(summary), 7)
+        day = summary[2]
+        self.assertEqual(day["date"], self.date)
+        self.assertEqual(day["statuses"], [1, 1, 0, 1])
+        self.assertEqual(day["total"], 3)
+        self.assertEqual(day["covers"], 4)
+        self.assertEqual(summary[0]["total"], 0)
+
+    def test_tables_by_capacity(self):
+        self.reserve(guests=4, status="confirmed", table=self.table)
+        now = timezone.make_aware(timezone.datetime.combine(self.date, time(19, 30)))
+
+        with self.assertNumQueries(2):
+            groups = tables_by_capacity(now)
+
+        self.assertEqual(groups, [
+            {"capacity": 4, "total": 2, "free": 1},
+            {"capacity": 6, "total": 1, "free": 1},
+        ])
+
+    def test_fragments_cached_until_reservations_change(self):
+        User.objects.create_superuser("admin", "admin@example.com", "adminpass")
+        self.client.login(username="admin", password="adminpass")
+        url = reverse("admin_dashboard")
+
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertFalse(any("occupancysummary" in query["sql"] for query in queries.captured_queries))
+        self.assertFalse(any('FROM "tables_table"' in query["sql"] for query in queries.captured_queries))
+
+        self.reserve(guests=5, status="confirmed", table=Table.objects.get(number=3))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertTrue(any("occupancysummary" in query["sql"] for query in queries.captured_queries))
+        self.assertContains(response, "<td>5</td>", html=True)
+
+    async def test_async_dashboard_with_async_client(self):
+        admin = await User.objects.acreate(username="admin", is_staff=True, is_superuser=True)
+        await self.async_client.aforce_login(admin)
+        response = await self.async_client.get(reverse("admin_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Вместимость 6: свободно 1 из 1")
@@ -0,0 +1,147 @@
+import json
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from tables.models import Table
+from reservations.events import EventStream, event_payload, publish_events, read_events, get_last_event_id
+from reservations.models import Reservation
+from reservations.testing import ReservationFactoryMixin
+from reservations.services import bulk_cancel_reservations
+
+
+def parse_stream(content):
+    """
+    Разбирает поток SSE в список пар (вид события, данные); комментарии и retry пропускаются.
+    """
+    events = []
+    for block in content.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":") and ": " in line)
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class EventsTestCase(ReservationFactoryMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.date = timezone.now().date() + timedelta(days=3)
+        self.table = Table.objects.create(number=1, capacity=4)
+
+    def kinds_after(self, last_id):
+        events, _, _ = read_events(last_id)
+        return [(payload["kind"], payload["previous_status"]) for _, payload in events]
+
+    def test_read_events_returns_published_in_order(self):
+        last_id = publish_events([{"kind": "created"}])
+        publish_events([{"kind": "confirmed"}, {"kind": "cancelled"}])
+
+        events, next_id, lagging = read_events(last_id - 1)
+
+        self.assertEqual([payload["kind"] for _, payload in events], ["created", "confirmed", "cancelled"])
+        self.assertEqual(next_id, last_id + 2)
+        self.assertFalse(lagging)
+
+    def test_read_events_reports_lagging_client(self):
+        last_id = publish_events([{"kind": "created"}] * 3)
+
+        events, next_id, lagging = read_events(last_id - 3, limit=2)
+
+        self.assertEqual(events, [])
+        self.assertEqual(next_id, last_id)
+        self.assertTrue(lagging)
+
+    def test_status_changes_publish_events(self):
+        self.reserve()
+        start = get_last_event_id() - 1
+        reservation = Reservation.objects.get()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.status = "confirmed"
+            reservation.table = self.table
+            reservation.save()
+        # Повторное сохранение без смены статуса события не публикует
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.guests = 3
+            reservation.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.status = "cancelled"
+            reservation.save()
+
+        self.assertEqual(
+            self.kinds_after(start),
+            [("created", None), ("confirmed", "pending"), ("cancelled", "confirmed")],
+        )
+
+    def test_payload_accepts_string_date_and_time(self):
+        payload = event_payload(Reservation(date="2030-01-01", time="19:00", guests=2, phone="1"), "created")
+        self.assertEqual((payload["date"], payload["time"]), ("2030-01-01", "19:00"))
+
+    def test_rolled_back_changes_publish_nothing(self):
+        self.reserve()
+        last_id = get_last_event_id()
+
+        with self.captureOnCommitCallbacks(execute=False):
+            reservation = Reservation.objects.get()
+            reservation.status = "confirmed"
+            reservation.save()
+
+        self.assertEqual(get_last_event_id(), last_id)
+
+    def test_bulk_cancel_publishes_event_per_reservation(self):
+        self.reserve()
+        self.reserve(status="confirmed", table=self.table)
+        start = get_last_event_id()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_cancel_reservations(Reservation.objects.all(), notify=False)
+
+        self.assertEqual(
+            sorted(self.kinds_after(start)), [("cancelled", "confirmed"), ("cancelled", "pending")]
+        )
+
+    def test_stream_sends_heartbeat_when_idle(self):
+        stream = EventStream(None, poll_interval=0, heartbeat=0, max_duration=0)
+
+        self.assertEqual(stream.poll(), ["retry: 3000\n\n"])
+        self.assertEqual(stream.poll(), [": heartbeat\n\n"])
+
+    @override_settings(RESERVATION_EVENTS_POLL_INTERVAL=0, RESERVATION_EVENTS_MAX_DURATION=0)
+    def test_view_resumes_from_last_event_id(self):
+        admin_user = User.objects.create_user("admin", "admin@example.com", "password", is_staff=True)
+        reservation = self.reserve()
+        last_id = get_last_event_id()
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.status = "cancelled"
+            reservation.save()
+        self.client.force_login(admin_user)
+
+        response = self.client.get(reverse("reservation_events"), HTTP_LAST_EVENT_ID=str(last_id))
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        content = b"".join(response.streaming_content).decode()
+        self.assertEqual(
+            [(kind, payload["reservation"]) for kind, payload in parse_stream(content)],
+            [("cancelled", reservation.pk)],
+        )
+
+    def test_dashboard_stream_starts_from_render_time_event(self):
+        admin_user = User.objects.create_user("admin", "admin@example.com", "password", is_staff=True)
+        self.reserve()
+        self.client.force_login(admin_user)
+
+        response = self.client.get(reverse("admin_dashboard"))
+
+        self.assertEqual(response.context["last_event_id"], get_last_event_id())
+        self.assertContains(response, f"{reverse('reservation_events')}?last_event_id={get_last_event_id()}")
+
+    def test_view_requires_staff(self):
+        User.objects.create_user("guest", "guest@example.com", "password")
+        self.client.login(username="guest", password="password")
+
+        response = self.client.get(reverse("reservation_events"))
+
+        self.assertEqual(response.status_code, 302)
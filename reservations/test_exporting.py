@@ -0,0 +1,60 @@
+import csv
+from datetime import time, timedelta
+from django.contrib.auth.models import User
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from tables.models import Table
+from reservations.models import Reservation
+
+
+class ExportReservationsTestCase(TestCase):
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_superuser("admin", "admin@example.com", "adminpass")
+        self.client.login(username="admin", password="adminpass")
+        table = Table.objects.create(number=7, capacity=4)
+        date = (timezone.now() + timedelta(days=1)).date()
+        self.confirmed = Reservation.objects.create(
+            date=date, time=time(19, 0), guests=2, phone="1", status="confirmed", table=table
+        )
+        self.pending = Reservation.objects.create(date=date, time=time(20, 0), guests=3, phone="2")
+
+    def read(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode("utf-8-sig")
+        return list(csv.reader(content.splitlines()))
+
+    def test_export_view_applies_changelist_filters(self):
+        url = reverse("admin:reservations_reservation_export")
+        rows = self.read(self.client.get(url, {"status__exact": "confirmed"}))
+        self.assertEqual(rows[0][:3], ["ID", "Дата", "Время"])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][0], str(self.confirmed.pk))
+        self.assertEqual(rows[1][7], "7")
+
+    def test_export_action_streams_selected_rows(self):
+        url = reverse("admin:reservations_reservation_changelist")
+        response = self.client.post(
+            url, {"action": "export_csv", "_selected_action": [self.pending.pk]}
+        )
+        rows = self.read(response)
+        self.assertEqual([row[0] for row in rows[1:]], [str(self.pending.pk)])
+        self.assertEqual(rows[1][7], "")
+
+    async def test_export_streams_asynchronously_under_asgi(self):
+        await self.async_client.aforce_login(await User.objects.aget(username="admin"))
+        response = await self.async_client.get(reverse("admin:reservations_reservation_export"))
+
+        self.assertEqual(response.status_code, 200)
+        # Асинхронный поток отдаётся по частям, а не собирается целиком перед отправкой
+        self.assertTrue(response.is_async)
+        content = b"".join([chunk async for chunk in response.streaming_content]).decode("utf-8-sig")
+        rows = list(csv.reader(content.splitlines()))
+        self.assertEqual([row[0] for row in rows[1:]], [str(self.confirmed.pk), str(self.pending.pk)])
+
+    def test_export_requires_staff(self):
+        self.client.logout()
+        response = self.client.get(reverse("admin:reservations_reservation_export"))
+        self.assertEqual(response.status_code, 302)
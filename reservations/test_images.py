@@ -0,0 +1,66 @@
+import tempfile
+from pathlib import Path
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+from restaurant_booking.responsive_images import build_images, load_manifest
+
+
+class ResponsiveImagesTestCase(SimpleTestCase):
+    def setUp(self):
+        self.source = tempfile.TemporaryDirectory()
+        self.output = tempfile.TemporaryDirectory()
+        self.addCleanup(self.source.cleanup)
+        self.addCleanup(self.output.cleanup)
+        (Path(self.source.name) / "images").mkdir()
+        self.photo = Path(self.source.name) / "images" / "hall.jpg"
+        Image.new("RGB", (800, 400), "navy").save(self.photo)
+        Image.new("RGBA", (100, 100), (0, 0, 0, 0)).save(Path(self.source.name) / "images" / "logo.png")
+        settings_override = override_settings(
+            RESPONSIVE_IMAGE_SOURCE_DIR=self.source.name,
+            RESPONSIVE_IMAGE_OUTPUT_DIR=self.output.name,
+            RESPONSIVE_IMAGE_WIDTHS=(200, 400, 1200),
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def render(self, template):
+        return Template("{% load responsive_images %}" + template).render(Context())
+
+    def test_builds_variants_without_upscaling(self):
+        stats = build_images()
+
+        self.assertEqual(stats["built"], 2)
+        hall = load_manifest()["images/hall.jpg"]
+        self.assertEqual([width for width, _ in hall["variants"]["webp"]], [200, 400, 800])
+        self.assertEqual([width for width, _ in hall["variants"]["jpeg"]], [200, 400, 800])
+        with Image.open(Path(self.output.name) / hall["variants"]["webp"][0][1]) as image:
+            self.assertEqual(image.size, (200, 100))
+        # Прозрачность JPEG не поддерживает, поэтому запасной формат для логотипа — PNG
+        self.assertIn("png", load_manifest()["images/logo.png"]["variants"])
+
+    def test_rebuild_is_incremental(self):
+        build_images()
+        old_files = {file for _, file in load_manifest()["images/hall.jpg"]["variants"]["webp"]}
+
+        self.assertEqual(build_images(), {"built": 0, "skipped": 2, "removed": 0})
+
+        Image.new("RGB", (800, 400), "teal").save(self.photo)
+        stats = build_images()
+        self.assertEqual((stats["built"], stats["skipped"]), (1, 1))
+        self.assertGreater(stats["removed"], 0)
+        self.assertFalse(any((Path(self.output.name) / file).exists() for file in old_files))
+
+    def test_tag_emits_srcset(self):
+        build_images()
+
+        html = self.render('{% responsive_image "images/hall.jpg" alt="Зал" sizes="50vw" loading="lazy" %}')
+
+        self.assertIn('<source type="image/webp" srcset="/static/derived/images/hall.', html)
+        self.assertIn('.200w.webp 200w', html)
+        self.assertIn('sizes="50vw" width="800" height="400" alt="Зал" loading="lazy"', html)
+
+    def test_tag_falls_back_to_original_without_build(self):
+        html = self.render('{% responsive_image "images/hall.jpg" alt="Зал" %}')
+
+        self.assertEqual(html, '<img src="/static/images/hall.jpg" alt="Зал">')
@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from reservations.models import Reservation
+
+
+class ImportReservationsTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.tomorrow = (timezone.now() + timedelta(days=1)).date().isoformat()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def test_csv_import_with_rejects(self):
+        path = self.write("batch.csv", "\n".join([
+            "date,time,guests,phone,email",
+            f"{self.tomorrow},19:00,4,+79990000001,partner@example.com",
+            f"{self.tomorrow},20:30,2,+79990000002,",
+            f"{self.tomorrow},21:00,0,+79990000003,",
+            f"не-дата,21:00,2,+79990000004,",
+            f"{self.tomorrow},21:00,2,+79990000005,не-email",
+        ]))
+        call_command("import_reservations", path, chunk_size=2, stdout=StringIO())
+
+        self.assertEqual(Reservation.objects.count(), 2)
+        imported = Reservation.objects.get(phone="+79990000001")
+        self.assertEqual((imported.guests, imported.email, imported.status), (4, "partner@example.com", "pending"))
+
+        with open(f"{path}.rejects.jsonl", encoding="utf-8") as f:
+            rejects = [json.loads(line) for line in f]
+        self.assertEqual([reject["line"] for reject in rejects], [4, 5, 6])
+        self.assertIn("guests", rejects[0]["errors"])
+        self.assertIn("date", rejects[1]["errors"])
+        self.assertIn("email", rejects[2]["errors"])
+
+    def test_jsonl_import(self):
+        rows = [
+            {"date": self.tomorrow, "time": "19:00", "guests": 2, "phone": "1", "status": "confirmed"},
+            {"date": self.tomorrow, "time": "19:00", "guests": 2, "phone": "2", "status": "lost"},
+        ]
+        path = self.write("batch.jsonl", "\n".join(json.dumps(row) for row in rows) + "\nне json\n")
+        call_command("import_reservations", path, stdout=StringIO())
+        self.assertEqual(list(Reservation.objects.values_list("phone", "status")), [("1", "confirmed")])
+
+    def test_dry_run_saves_nothing(self):
+        path = self.write("batch.csv", f"date,time,guests,phone\n{self.tomorrow},19:00,2,1\n")
+        call_command("import_reservations", path, dry_run=True, stdout=StringIO())
+        self.assertFalse(Reservation.objects.exists())
+        self.assertFalse(os.path.exists(f"{path}.rejects.jsonl"))
@@ -0,0 +1,72 @@
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from tables.models import Table
+from reservations.loadtest import (
+    build_report, cleanup_loadtest, compare_reports, parse_mix, percentile,
+    render_html_report, run_loadtest, seed_loadtest,
+)
+from reservations.models import OccupancySummary, Reservation
+
+
+class LoadTestHelpersTestCase(TestCase):
+    def test_parse_mix(self):
+        self.assertEqual(
+            parse_mix("check_availability=3,cancel_reservation"),
+            {"check_availability": 3, "cancel_reservation": 1},
+        )
+        with self.assertRaises(ValueError):
+            parse_mix("unknown=1")
+        with self.assertRaises(ValueError):
+            parse_mix("check_availability=0")
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_report_and_comparison(self):
+        samples = [("check_availability", 0.01, 200, True), ("check_availability", 0.03, 200, True),
+                   ("cancel_reservation", 0.05, 500, False)]
+        report = build_report(samples, 1.0, {"check_availability": 1, "cancel_reservation": 1}, 2, 0)
+        self.assertEqual(report["total"]["requests"], 3)
+        self.assertEqual(report["total"]["errors"], 1)
+        self.assertEqual(report["scenarios"]["check_availability"]["p95_ms"], 30.0)
+        self.assertEqual(report["scenarios"]["cancel_reservation"]["statuses"], {"500": 1})
+
+        baseline = {"scenarios": {"check_availability": {"p50_ms": 5.0, "p95_ms": 30.0, "p99_ms": 30.0, "rps": 4.0}}}
+        change = compare_reports(report, baseline)["check_availability"]
+        self.assertEqual(change["p50_ms"], 100.0)
+        self.assertEqual(change["rps"], -50.0)
+        self.assertIn("<table", render_html_report(report))
+
+    def test_refuses_non_test_database_without_opt_in(self):
+        with mock.patch.dict(connection.settings_dict, {"NAME": "restaurant"}):
+            with self.assertRaisesMessage(CommandError, "--allow-database restaurant"):
+                call_command("loadtest", requests=1)
+            with self.assertRaisesMessage(CommandError, "--allow-database restaurant"):
+                call_command("loadtest", requests=1, allow_database="other")
+
+
+class LoadTestRunTestCase(TransactionTestCase):
+    def test_run_and_cleanup(self):
+        tables_before = Table.objects.count()
+        state = seed_loadtest(workers=1, pending_count=20)
+        try:
+            samples, elapsed = run_loadtest(state, parse_mix("check_availability=1,create_reservation=1,"
+                                                             "confirm_reservation=1,cancel_reservation=1"),
+                                            workers=1, requests=24, host="testserver")
+        finally:
+            cleanup_loadtest(state)
+
+        self.assertEqual(len(samples), 24)
+        self.assertTrue(all(ok for *_, ok in samples), samples)
+        self.assertGreater(elapsed, 0)
+        self.assertEqual(Table.objects.count(), tables_before)
+        self.assertFalse(Reservation.objects.filter(email__endswith="loadtest.invalid").exists())
+        self.assertFalse(User.objects.filter(username__startswith="loadtest-").exists())
+        self.assertFalse(OccupancySummary.objects.filter(date__in=state.dates).exists())
@@ -0,0 +1,94 @@
+import json
+import tempfile
+from pathlib import Path
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from restaurant_booking.metrics import merge_snapshots, registry, render_prometheus
+
+
+def series(name, labels):
+    return {tuple(key): value for key, value in registry.snapshot()[name]}.get(labels)
+
+
+@override_settings(METRICS_TOKEN="metrics-token")
+class MetricsTestCase(TestCase):
+    def setUp(self):
+        # Страницы из кэша страниц не отрисовываются и не обращаются к БД
+        cache.clear()
+
+    def scrape(self, **headers):
+        return self.client.get(reverse("metrics"), headers=headers or {"Authorization": "Bearer metrics-token"})
+
+    def test_request_metrics_recorded_per_view(self):
+        before = series("django_http_template_render_seconds", ("about",))
+        count_before = before["count"] if before else 0
+
+        response = self.client.get(reverse("about"))
+        self.assertEqual(response.status_code, 200)
+
+        rendered = series("django_http_template_render_seconds", ("about",))
+        self.assertEqual(rendered["count"], count_before + 1)
+        self.assertGreater(rendered["sum"], 0)
+        self.assertIsNotNone(series("django_http_response_size_bytes", ("about",)))
+        self.assertIsNotNone(series("django_http_db_queries", ("about",)))
+
+        metrics = self.scrape()
+        self.assertEqual(metrics["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        body = metrics.content.decode()
+        self.assertIn("# TYPE django_http_request_duration_seconds histogram", body)
+        self.assertIn('django_http_requests_total{view="about",method="GET",status="200"}', body)
+        self.assertIn('django_http_request_duration_seconds_bucket{view="about",method="GET",le="+Inf"}', body)
+
+    def test_metrics_require_token_or_staff(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 401)
+        self.assertEqual(self.scrape(Authorization="Bearer wrong").status_code, 401)
+
+        User.objects.create_user("guest", password="12345")
+        self.client.login(username="guest", password="12345")
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 401)
+
+        User.objects.create_user("staff", password="12345", is_staff=True)
+        self.client.login(username="staff", password="12345")
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 200)
+
+    def test_db_queries_counted(self):
+        self.client.get(reverse("table_list"))
+        queries = series("django_http_db_queries", ("table_list",))
+        self.assertGreaterEqual(queries["sum"], 1)
+
+    def test_unresolved_requests_share_one_label(self):
+        self.client.get("/no-such-page/")
+        self.assertIsNotNone(series("django_http_request_duration_seconds", ("unresolved", "GET")))
+
+    def test_merge_and_render(self):
+        histogram = {"buckets": [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1], "sum": 20.001, "count": 2}
+        merged = merge_snapshots([
+            {"django_http_requests_total": [[["home", "GET", "200"], 2]],
+             "django_http_request_duration_seconds": [[["home", "GET"], histogram]]},
+            {"django_http_requests_total": [[["home", "GET", "200"], 3]],
+             "django_http_request_duration_seconds": [[["home", "GET"], histogram]]},
+        ])
+        body = render_prometheus(merged)
+        self.assertIn('django_http_requests_total{view="home",method="GET",status="200"} 5', body)
+        self.assertIn('django_http_request_duration_seconds_bucket{view="home",method="GET",le="0.005"} 2', body)
+        self.assertIn('django_http_request_duration_seconds_bucket{view="home",method="GET",le="10.0"} 2', body)
+        self.assertIn('django_http_request_duration_seconds_bucket{view="home",method="GET",le="+Inf"} 4', body)
+        self.assertIn('django_http_request_duration_seconds_count{view="home",method="GET"} 4', body)
+
+    def test_multiprocess_aggregation(self):
+        with tempfile.TemporaryDirectory() as directory:
+            other = {"django_http_requests_total": [[["feedback", "POST", "302"], 7]]}
+            Path(directory, "metrics-99999-other.json").write_text(json.dumps(other), encoding="utf-8")
+            with override_settings(METRICS_DIR=directory):
+                body = self.scrape().content.decode()
+                own_files = list(Path(directory).glob("metrics-*.json"))
+        self.assertIn('django_http_requests_total{view="feedback",method="POST",status="302"} 7', body)
+        self.assertEqual(len(own_files), 2)
+
+    async def test_async_view_metrics(self):
+        response = await self.async_client.get(reverse("day_availability"), {"date": "2100-01-01", "guests": 2})
+        self.assertEqual(response.status_code, 200)
+        queries = series("django_http_db_queries", ("day_availability",))
+        self.assertGreaterEqual(queries["sum"], 2)
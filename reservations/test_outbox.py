@@ -0,0 +1,73 @@
+from io import StringIO
+from datetime import time, timedelta
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from tables.models import Table
+from reservations.models import Reservation, OutboxEmail
+from reservations.outbox import drain_outbox, enqueue_reservation_email
+from reservations.services import assign_table
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError("SMTP недоступен")
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    DEFAULT_FROM_EMAIL="noreply@trikota.ru",
+    OUTBOX_MAX_ATTEMPTS=2,
+    OUTBOX_RETRY_BASE_SECONDS=30,
+)
+class OutboxTestCase(TestCase):
+    def setUp(self):
+        self.table = Table.objects.create(number=1, capacity=4)
+        self.reservation = Reservation.objects.create(
+            date=(timezone.now() + timedelta(days=1)).date(),
+            time=time(19, 0),
+            guests=2,
+            phone="1",
+            email="guest@example.com",
+        )
+
+    def test_confirmation_is_queued_not_sent(self):
+        assign_table(self.reservation.pk, self.table.id)
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.recipient, "guest@example.com")
+        self.assertEqual(email.status, "pending")
+
+    def test_drain_sends_pending_emails(self):
+        enqueue_reservation_email(self.reservation, "подтверждено")
+        enqueue_reservation_email(self.reservation, "отменено")
+        self.assertEqual(drain_outbox(), (2, 0))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].subject, "Статус вашего бронирования: подтверждено")
+        self.assertFalse(OutboxEmail.objects.exclude(status="sent").exists())
+        self.assertEqual(drain_outbox(), (0, 0))
+
+    @override_settings(EMAIL_BACKEND="reservations.test_outbox.FailingBackend")
+    def test_failed_email_is_retried_with_backoff(self):
+        email = enqueue_reservation_email(self.reservation, "подтверждено")
+        self.assertEqual(drain_outbox(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.status, "pending")
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=20))
+        self.assertIn("SMTP недоступен", email.last_error)
+
+        # Пока задержка не истекла, письмо не выбирается повторно
+        self.assertEqual(drain_outbox(), (0, 0))
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        drain_outbox()
+        email.refresh_from_db()
+        self.assertEqual(email.status, "failed")
+
+    def test_send_outbox_command(self):
+        enqueue_reservation_email(self.reservation, "подтверждено")
+        call_command("send_outbox", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
@@ -0,0 +1,72 @@
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from tables.models import Table
+from reservations.page_cache import CSRF_PLACEHOLDER
+
+
+class PageCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.table = Table.objects.create(number=1, capacity=4)
+
+    def test_anonymous_page_served_from_cache(self):
+        self.client.get(reverse("table_list"))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("table_list"), {"utm_source": "ads"})
+
+        self.assertContains(response, "Стол 1 - 4 мест")
+        self.assertIn("Cookie", response["Vary"])
+
+    def test_catalog_change_invalidates_table_pages(self):
+        self.client.get(reverse("table_list"))
+
+        self.table.number = 7
+        self.table.save()
+
+        self.assertContains(self.client.get(reverse("table_list")), "Стол 7 - 4 мест")
+
+    def test_availability_toggle_keeps_table_pages(self):
+        self.client.get(reverse("table_list"))
+
+        self.table.is_available = False
+        self.table.save()
+
+        with self.assertNumQueries(0):
+            self.client.get(reverse("table_list"))
+
+    def test_authenticated_users_bypass_cache(self):
+        self.client.get(reverse("table_list"))
+        user = User.objects.create_user("guest", "guest@example.com", "password")
+        self.client.force_login(user)
+
+        response = self.client.get(reverse("table_list"))
+
+        self.assertContains(response, "Мои бронирования")
+
+    @patch("reservations.views.send_mail")
+    def test_pending_messages_bypass_cache(self, mock_send_mail):
+        self.client.get(reverse("home"))
+
+        response = self.client.post(reverse("feedback"), {"name": "Иван", "email": "ivan@example.com",
+                                                          "message": "Спасибо"}, follow=True)
+
+        self.assertContains(response, "Ваше сообщение успешно отправлено!")
+        self.assertNotContains(self.client.get(reverse("home")), "Ваше сообщение успешно отправлено!")
+
+    def test_cached_page_gets_fresh_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        client.get(reverse("home"))
+        visitor = Client(enforce_csrf_checks=True)
+
+        response = visitor.get(reverse("home"))
+
+        self.assertNotContains(response, CSRF_PLACEHOLDER)
+        token = response.content.decode().split('name="csrfmiddlewaretoken" value="')[1].split('"')[0]
+        with patch("reservations.views.send_mail"):
+            posted = visitor.post(reverse("feedback"), {"csrfmiddlewaretoken": token, "name": "Иван",
+                                                        "email": "ivan@example.com", "message": "Спасибо"})
+        self.assertEqual(posted.status_code, 302)
@@ -0,0 +1,64 @@
+from datetime import date
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from reservations.partitioning import (
+    add_months, conversion_statements, create_partition_sql, partition_month, partition_name,
+)
+
+
+class PartitioningTestCase(TestCase):
+    def test_month_arithmetic_and_names(self):
+        self.assertEqual(add_months(date(2024, 11, 15), 3), date(2025, 2, 1))
+        self.assertEqual(add_months(date(2024, 1, 1), -1), date(2023, 12, 1))
+        self.assertEqual(partition_name(date(2024, 3, 1)), "reservations_reservation_p2024_03")
+        self.assertEqual(partition_month("reservations_reservation_p2024_03"), date(2024, 3, 1))
+        self.assertIsNone(partition_month("reservations_reservation_default"))
+
+    def test_partition_bounds_cover_whole_month(self):
+        self.assertIn(
+            "FOR VALUES FROM ('2024-12-01') TO ('2025-01-01')", create_partition_sql(date(2024, 12, 1))[0]
+        )
+
+    def test_exclusion_constraint_is_created_on_partitions_only(self):
+        statements = conversion_statements(
+            "reservations_reservation_unpartitioned", [], [], date(2024, 1, 1), date(2024, 2, 1),
+        )
+
+        excludes = [statement for statement in statements if "EXCLUDE" in statement]
+        self.assertEqual(
+            [statement.split('"')[1] for statement in excludes],
+            ["reservations_reservation_p2024_01", "reservations_reservation_p2024_02",
+             "reservations_reservation_default"],
+        )
+        self.assertFalse(any(statement.startswith('ALTER TABLE "reservations_reservation" ')
+                             and "EXCLUDE" in statement for statement in statements))
+        # Ограничения проверяют строки уже при копировании из старой таблицы
+        self.assertLess(statements.index(excludes[-1]), next(
+            index for index, statement in enumerate(statements) if statement.startswith("INSERT INTO")
+        ))
+
+    def test_conversion_recreates_key_indexes_after_drop(self):
+        statements = conversion_statements(
+            "reservations_reservation_unpartitioned",
+            ['CREATE INDEX idx ON public.reservations_reservation USING btree (date, "time")'],
+            [("fk_table", "FOREIGN KEY (table_id) REFERENCES tables_table(id)")],
+            date(2024, 1, 1), date(2024, 3, 1),
+        )
+
+        self.assertTrue(statements[0].endswith('PARTITION BY RANGE ("date")'))
+        self.assertEqual(sum("PARTITION OF" in statement and "FOR VALUES" in statement for statement in statements), 3)
+        drop = statements.index('DROP TABLE "reservations_reservation_unpartitioned"')
+        self.assertLess(statements.index('INSERT INTO "reservations_reservation" '
+                                         'SELECT * FROM "reservations_reservation_unpartitioned"'), drop)
+        self.assertIn('PRIMARY KEY ("id", "date")', statements[drop + 1])
+        self.assertEqual(statements[-2], 'CREATE INDEX idx ON public.reservations_reservation USING btree (date, "time")')
+        self.assertIn("FOREIGN KEY (table_id)", statements[-1])
+
+    def test_command_requires_postgresql(self):
+        if connection.vendor == "postgresql":
+            self.skipTest("Проверка отказа для других СУБД")
+        with self.assertRaisesMessage(CommandError, "только в PostgreSQL"):
+            call_command("partition_reservations", "status", stdout=StringIO())
@@ -0,0 +1,62 @@
+from io import StringIO
+from unittest.mock import patch
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from reservations.models import Reservation
+from reservations.query_audit import (
+    ENDPOINTS, explain, find_full_scans, isolated_cache, missing_endpoints, run_audit, seed_dataset,
+)
+
+
+class QueryAuditTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = seed_dataset(reservations=2000)
+
+    def test_every_url_has_budget(self):
+        self.assertEqual(missing_endpoints(), [])
+
+    def test_views_within_budget_and_use_indexes(self):
+        reports = run_audit(self.users)
+        self.assertGreaterEqual(len(reports), len(ENDPOINTS))
+        violations = {report["name"]: report["violations"] for report in reports if report["violations"]}
+        self.assertEqual(violations, {})
+
+    def test_detects_unindexed_filter(self):
+        queryset = Reservation.objects.filter(phone="+79000000000")
+        sql, params = queryset.query.sql_with_params()
+        self.assertEqual(find_full_scans(sql, explain(sql, params)), [Reservation._meta.db_table])
+
+    def test_indexed_filter_is_not_reported(self):
+        queryset = Reservation.objects.filter(email="audit-customer@example.com").order_by("-date", "-time")
+        sql, params = queryset.query.sql_with_params()
+        self.assertEqual(find_full_scans(sql, explain(sql, params)), [])
+
+    def test_partition_scans_reported_as_parent_table(self):
+        plan = {"Node Type": "Append", "Plans": [
+            {"Node Type": "Seq Scan", "Relation Name": "reservations_reservation_p2025_01", "Filter": "(guests > 2)"},
+            {"Node Type": "Index Scan", "Relation Name": "reservations_reservation_p2025_02",
+             "Index Cond": "(date = '2025-02-01')", "Filter": "(guests > 2)"},
+        ]}
+        self.assertEqual(
+            find_full_scans('SELECT 1 FROM "reservations_reservation" WHERE 1', plan), [Reservation._meta.db_table]
+        )
+
+    def test_audit_leaves_shared_cache_untouched(self):
+        cache.set("shared", "kept")
+
+        def audit(users):
+            # Страницы, построенные по откатываемым данным, попадают только в кэш проверки
+            self.assertIsNone(cache.get("shared"))
+            cache.set("page:phantom", "rolled back rows")
+            return []
+
+        with patch("reservations.management.commands.audit_queries.run_audit", side_effect=audit), \
+                patch("reservations.management.commands.audit_queries.seed_dataset"):
+            call_command("audit_queries", stdout=StringIO())
+
+        self.assertEqual(cache.get("shared"), "kept")
+        self.assertIsNone(cache.get("page:phantom"))
+        with isolated_cache():
+            self.assertIsNone(cache.get("page:phantom"))
@@ -0,0 +1,147 @@
+from datetime import time, timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.utils import timezone
+from tables.models import Table
+from reservations.models import Reservation, OutboxEmail
+from reservations.services import (
+    TableConflictError, assign_table, bulk_cancel_reservations,
+    bulk_delete_reservations,
+)
+
+
+class AssignTableTestCase(TestCase):
+    def setUp(self):
+        self.date = (timezone.now() + timedelta(days=1)).date()
+        self.table = Table.objects.create(number=1, capacity=4)
+        self.first = Reservation.objects.create(date=self.date, time=time(19, 0), guests=2, phone="1")
+        self.second = Reservation.objects.create(date=self.date, time=time(20, 0), guests=2, phone="2")
+
+    def test_assign_confirms_reservation(self):
+        reservation = assign_table(self.first.pk, self.table.id)
+        self.assertEqual(reservation.status, "confirmed")
+        self.assertEqual(reservation.table, self.table)
+        self.table.refresh_from_db()
+        self.assertFalse(self.table.is_available)
+
+    def test_overlapping_assignment_conflicts(self):
+        assign_table(self.first.pk, self.table.id)
+        with self.assertRaises(TableConflictError):
+            assign_table(self.second.pk, self.table.id)
+        self.second.refresh_from_db()
+        self.assertEqual(self.second.status, "pending")
+        self.assertIsNone(self.second.table)
+
+    def test_reassigning_same_reservation_is_allowed(self):
+        assign_table(self.first.pk, self.table.id)
+        reservation = assign_table(self.first.pk, self.table.id)
+        self.assertEqual(reservation.status, "confirmed")
+
+    def test_small_table_conflicts(self):
+        small = Table.objects.create(number=2, capacity=1)
+        with self.assertRaises(TableConflictError):
+            assign_table(self.first.pk, small.id)
+
+    def test_confirm_view_reports_conflict(self):
+        User.objects.create_user(username="staff", password="12345")
+        client = Client()
+        client.login(username="staff", password="12345")
+        assign_table(self.first.pk, self.table.id)
+        url = reverse("confirm_reservation", args=[self.second.pk])
+        response = client.post(url, {"table": self.table.id})
+        self.assertEqual(response.status_code, 409)
+        self.second.refresh_from_db()
+        self.assertEqual(self.second.status, "pending")
+
+
+class BulkCancelTestCase(TestCase):
+    def setUp(self):
+        self.date = (timezone.now() + timedelta(days=1)).date()
+        self.tables = [Table.objects.create(number=i, capacity=4) for i in range(1, 4)]
+        self.reservations = []
+        for table in self.tables:
+            reservation = Reservation.objects.create(date=self.date, time=time(19, 0), guests=2, phone="1")
+            self.reservations.append(assign_table(reservation.pk, table.id, notify=False))
+        self.already_cancelled = Reservation.objects.create(
+            date=self.date, time=time(20, 0), guests=2, phone="1", status="cancelled"
+        )
+
+    def test_bulk_cancel_uses_fixed_number_of_queries(self):
+        # SELECT ... FOR UPDATE, UPDATE бронирований, UPDATE столиков, INSERT писем и пара SAVEPOINT
+        with self.assertNumQueries(6):
+            cancelled = bulk_cancel_reservations(Reservation.objects.all())
+        self.assertEqual(cancelled, 3)
+        self.assertFalse(Reservation.objects.exclude(status="cancelled").exists())
+        self.assertFalse(Table.objects.filter(is_available=False).exists())
+        self.assertEqual(OutboxEmail.objects.filter(subject__contains="отменено").count(), 3)
+
+    def test_bulk_cancel_matches_instance_cancel(self):
+        self.reservations[0].cancel()
+        expected_table = Table.objects.get(pk=self.tables[0].pk)
+        bulk_cancel_reservations(Reservation.objects.filter(pk=self.reservations[1].pk))
+        actual_table = Table.objects.get(pk=self.tables[1].pk)
+        self.assertEqual(expected_table.is_available, actual_table.is_available)
+        self.assertEqual(
+            Reservation.objects.get(pk=self.reservations[0].pk).status,
+            Reservation.objects.get(pk=self.reservations[1].pk).status,
+        )
+
+    def test_bulk_cancel_of_nothing(self):
+        with self.assertNumQueries(3):
+            self.assertEqual(bulk_cancel_reservations(Reservation.objects.filter(status="cancelled")), 0)
+
+    def test_admin_action_reports_affected_rows(self):
+        User.objects.create_superuser("admin", "admin@example.com", "adminpass")
+        client = Client()
+        client.login(username="admin", password="adminpass")
+        url = reverse("admin:reservations_reservation_changelist")
+        selected = [self.reservations[0].pk, self.already_cancelled.pk]
+        response = client.post(
+            url, {"action": "cancel_reservations", "_selected_action": selected}, follow=True
+        )
+        self.assertContains(response, "1 бронирований было отменено")
+
+
+class BulkDeleteTestCase(TestCase):
+    def setUp(self):
+        self.date = (timezone.now() - timedelta(days=30)).date()
+        self.tables = [Table.objects.create(number=i, capacity=4, is_available=False) for i in range(1, 5)]
+        for table in self.tables[:3]:
+            Reservation.objects.create(
+                date=self.date, time=time(19, 0), guests=2, phone="1", status="confirmed", table=table
+            )
+        Reservation.objects.create(date=self.date, time=time(20, 0), guests=2, phone="1")
+
+    def table_states(self):
+        return list(Table.objects.order_by("number").values_list("number", "is_available"))
+
+    def test_final_state_matches_signal_path(self):
+        Reservation.objects.all().delete()
+        expected = self.table_states()
+
+        Table.objects.update(is_available=False)
+        for table in self.tables[:3]:
+            Reservation.objects.create(
+                date=self.date, time=time(19, 0), guests=2, phone="1", status="confirmed", table=table
+            )
+        Reservation.objects.create(date=self.date, time=time(20, 0), guests=2, phone="1")
+        self.assertEqual(bulk_delete_reservations(Reservation.objects.all()), 4)
+        self.assertEqual(self.table_states(), expected)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_batches_use_constant_queries(self):
+        # На пачку: SAVEPOINT, SELECT, UPDATE столиков, DELETE, RELEASE; плюс завершающая пустая выборка
+        with self.assertNumQueries(13):
+            deleted = bulk_delete_reservations(Reservation.objects.all(), batch_size=2)
+        self.assertEqual(deleted, 4)
+
+    def test_purge_command(self):
+        Reservation.objects.create(
+            date=(timezone.now() + timedelta(days=1)).date(), time=time(19, 0), guests=2, phone="1"
+        )
+        call_command("purge_reservations", before=timezone.now().date().isoformat(), stdout=StringIO())
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.assertFalse(Table.objects.filter(number__in=[1, 2, 3], is_available=False).exists())
@@ -0,0 +1,45 @@
+import json
+import logging
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from restaurant_booking.slow_queries import ExplainRateLimiter, JsonFormatter
+
+
+class SlowQueryLogTestCase(TestCase):
+    def setUp(self):
+        # Страница списка столиков из кэша страниц не обращается к БД
+        cache.clear()
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_SAMPLE_RATE=1.0)
+    def test_logs_query_with_view_and_frame(self):
+        with self.assertLogs("restaurant_booking.slow_queries", level="WARNING") as logs:
+            self.client.get(reverse("table_list"))
+
+        entries = [record.slow_query for record in logs.records]
+        entry = next(entry for entry in entries if '"tables_table"' in entry["sql"])
+        self.assertEqual(entry["view"], "table_list")
+        self.assertEqual(entry["path"], reverse("table_list"))
+        self.assertIsNotNone(entry["frame"])
+        self.assertNotIn("explain", entry)  # EXPLAIN ANALYZE снимается только в PostgreSQL
+
+        line = json.loads(JsonFormatter().format(logs.records[0]))
+        self.assertEqual(line["logger"], "restaurant_booking.slow_queries")
+        self.assertIn("duration_ms", line["slow_query"])
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_SAMPLE_RATE=0)
+    def test_sampling_skips_queries(self):
+        logger = logging.getLogger("restaurant_booking.slow_queries")
+        with self.assertNoLogs(logger, level="WARNING"):
+            self.client.get(reverse("table_list"))
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=10_000)
+    def test_fast_queries_not_logged(self):
+        with self.assertNoLogs("restaurant_booking.slow_queries", level="WARNING"):
+            self.client.get(reverse("table_list"))
+
+    def test_explain_rate_limit(self):
+        limiter = ExplainRateLimiter()
+        self.assertTrue(limiter.allow(60))
+        self.assertFalse(limiter.allow(60))
+        self.assertTrue(limiter.allow(0))
@@ -0,0 +1,73 @@
+import gzip
+import tempfile
+from pathlib import Path
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import TestCase, override_settings
+
+
+class StaticAssetsTestCase(TestCase):
+    def setUp(self):
+        self.source = tempfile.TemporaryDirectory()
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.source.cleanup)
+        self.addCleanup(self.root.cleanup)
+        css = Path(self.source.name) / "css"
+        css.mkdir()
+        (css / "site.css").write_text("body { margin: 0; }\n" * 200, encoding="utf-8")
+        (Path(self.source.name) / "logo.png").write_bytes(b"\x89PNG" + bytes(range(256)))
+        settings_override = override_settings(
+            STATICFILES_DIRS=[self.source.name], STATIC_ROOT=self.root.name,
+            STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def collect(self):
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        self.collect()
+
+        url = static("css/site.css")
+        self.assertRegex(url, r"^/static/css/site\.[0-9a-f]{12}\.css$")
+        hashed = Path(self.root.name) / url.removeprefix("/static/")
+        self.assertEqual(gzip.decompress(hashed.with_name(hashed.name + ".gz").read_bytes()), hashed.read_bytes())
+        # Изображения уже сжаты, сжатые копии для них не создаются
+        self.assertFalse(list(Path(self.root.name).glob("logo*.png.gz")))
+
+    def test_hashed_file_served_compressed_with_far_future_headers(self):
+        self.collect()
+        url = static("css/site.css")
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("Accept-Encoding", response["Vary"])
+        # Статика проходит через SecurityMiddleware
+        self.assertEqual(response["X-Content-Type-Options"], "nosniff")
+        self.assertIn(b"margin", gzip.decompress(b"".join(response.streaming_content)))
+
+        not_modified = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_unhashed_file_served_uncompressed_when_not_accepted(self):
+        self.collect()
+
+        response = self.client.get("/static/css/site.css", HTTP_ACCEPT_ENCODING="gzip;q=0")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertNotIn("immutable", response["Cache-Control"])
+
+    def test_missing_manifest_falls_back_to_original_name(self):
+        self.assertEqual(static("css/site.css"), "/static/css/site.css")
+
+        # Файл скопирован в STATIC_ROOT без обработки: хэшированной копии нет, ссылка остаётся исходной
+        (Path(self.root.name) / "css").mkdir()
+        (Path(self.root.name) / "css" / "site.css").write_text("body {}", encoding="utf-8")
+        self.assertEqual(static("css/site.css"), "/static/css/site.css")
+        self.assertEqual(self.client.get("/static/css/site.css").status_code, 200)
@@ -0,0 +1,103 @@
+from datetime import time, timedelta
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.utils import timezone
+from tables.models import Table
+from reservations.models import Reservation, OccupancySummary
+from reservations.testing import ReservationFactoryMixin
+from reservations.services import bulk_cancel_reservations, bulk_delete_reservations
+from reservations import summary
+from reservations.summary import refresh_summary
+
+
+class OccupancySummaryTestCase(ReservationFactoryMixin, TestCase):
+    def setUp(self):
+        self.date = (timezone.now() + timedelta(days=1)).date()
+        self.table = Table.objects.create(number=1, capacity=4)
+
+    def summary(self, hour):
+        row = OccupancySummary.objects.get(date=self.date, hour=hour)
+        return row.covers, row.reservations, row.tables_used
+
+    def test_save_and_cancel_update_hour(self):
+        confirmed = self.reserve(time(19, 0), 4, status="confirmed", table=self.table)
+        self.reserve(time(19, 30), 2)
+        self.assertEqual(self.summary(19), (4, 2, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            confirmed.cancel()
+        self.assertEqual(self.summary(19), (0, 1, 0))
+
+    def test_string_date_and_time_update_hour(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Reservation.objects.create(date=self.date.isoformat(), time="18:30", guests=2, phone="1")
+        self.assertEqual(self.summary(18), (0, 1, 0))
+
+    def test_moving_reservation_updates_both_hours(self):
+        reservation = self.reserve(time(19, 0), 3, status="confirmed", table=self.table)
+        reservation.time = time(21, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.save()
+        self.assertEqual(self.summary(19), (0, 0, 0))
+        self.assertEqual(self.summary(21), (3, 1, 1))
+
+    def test_delete_paths_update_summary(self):
+        first = self.reserve(time(19, 0), 2, status="confirmed", table=self.table)
+        self.reserve(time(21, 0), 2, status="confirmed", table=self.table)
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(self.summary(19), (0, 0, 0))
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_delete_reservations(Reservation.objects.all())
+        self.assertEqual(self.summary(21), (0, 0, 0))
+
+    def test_bulk_cancel_updates_summary(self):
+        self.reserve(time(19, 0), 2, status="confirmed", table=self.table)
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_cancel_reservations(Reservation.objects.all(), notify=False)
+        self.assertEqual(self.summary(19), (0, 0, 0))
+
+    def test_refresh_reads_only_touched_hours(self):
+        self.reserve(time(12, 0), 2)
+        self.reserve(time(19, 0), 3)
+        self.reserve(time(23, 30), 4)
+        OccupancySummary.objects.filter(date=self.date).update(reservations=99)
+
+        refresh_summary([(self.date, 19), (self.date, 23)])
+
+        self.assertEqual(self.summary(12), (0, 99, 0))
+        self.assertEqual(self.summary(19), (0, 1, 0))
+        self.assertEqual(self.summary(23), (0, 1, 0))
+
+    def test_refresh_locks_buckets_before_aggregating(self):
+        self.reserve(time(19, 0), 2)
+        calls = []
+        original_lock, original_aggregate = QuerySet.select_for_update, summary._aggregate
+
+        def lock(queryset, *args, **kwargs):
+            calls.append(("lock", queryset.model))
+            return original_lock(queryset, *args, **kwargs)
+
+        def aggregate(queryset):
+            calls.append(("aggregate", queryset.model))
+            return original_aggregate(queryset)
+
+        with patch.object(QuerySet, "select_for_update", lock), patch.object(summary, "_aggregate", aggregate):
+            refresh_summary([(self.date, 19), (self.date, 21)])
+
+        self.assertEqual(calls, [("lock", OccupancySummary), ("aggregate", Reservation)])
+        self.assertEqual(self.summary(21), (0, 0, 0))
+
+    def test_rebuild_matches_incremental(self):
+        self.reserve(time(19, 0), 2, status="confirmed", table=self.table)
+        self.reserve(time(19, 15), 3)
+        self.reserve(time(12, 0), 5, status="cancelled")
+        incremental = sorted(
+            OccupancySummary.objects.exclude(reservations=0).values_list("date", "hour", "covers", "reservations", "tables_used")
+        )
+        call_command("rebuild_occupancy", stdout=StringIO())
+        rebuilt = sorted(OccupancySummary.objects.values_list("date", "hour", "covers", "reservations", "tables_used"))
+        self.assertEqual(rebuilt, incremental)
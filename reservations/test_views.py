@@ -7,10 +7,12 @@ from django.utils import timezone
 from datetime import timedelta
 from unittest.mock import patch
 from django.core import mail
+from django.core.cache import cache
 
 
 class ReservationViewsTestCase(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = Client()
         self.user = User.objects.create_user(username="testuser", password="12345")
         self.table = Table.objects.create(number=1, capacity=4, is_available=True)
@@ -139,3 +141,24 @@ class ReservationViewsTestCase(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "about.html")
+
+    def test_day_availability(self):
+        url = reverse("day_availability")
+        data = {
+            "date": (timezone.now() + timedelta(days=1)).strftime("%Y-%m-%d"),
+            "guests": 2,
+        }
+        response = self.client.get(url, data)
+        self.assertEqual(response.status_code, 200)
+        slots = response.json()["slots"]
+        self.assertTrue(slots)
+        self.assertTrue(all(slot["available"] for slot in slots))
+        self.assertEqual(slots[0]["free_seats"], 4)
+
+        data["guests"] = 5
+        response = self.client.get(url, data)
+        self.assertFalse(any(slot["available"] for slot in response.json()["slots"]))
+
+    def test_day_availability_missing_parameters(self):
+        response = self.client.get(reverse("day_availability"), {"guests": 2})
+        self.assertEqual(response.status_code, 400)
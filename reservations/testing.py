@@ -0,0 +1,17 @@
+from datetime import time
+from .models import Reservation
+
+
+class ReservationFactoryMixin:
+    """
+    Помощник тестов: создаёт бронирование на self.date и выполняет его обработчики on_commit.
+
+    Подмешивается к django.test.TestCase, который должен задать self.date в setUp.
+    """
+
+    def reserve(self, start=time(19, 0), guests=2, **kwargs):
+        """
+        Создаёт бронирование на self.date; kwargs передаются в Reservation.objects.create.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            return Reservation.objects.create(date=self.date, time=start, guests=guests, phone="1", **kwargs)
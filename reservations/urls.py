@@ -8,7 +8,9 @@ urlpatterns = [
     path("<int:pk>/confirm/", views.confirm_reservation, name="confirm_reservation"),
     path("<int:pk>/cancel/", views.cancel_reservation, name="cancel_reservation"),
     path("admin-dashboard/", views.admin_dashboard, name="admin_dashboard"),
+    path("events/", views.reservation_events, name="reservation_events"),
     path("check-availability/", views.check_availability, name="check_availability"),
+    path("day-availability/", views.day_availability, name="day_availability"),
     path("my-reservations/", views.user_reservations, name="user_reservations"),
     path("feedback/", views.feedback, name="feedback"),
     path("about/", views.about, name="about"),
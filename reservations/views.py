@@ -4,13 +4,31 @@ from django.contrib import messages
 from django.utils import timezone
 from django.core.mail import send_mail
 from django.conf import settings
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
 from django.views.decorators.http import require_GET
+from django.db import transaction
 from django.db.models import Prefetch
+from django.core.cache import cache
+from django.template.response import TemplateResponse
 from .forms import ReservationForm
 from .models import Reservation
+from .availability import aget_day_occupancy, aload_capacities, get_day_occupancy, parse_time
+from .cache import aget_dashboard_version, aget_or_compute
+from .events import EventStream, aget_last_event_id
+from .dashboard import (
+    adaily_summary, atables_by_capacity, current_slot_key, daily_summary, fragment_keys, tables_by_capacity,
+)
+from .outbox import enqueue_reservation_email
+from .page_cache import cache_anonymous_page
+from .pagination import akeyset_paginate, filter_date_range, keyset_paginate, pagination_context
+from .services import TableConflictError, assign_table
 from tables.models import Table
+import asyncio
 import logging
+import time
+from asgiref.sync import sync_to_async
+from functools import partial
 from datetime import datetime, timedelta
 from django.shortcuts import render, redirect
 from django.contrib.auth import login, authenticate, logout
@@ -68,9 +86,9 @@ def create_reservation(request):
             if reservation_datetime <= current_time + timedelta(hours=3):
                 form.add_error(None, 'Бронирование должно быть сделано не менее чем за 3 часа до выбранного времени')
             else:
-                # Проверяем доступность столиков
-                available_tables = Table.objects.filter(capacity__gte=reservation.guests, is_available=True).exists()
-                if not available_tables:
+                # Проверяем доступность столиков на выбранные дату и время
+                occupancy = get_day_occupancy(reservation.date)
+                if not occupancy.is_available(reservation.time, reservation.guests):
                     form.add_error(None, 'К сожалению, нет доступных столиков на выбранное время')
                 else:
                     reservation.save()
@@ -86,8 +104,10 @@ def create_reservation(request):
 
 @login_required
 def reservation_list(request):
-    reservations = Reservation.objects.select_related("table").all()
-    return render(request, "reservations/reservation_list.html", {"reservations": reservations})
+    reservations, filters = filter_date_range(Reservation.objects.select_related("table"), request.GET)
+    page = keyset_paginate(reservations, request.GET.get("cursor"))
+    context = {"reservations": page, **pagination_context(request, page, filters)}
+    return render(request, "reservations/reservation_list.html", context)
 
 
 @login_required
@@ -99,53 +119,50 @@ def reservation_detail(request, pk):
 @login_required
 def confirm_reservation(request, pk):
     reservation = get_object_or_404(Reservation, pk=pk)
-    available_tables = Table.objects.filter(capacity__gte=reservation.guests, is_available=True)
+    status = 200
 
     if request.method == "POST":
         table_id = request.POST.get("table")
         if table_id:
-            table = Table.objects.get(id=table_id)
-            reservation.status = "confirmed"
-            reservation.table = table
-            reservation.save()
-            table.is_available = False
-            table.save()
-            send_reservation_email(reservation, "подтверждено")
-            confirmation_message = f"Ваше бронирование на {reservation.time} на {reservation.guests} гостей подтверждено котами! Ожидаем вас, мур-мяу"
-            logger.info(f"Adding message: {confirmation_message}")
-            messages.success(request, confirmation_message)
-            return redirect("reservation_detail", pk=reservation.pk)
+            try:
+                reservation = assign_table(reservation.pk, table_id)
+            except (Table.DoesNotExist, ValueError):
+                messages.error(request, "Выбранный стол не найден.")
+                status = 400
+            except TableConflictError as e:
+                messages.error(request, f"{e}. Пожалуйста, выберите другой стол.")
+                status = 409
+            else:
+                confirmation_message = f"Ваше бронирование на {reservation.time} на {reservation.guests} гостей подтверждено котами! Ожидаем вас, мур-мяу"
+                logger.info(f"Adding message: {confirmation_message}")
+                messages.success(request, confirmation_message)
+                return redirect("reservation_detail", pk=reservation.pk)
         else:
             messages.error(request, "Пожалуйста, выберите стол.")
 
+    occupancy = get_day_occupancy(reservation.date, exclude_pk=reservation.pk)
+    available_tables = occupancy.free_tables(reservation.time, reservation.guests)
     return render(request, "reservations/confirm_reservation.html",
-                  {"reservation": reservation, "available_tables": available_tables})
+                  {"reservation": reservation, "available_tables": available_tables}, status=status)
 
 
 @login_required
 def user_reservations(request):
-    reservations = (
-        Reservation.objects.filter(email=request.user.email)
-        .select_related("table")
-        .order_by("-date", "-time")
+    reservations, filters = filter_date_range(
+        Reservation.objects.filter(email=request.user.email).select_related("table"), request.GET
     )
-    return render(request, "reservations/user_reservations.html", {"reservations": reservations})
-
-
-def send_reservation_email(reservation, status):
-    subject = f"Статус вашего бронирования: {status}"
-    message = f"Ваше бронирование на {reservation.date} в {reservation.time} было {status}."
-    from_email = settings.DEFAULT_FROM_EMAIL
-    recipient_list = [reservation.email]
-    send_mail(subject, message, from_email, recipient_list)
+    page = keyset_paginate(reservations, request.GET.get("cursor"), descending=True)
+    context = {"reservations": page, **pagination_context(request, page, filters)}
+    return render(request, "reservations/user_reservations.html", context)
 
 
 @login_required
 def cancel_reservation(request, pk):
     reservation = get_object_or_404(Reservation, pk=pk)
     if request.method == "POST":
-        reservation.cancel()
-        send_reservation_email(reservation, "отменено")
+        with transaction.atomic():
+            reservation.cancel()
+            enqueue_reservation_email(reservation, "отменено")
         messages.success(request, "Бронирование успешно отменено.")
         return redirect("reservation_list")
     return render(request, "reservations/cancel_reservation.html", {"reservation": reservation})
@@ -156,28 +173,105 @@ def is_admin(user):
 
 
 @user_passes_test(is_admin)
-def admin_dashboard(request):
-    today = timezone.now().date()
-    upcoming_reservations = (
-        Reservation.objects.filter(date__gte=today)
-        .select_related("table")
-        .order_by("date", "time")
+async def admin_dashboard(request):
+    now = timezone.now()
+    today = now.date()
+    # Номер события берётся до чтения данных: поток событий начнёт с него, и изменения,
+    # сделанные, пока страница отрисовывается и загружается, не потеряются
+    last_event_id = await aget_last_event_id()
+    upcoming_reservations, filters = filter_date_range(
+        Reservation.objects.filter(date__gte=today).select_related("table"), request.GET
     )
-    available_tables = Table.objects.filter(is_available=True)
+    dashboard_version = await aget_dashboard_version()
+    slot_key = current_slot_key(now)
+    summary_key, tables_key = fragment_keys(dashboard_version, today, slot_key)
+    cached = await cache.aget_many([summary_key, tables_key])
+
+    # Асинхронный ORM выполняет запросы по очереди в одном потоке, так что gather их не распараллеливает:
+    # он лишь собирает нужные задачи в одном месте. Сводки считаются только для фрагментов, которых нет в кэше
+    tasks = {"upcoming_reservations": akeyset_paginate(upcoming_reservations, request.GET.get("cursor"))}
+    if summary_key not in cached:
+        tasks["daily_summary"] = adaily_summary(today)
+    if tables_key not in cached:
+        tasks["tables_by_capacity"] = atables_by_capacity(now)
+    results = dict(zip(tasks, await asyncio.gather(*tasks.values())))
+    page = results["upcoming_reservations"]
 
     context = {
-        "upcoming_reservations": upcoming_reservations,
-        "available_tables": available_tables,
+        "dashboard_version": dashboard_version,
+        "dashboard_timeout": getattr(settings, "DASHBOARD_CACHE_TIMEOUT", 300),
+        "today": today,
+        "slot_key": slot_key,
+        # Если фрагмент истечёт до отрисовки, шаблон вызовет синхронный вариант сам
+        "daily_summary": partial(daily_summary, today),
+        "tables_by_capacity": partial(tables_by_capacity, now),
+        "status_choices": Reservation.STATUS_CHOICES,
+        "last_event_id": last_event_id,
+        **results,
+        **pagination_context(request, page, filters),
     }
-    return render(request, "reservations/admin_dashboard.html", context)
+    # TemplateResponse отрисовывается обработчиком в потоке, где доступны синхронные запросы
+    # (например, request.user в шаблоне)
+    return TemplateResponse(request, "reservations/admin_dashboard.html", context)
+
 
+def _last_event_id(request):
+    value = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
 
+
+@user_passes_test(is_admin)
+async def reservation_events(request):
+    """
+    Поток событий бронирований для панели управления (Server-Sent Events).
+
+    Клиент, переподключаясь, передаёт номер последнего полученного события в
+    заголовке Last-Event-ID и получает пропущенные события. Под ASGI ожидание
+    между опросами не занимает поток; под WSGI каждое открытое соединение
+    занимает поток сервера на время RESERVATION_EVENTS_MAX_DURATION.
+    """
+    poll_interval = getattr(settings, "RESERVATION_EVENTS_POLL_INTERVAL", 1.0)
+    stream = EventStream(
+        _last_event_id(request),
+        poll_interval=poll_interval,
+        heartbeat=getattr(settings, "RESERVATION_EVENTS_HEARTBEAT", 15),
+        max_duration=getattr(settings, "RESERVATION_EVENTS_MAX_DURATION", 300),
+    )
+
+    async def aevents():
+        while True:
+            for chunk in await sync_to_async(stream.poll, thread_sensitive=False)():
+                yield chunk
+            if stream.expired():
+                break
+            await asyncio.sleep(poll_interval)
+
+    def events():
+        while True:
+            yield from stream.poll()
+            if stream.expired():
+                break
+            time.sleep(poll_interval)
+
+    response = StreamingHttpResponse(
+        aevents() if isinstance(request, ASGIRequest) else events(), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # Отключает буферизацию ответа в nginx
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@cache_anonymous_page()
 def home(request):
     return render(request, "home.html")
 
 
 @require_GET
-def check_availability(request):
+async def check_availability(request):
     date = request.GET.get("date")
     time = request.GET.get("time")
     guests = request.GET.get("guests")
@@ -185,15 +279,59 @@ def check_availability(request):
     if not all([date, time, guests]):
         return JsonResponse({"error": "Не все параметры предоставлены"}, status=400)
 
+    try:
+        reservation_date = datetime.strptime(date, "%Y-%m-%d").date()
+        reservation_time = parse_time(time)
+        guests = int(guests)
+    except ValueError:
+        return JsonResponse({"error": "Некорректные параметры"}, status=400)
+
     # Проверяем, что бронирование делается не менее чем за 3 часа
-    reservation_datetime = timezone.make_aware(
-        datetime.combine(datetime.strptime(date, "%Y-%m-%d").date(), datetime.strptime(time, "%H:%M").time()))
+    reservation_datetime = timezone.make_aware(datetime.combine(reservation_date, reservation_time))
     if reservation_datetime <= timezone.now() + timedelta(hours=3):
         return JsonResponse({"available": False,
                              "error": "Бронирование должно быть сделано не менее чем за 3 часа до выбранного времени"})
 
-    available_tables = Table.objects.filter(capacity__gte=int(guests), is_available=True).exists()
-    return JsonResponse({"available": available_tables})
+    async def compute():
+        return (await aget_day_occupancy(reservation_date)).is_available(reservation_time, guests)
+
+    available = await aget_or_compute(
+        reservation_date, ("slot", reservation_time.strftime("%H%M")), compute,
+        guests=guests, load_capacities=aload_capacities,
+    )
+    return JsonResponse({"available": available})
+
+
+@require_GET
+async def day_availability(request):
+    date = request.GET.get("date")
+    guests = request.GET.get("guests")
+
+    if not all([date, guests]):
+        return JsonResponse({"error": "Не все параметры предоставлены"}, status=400)
+
+    try:
+        reservation_date = datetime.strptime(date, "%Y-%m-%d").date()
+        guests = int(guests)
+    except ValueError:
+        return JsonResponse({"error": "Некорректные параметры"}, status=400)
+
+    async def compute():
+        return (await aget_day_occupancy(reservation_date)).day_grid(guests)
+
+    grid = await aget_or_compute(
+        reservation_date, ("grid",), compute, guests=guests, load_capacities=aload_capacities
+    )
+
+    # Слоты ближе чем за 3 часа недоступны; время не входит в ключ кэша, поэтому проверяем после
+    earliest = timezone.now() + timedelta(hours=3)
+    slots = []
+    for slot in grid:
+        slot_datetime = timezone.make_aware(datetime.combine(reservation_date, parse_time(slot["time"])))
+        if slot_datetime <= earliest:
+            slot = {**slot, "available": False}
+        slots.append(slot)
+    return JsonResponse({"date": date, "guests": guests, "slots": slots})
 
 
 def feedback(request):
@@ -222,5 +360,6 @@ def feedback(request):
     return redirect("home")
 
 
+@cache_anonymous_page()
 def about(request):
     return render(request, "about.html")
@@ -5,12 +5,23 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+
+Production entry point (one process serves many concurrent clients; add
+``--workers N`` together with METRICS_DIR for several processes)::
+
+    uvicorn restaurant_booking.asgi:application --host 0.0.0.0 --port 8000
 """
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "restaurant_booking.settings")
 
 application = get_asgi_application()
+
+# В режиме разработки статику отдаёт само приложение, как это делает runserver
+if settings.DEBUG:
+    application = ASGIStaticFilesHandler(application)
@@ -0,0 +1,363 @@
+import copy
+import hmac
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from contextvars import ContextVar
+from pathlib import Path
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.template.backends.django import DjangoTemplates
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Имя, тип, описание, метки и границы корзин (для гистограмм) каждой метрики
+METRICS = {
+    "django_http_requests_total": (
+        "counter", "Количество обработанных запросов", ("view", "method", "status"), None,
+    ),
+    "django_http_request_duration_seconds": (
+        "histogram", "Время обработки запроса", ("view", "method"), LATENCY_BUCKETS,
+    ),
+    "django_http_db_queries": (
+        "histogram", "Количество запросов к БД за один HTTP-запрос", ("view",), QUERY_COUNT_BUCKETS,
+    ),
+    "django_http_db_duration_seconds": (
+        "histogram", "Суммарное время запросов к БД за один HTTP-запрос", ("view",), LATENCY_BUCKETS,
+    ),
+    "django_http_template_render_seconds": (
+        "histogram", "Время отрисовки шаблонов за один HTTP-запрос", ("view",), LATENCY_BUCKETS,
+    ),
+    "django_http_response_size_bytes": (
+        "histogram", "Размер тела ответа (кроме потоковых ответов)", ("view",), SIZE_BUCKETS,
+    ),
+}
+
+_current_request = ContextVar("metrics_request", default=None)
+
+
+class MetricsRegistry:
+    """
+    Значения метрик текущего процесса.
+
+    Для каждой метрики хранится словарь {кортеж значений меток: значение};
+    у гистограммы значение — список счётчиков по корзинам (последняя — +Inf),
+    сумма и количество наблюдений.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {name: {} for name in METRICS}
+
+    def inc(self, name, labels, amount=1):
+        with self._lock:
+            series = self._values[name]
+            series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][3]
+        index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+        with self._lock:
+            series = self._values[name]
+            state = series.get(labels)
+            if state is None:
+                state = series[labels] = {"buckets": [0] * (len(buckets) + 1), "sum": 0, "count": 0}
+            state["buckets"][index] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def snapshot(self):
+        """
+        Возвращает копию значений в виде, пригодном для JSON.
+        """
+        with self._lock:
+            return {
+                name: [[list(labels), copy.deepcopy(value)] for labels, value in series.items()]
+                for name, series in self._values.items()
+            }
+
+
+registry = MetricsRegistry()
+
+
+def merge_snapshots(snapshots):
+    """
+    Складывает значения метрик нескольких процессов.
+    """
+    merged = {name: {} for name in METRICS}
+    for snapshot in snapshots:
+        for name, series in snapshot.items():
+            if name not in merged:
+                continue
+            for labels, value in series:
+                labels = tuple(labels)
+                current = merged[name].get(labels)
+                if current is None:
+                    merged[name][labels] = copy.deepcopy(value)
+                elif isinstance(value, dict):
+                    current["buckets"] = [a + b for a, b in zip(current["buckets"], value["buckets"])]
+                    current["sum"] += value["sum"]
+                    current["count"] += value["count"]
+                else:
+                    merged[name][labels] = current + value
+    return merged
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def render_prometheus(values):
+    """
+    Форматирует значения метрик в текстовом формате Prometheus (версия 0.0.4).
+    """
+    lines = []
+    for name, (kind, help_text, label_names, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(values.get(name, {}).items()):
+            if kind == "counter":
+                lines.append(f"{name}{_format_labels(label_names, labels)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(list(buckets) + ["+Inf"], value["buckets"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(label_names, labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(label_names, labels)} {value['sum']}")
+            lines.append(f"{name}_count{_format_labels(label_names, labels)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+class MultiprocessStore:
+    """
+    Обмен метриками между процессами через каталог METRICS_DIR.
+
+    Каждый процесс периодически записывает свой снимок в отдельный файл
+    (атомарно, через переименование), а /metrics складывает все файлы.
+    Имя файла содержит не только pid, но и случайный идентификатор, чтобы
+    процесс с переиспользованным pid не затёр счётчики завершившегося.
+    Каталог нужно очищать при перезапуске сервера.
+    """
+
+    def __init__(self, directory, flush_interval):
+        self.directory = Path(directory)
+        self.flush_interval = flush_interval
+        self._path = None
+        self._pid = None
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+
+    def _own_path(self):
+        if self._pid != os.getpid():
+            # После fork у дочернего процесса должен быть свой файл
+            self._pid = os.getpid()
+            self._path = self.directory / f"metrics-{self._pid}-{uuid.uuid4().hex}.json"
+        return self._path
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        with self._lock:
+            self._last_flush = now
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._own_path()
+            temporary = path.with_suffix(".tmp")
+            temporary.write_text(json.dumps(registry.snapshot()), encoding="utf-8")
+            os.replace(temporary, path)
+
+    def collect(self):
+        self.flush(force=True)
+        snapshots = []
+        for path in self.directory.glob("metrics-*.json"):
+            try:
+                snapshots.append(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                continue
+        return merge_snapshots(snapshots)
+
+
+_store = None
+
+
+def get_store():
+    """
+    Возвращает хранилище для нескольких процессов или None, если METRICS_DIR не задан.
+    """
+    global _store
+    directory = getattr(settings, "METRICS_DIR", None)
+    if not directory:
+        return None
+    if _store is None or _store.directory != Path(directory):
+        _store = MultiprocessStore(directory, getattr(settings, "METRICS_FLUSH_INTERVAL", 1.0))
+    return _store
+
+
+class RequestStats:
+    """
+    Показатели одного HTTP-запроса, которые накапливаются во время его обработки.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+
+def wrap_connections(stack, wrapper):
+    """
+    Подключает execute_wrapper ко всем соединениям текущего потока до закрытия stack.
+
+    Соединения привязаны к потоку, поэтому в async-обработке функцию нужно
+    вызывать через sync_to_async: тогда обёртка попадёт на соединения того
+    потока, в котором выполняются запросы ORM этого HTTP-запроса.
+    """
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(wrapper))
+
+
+class MetricsMiddleware:
+    """
+    Записывает метрики каждого запроса с меткой view — именем URL из resolver_match.
+
+    Запросы, не сопоставленные ни одному URL (например, 404), попадают под
+    view="unresolved", чтобы число серий оставалось ограниченным. Работает
+    как в синхронной (WSGI), так и в асинхронной (ASGI) цепочке.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                wrap_connections(stack, stats)
+                response = self.get_response(request)
+        finally:
+            _current_request.reset(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        started = time.perf_counter()
+        stack = ExitStack()
+        try:
+            await sync_to_async(wrap_connections)(stack, stats)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current_request.reset(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    def record(self, request, response, stats, duration):
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match and match.view_name else "unresolved"
+        registry.inc("django_http_requests_total", (view, request.method, str(response.status_code)))
+        registry.observe("django_http_request_duration_seconds", (view, request.method), duration)
+        registry.observe("django_http_db_queries", (view,), stats.queries)
+        registry.observe("django_http_db_duration_seconds", (view,), stats.db_time)
+        registry.observe("django_http_template_render_seconds", (view,), stats.template_time)
+        if not response.streaming:
+            registry.observe("django_http_response_size_bytes", (view,), len(response.content))
+
+        store = get_store()
+        if store is not None:
+            store.flush()
+
+
+class TimedTemplate:
+    """
+    Обёртка шаблона, добавляющая время отрисовки к показателям текущего запроса.
+    """
+
+    def __init__(self, template):
+        self._template = template
+
+    def __getattr__(self, name):
+        return getattr(self._template, name)
+
+    def render(self, context=None, request=None):
+        stats = _current_request.get()
+        if stats is None:
+            return self._template.render(context, request)
+        started = time.perf_counter()
+        try:
+            return self._template.render(context, request)
+        finally:
+            stats.template_time += time.perf_counter() - started
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """
+    Шаблонизатор Django, измеряющий время отрисовки шаблонов для MetricsMiddleware.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+def _metrics_allowed(request):
+    """
+    Метрики видят сотрудники и сборщик метрик с токеном METRICS_TOKEN в заголовке Authorization: Bearer.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    if token and scheme.lower() == "bearer" and hmac.compare_digest(credentials.encode(), token.encode()):
+        return True
+    user = getattr(request, "user", None)
+    return bool(user and user.is_active and user.is_staff)
+
+
+def metrics_view(request):
+    """
+    Отдаёт метрики в текстовом формате Prometheus (сумма по всем процессам при заданном METRICS_DIR).
+
+    Число запросов, задержки и время работы БД по представлениям не публичны:
+    без токена METRICS_TOKEN или входа сотрудника возвращается 401.
+    """
+    if not _metrics_allowed(request):
+        response = HttpResponse("Нужна авторизация", status=401, content_type="text/plain; charset=utf-8")
+        response["WWW-Authenticate"] = 'Bearer realm="metrics"'
+        return response
+    store = get_store()
+    if store is not None:
+        values = store.collect()
+    else:
+        values = merge_snapshots([registry.snapshot()])
+    return HttpResponse(render_prometheus(values), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from django.conf import settings
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow нужен только для сборки производных изображений
+    Image = ImageOps = None
+
+MANIFEST_NAME = "manifest.json"
+
+# Расширения исходных изображений, для которых строятся производные
+SOURCE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
+
+# Формат Pillow, расширение, MIME-тип и параметры сохранения производных
+FORMATS = {
+    "avif": ("AVIF", ".avif", "image/avif", {"quality": 60}),
+    "webp": ("WEBP", ".webp", "image/webp", {"quality": 80, "method": 6}),
+    "jpeg": ("JPEG", ".jpg", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+    "png": ("PNG", ".png", "image/png", {"optimize": True}),
+}
+
+
+def get_widths():
+    return tuple(sorted(getattr(settings, "RESPONSIVE_IMAGE_WIDTHS", (320, 640, 960, 1280))))
+
+
+def get_source_dir():
+    """
+    Каталог исходных изображений; имена в манифесте — пути относительно него, как в {% static %}.
+    """
+    return Path(getattr(settings, "RESPONSIVE_IMAGE_SOURCE_DIR", settings.BASE_DIR / "static"))
+
+
+def get_output_dir():
+    """
+    Каталог производных: лежит внутри STATICFILES_DIRS, поэтому collectstatic соберёт их как обычную статику.
+    """
+    return Path(getattr(settings, "RESPONSIVE_IMAGE_OUTPUT_DIR", settings.BASE_DIR / "static" / "derived"))
+
+
+def get_static_prefix():
+    """
+    Путь каталога производных относительно корня статики (для {% static %}).
+    """
+    return getattr(settings, "RESPONSIVE_IMAGE_STATIC_PREFIX", "derived")
+
+
+def supported_formats(image):
+    """
+    Возвращает форматы производных для изображения: современные, которые умеет Pillow, и запасной.
+
+    AVIF строится, только если сборка Pillow умеет его записывать. Запасной
+    формат — JPEG, а для изображений с прозрачностью — PNG.
+    """
+    # Image.SAVE заполняется при загрузке модулей форматов
+    Image.init()
+    formats = [name for name in ("avif", "webp") if FORMATS[name][0] in Image.SAVE]
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    formats.append("png" if has_alpha else "jpeg")
+    return formats
+
+
+def _fingerprint(content, widths):
+    # В хэш входят параметры сборки и форматы, которые умеет Pillow: при их изменении производные пересоберутся
+    Image.init()
+    available = [name for name, (pil_format, *_) in FORMATS.items() if pil_format in Image.SAVE]
+    digest = hashlib.sha256(content)
+    digest.update(json.dumps([widths, FORMATS, available], sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:12]
+
+
+def _target_widths(original_width, widths):
+    """
+    Ширины производных: только меньше исходной (увеличение не нужно) и сама исходная, если она не больше максимальной.
+    """
+    targets = [width for width in widths if width < original_width]
+    if not widths or original_width <= widths[-1]:
+        targets.append(original_width)
+    return targets
+
+
+def _save_variant(image, path, format_name):
+    pil_format, _, _, options = FORMATS[format_name]
+    if format_name == "jpeg" and image.mode != "RGB":
+        image = image.convert("RGB")
+    temporary = path.with_name(path.name + ".tmp")
+    image.save(temporary, pil_format, **options)
+    os.replace(temporary, path)
+
+
+def build_image(source, name, output_dir, widths, previous=None):
+    """
+    Строит производные одного изображения.
+
+    Returns:
+        tuple: Запись манифеста и признак того, что файлы были созданы заново
+        (False, если изображение не менялось и все производные на месте)
+    """
+    content = source.read_bytes()
+    fingerprint = _fingerprint(content, widths)
+    if previous and previous["hash"] == fingerprint and all(
+        (output_dir / file).is_file() for variants in previous["variants"].values() for _, file in variants
+    ):
+        return previous, False
+
+    with Image.open(source) as opened:
+        image = ImageOps.exif_transpose(opened)
+        image.load()
+    stem = Path(name).with_suffix("")
+    entry = {"hash": fingerprint, "width": image.width, "height": image.height, "variants": {}}
+    for format_name in supported_formats(image):
+        extension = FORMATS[format_name][1]
+        variants = []
+        for width in _target_widths(image.width, widths):
+            file = f"{stem.as_posix()}.{fingerprint}.{width}w{extension}"
+            path = output_dir / file
+            if not path.is_file():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                height = max(1, round(image.height * width / image.width))
+                resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+                _save_variant(resized, path, format_name)
+            variants.append([width, file])
+        entry["variants"][format_name] = variants
+    return entry, True
+
+
+def build_images(source_dir=None, output_dir=None, widths=None):
+    """
+    Строит производные всех изображений каталога и записывает манифест.
+
+    Сборка инкрементальная: неизменённые изображения пропускаются, а
+    производные удалённых или изменённых исходников удаляются.
+
+    Returns:
+        dict: Количество построенных, пропущенных и удалённых файлов
+    """
+    if Image is None:
+        raise RuntimeError("Для сборки изображений нужен Pillow")
+    source_dir = Path(source_dir or get_source_dir())
+    output_dir = Path(output_dir or get_output_dir())
+    widths = tuple(sorted(widths or get_widths()))
+    manifest_path = output_dir / MANIFEST_NAME
+    try:
+        previous = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        previous = {}
+
+    manifest = {}
+    stats = {"built": 0, "skipped": 0, "removed": 0}
+    for source in sorted(source_dir.rglob("*")):
+        if not source.is_file() or source.suffix.lower() not in SOURCE_EXTENSIONS:
+            continue
+        if source.is_relative_to(output_dir):
+            continue
+        name = source.relative_to(source_dir).as_posix()
+        manifest[name], built = build_image(source, name, output_dir, widths, previous.get(name))
+        stats["built" if built else "skipped"] += 1
+
+    keep = {file for entry in manifest.values() for variants in entry["variants"].values() for _, file in variants}
+    for entry in previous.values():
+        for variants in entry["variants"].values():
+            for _, file in variants:
+                if file not in keep and (output_dir / file).is_file():
+                    (output_dir / file).unlink()
+                    stats["removed"] += 1
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    temporary = manifest_path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(temporary, manifest_path)
+    return stats
+
+
+_manifest_cache = {}
+_manifest_lock = threading.Lock()
+
+
+def load_manifest():
+    """
+    Возвращает манифест производных (перечитывается, только если файл изменился).
+    """
+    path = get_output_dir() / MANIFEST_NAME
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return {}
+    with _manifest_lock:
+        cached = _manifest_cache.get(path)
+        if cached is None or cached[0] != mtime:
+            try:
+                cached = (mtime, json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                cached = (mtime, {})
+            _manifest_cache[path] = cached
+        return cached[1]
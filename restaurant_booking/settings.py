@@ -29,6 +29,11 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # Статика отдаётся сразу после SecurityMiddleware (её заголовки нужны и статике),
+    # но до остальных middleware: ей не нужны сессии и метрики представлений
+    "restaurant_booking.static_assets.StaticFilesMiddleware",
+    "restaurant_booking.metrics.MetricsMiddleware",
+    "restaurant_booking.slow_queries.SlowQueryMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -41,7 +46,7 @@ ROOT_URLCONF = "restaurant_booking.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "restaurant_booking.metrics.InstrumentedDjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -50,6 +55,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "reservations.page_cache.csrf_placeholder",
             ],
         },
     },
@@ -68,6 +74,44 @@ DATABASES = {
     }
 }
 
+# Кэш: Redis при заданном REDIS_URL, иначе локальная память процесса
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+AVAILABILITY_CACHE_TIMEOUT = 3600
+
+# Время жизни страниц, закэшированных целиком для анонимных посетителей (главная, «О нас», столики)
+PAGE_CACHE_TIMEOUT = 600
+
+# Панель управления: горизонт сводки в днях и время жизни закэшированных блоков
+DASHBOARD_DAYS = 14
+DASHBOARD_CACHE_TIMEOUT = 300
+
+# События бронирований для панели управления (SSE): хранятся в кэше, поэтому при нескольких
+# процессах сервера нужен общий кэш (например, Redis). Интервалы и сроки — в секундах
+RESERVATION_EVENTS_RETENTION = 3600
+RESERVATION_EVENTS_POLL_INTERVAL = 1.0
+RESERVATION_EVENTS_HEARTBEAT = 15
+RESERVATION_EVENTS_MAX_DURATION = 300
+
+# Метрики для /metrics: при нескольких процессах сервера (gunicorn и т. п.) задайте общий
+# каталог METRICS_DIR и очищайте его при перезапуске
+METRICS_DIR = os.getenv('METRICS_DIR') or None
+# Токен сборщика метрик (Authorization: Bearer <токен>); без него /metrics доступен только сотрудникам
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_FLUSH_INTERVAL = 1.0
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -101,8 +145,33 @@ STATICFILES_DIRS = [
 
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# collectstatic добавляет к именам файлов хэш содержимого и записывает рядом сжатые копии .gz и .br
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "restaurant_booking.static_assets.CompressedManifestStaticFilesStorage"},
+}
+
+# Время кэширования статики в браузере: файлы с хэшем в имени не меняются никогда
+STATIC_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+STATIC_MAX_AGE = 60
+
+# Ширины уменьшенных копий изображений (manage.py build_images); копии пишутся в static/derived
+# до collectstatic и подставляются тегом {% responsive_image %}
+RESPONSIVE_IMAGE_WIDTHS = (64, 128, 192, 320, 640, 960, 1280)
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Параметры расчёта занятости столиков по временным слотам
+RESERVATION_SLOT_MINUTES = int(os.getenv('RESERVATION_SLOT_MINUTES', '30'))
+RESERVATION_DURATION_MINUTES = int(os.getenv('RESERVATION_DURATION_MINUTES', '120'))
+RESERVATION_OPENING_TIME = os.getenv('RESERVATION_OPENING_TIME', '12:00')
+RESERVATION_CLOSING_TIME = os.getenv('RESERVATION_CLOSING_TIME', '23:00')
+
+RESERVATIONS_PAGE_SIZE = 50
+
+# Каталог архива старых бронирований (manage.py archive_reservations / search_archive)
+RESERVATIONS_ARCHIVE_DIR = os.getenv('RESERVATIONS_ARCHIVE_DIR') or BASE_DIR / "archive"
+
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = os.getenv('EMAIL_HOST')
 EMAIL_PORT = os.getenv('EMAIL_PORT')
@@ -112,16 +181,42 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL')
 
+# Очередь исходящих писем (outbox), которую разбирает команда send_outbox
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE_SECONDS = 30
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
+    "formatters": {
+        "json": {
+            "()": "restaurant_booking.slow_queries.JsonFormatter",
+        },
+    },
     "handlers": {
         "console": {
             "class": "logging.StreamHandler",
         },
+        "slow_queries": {
+            "class": "logging.StreamHandler",
+            "formatter": "json",
+        },
     },
     "root": {
         "handlers": ["console"],
         "level": "INFO",
     },
+    "loggers": {
+        "restaurant_booking.slow_queries": {
+            "handlers": ["slow_queries"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
 }
+
+# Журнал медленных запросов: порог в миллисекундах, доля попадающих в журнал
+# и минимальный интервал между снятиями EXPLAIN ANALYZE (только PostgreSQL)
+SLOW_QUERY_THRESHOLD_MS = int(os.getenv('SLOW_QUERY_THRESHOLD_MS') or 200)
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv('SLOW_QUERY_SAMPLE_RATE') or 1.0)
+SLOW_QUERY_EXPLAIN_INTERVAL = 60
@@ -0,0 +1,198 @@
+import json
+import logging
+import random
+import threading
+import time
+import traceback
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from .metrics import wrap_connections
+
+logger = logging.getLogger(__name__)
+
+# Поля записи журнала, которые не относятся к самому сообщению
+_STANDARD_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Форматирует запись журнала как одну строку JSON, включая поля, переданные через extra.
+    """
+
+    def format(self, record):
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_RECORD_FIELDS:
+                data[key] = value
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class ExplainRateLimiter:
+    """
+    Разрешает не больше одного EXPLAIN ANALYZE за interval секунд в процессе.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last = None
+
+    def allow(self, interval):
+        now = time.monotonic()
+        with self._lock:
+            if self._last is not None and now - self._last < interval:
+                return False
+            self._last = now
+            return True
+
+
+explain_limiter = ExplainRateLimiter()
+_explaining = threading.local()
+
+
+def _origin_frame():
+    """
+    Возвращает ближайший к запросу кадр стека из кода проекта (не Django и не этого модуля).
+    """
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        if frame.filename.startswith(base_dir) and frame.filename != __file__ and "site-packages" not in frame.filename:
+            return f"{frame.filename[len(base_dir) + 1:]}:{frame.lineno} in {frame.name}"
+    return None
+
+
+def _is_explainable(sql):
+    statement = sql.lstrip().upper()
+    return statement.startswith("SELECT") and "FOR UPDATE" not in statement
+
+
+def capture_explain(connection, sql, params):
+    """
+    Выполняет EXPLAIN (ANALYZE, BUFFERS) для запроса в PostgreSQL.
+
+    ANALYZE выполняет запрос повторно, поэтому план снимается только для
+    SELECT без блокировок и внутри точки сохранения: ошибка не прерывает
+    транзакцию запроса.
+
+    Returns:
+        План в формате JSON или None
+    """
+    if connection.vendor != "postgresql" or not _is_explainable(sql):
+        return None
+    _explaining.active = True
+    try:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+            plan = cursor.fetchone()[0]
+            return json.loads(plan) if isinstance(plan, str) else plan
+    except DatabaseError as e:
+        return {"error": str(e)}
+    finally:
+        _explaining.active = False
+
+
+class SlowQueryLogger:
+    """
+    Обёртка execute_wrapper: пишет в журнал выборку запросов дольше порога.
+
+    Args:
+        request: Текущий HTTP-запрос (для имени обработчика) или None
+        threshold: Порог в секундах
+        sample_rate: Доля медленных запросов, попадающих в журнал (0–1)
+        explain_interval: Минимальный интервал между снятиями плана в секундах (None — не снимать)
+    """
+
+    def __init__(self, request=None, threshold=0.2, sample_rate=1.0, explain_interval=60):
+        self.request = request
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.explain_interval = explain_interval
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_explaining, "active", False):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if duration >= self.threshold and random.random() < self.sample_rate:
+                self.log(context["connection"], sql, params, many, duration)
+
+    def log(self, connection, sql, params, many, duration):
+        match = getattr(self.request, "resolver_match", None)
+        entry = {
+            "duration_ms": round(duration * 1000, 3),
+            "sql": sql,
+            "params": None if many else params,
+            "database": connection.alias,
+            "view": match.view_name if match else None,
+            "path": getattr(self.request, "path", None),
+            "frame": _origin_frame(),
+        }
+        if (
+            not many
+            and self.explain_interval is not None
+            and connection.vendor == "postgresql"
+            and _is_explainable(sql)
+            and explain_limiter.allow(self.explain_interval)
+        ):
+            entry["explain"] = capture_explain(connection, sql, params)
+        logger.warning("Медленный запрос %.1f мс", entry["duration_ms"], extra={"slow_query": entry})
+
+
+class SlowQueryMiddleware:
+    """
+    Подключает SlowQueryLogger ко всем соединениям на время обработки запроса (WSGI и ASGI).
+
+    Настройки: SLOW_QUERY_THRESHOLD_MS (None отключает журнал),
+    SLOW_QUERY_SAMPLE_RATE и SLOW_QUERY_EXPLAIN_INTERVAL.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _make_logger(self, request):
+        threshold_ms = getattr(settings, "SLOW_QUERY_THRESHOLD_MS", None)
+        if threshold_ms is None:
+            return None
+        return SlowQueryLogger(
+            request,
+            threshold=threshold_ms / 1000,
+            sample_rate=getattr(settings, "SLOW_QUERY_SAMPLE_RATE", 1.0),
+            explain_interval=getattr(settings, "SLOW_QUERY_EXPLAIN_INTERVAL", 60),
+        )
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        slow_query_logger = self._make_logger(request)
+        if slow_query_logger is None:
+            return self.get_response(request)
+        with ExitStack() as stack:
+            wrap_connections(stack, slow_query_logger)
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        slow_query_logger = self._make_logger(request)
+        if slow_query_logger is None:
+            return await self.get_response(request)
+        stack = ExitStack()
+        try:
+            await sync_to_async(wrap_connections)(stack, slow_query_logger)
+            return await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
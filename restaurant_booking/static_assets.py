@@ -0,0 +1,250 @@
+import gzip
+import json
+import mimetypes
+import os
+import threading
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli необязателен, без него создаются только .gz
+    brotli = None
+
+# Расширения файлов, которые имеет смысл сжимать (изображения и шрифты уже сжаты)
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".mjs", ".map", ".json", ".svg", ".txt", ".html", ".xml", ".ico"}
+
+# Сжатая копия сохраняется, только если она меньше исходного файла хотя бы на 5 %
+MIN_COMPRESSION_RATIO = 0.95
+
+# Суффикс файла и значение Content-Encoding в порядке предпочтения
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _compress(content):
+    """
+    Возвращает сжатые варианты содержимого {суффикс: байты}, которые заметно меньше исходного.
+    """
+    variants = {".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(content, quality=11)
+    return {
+        suffix: data for suffix, data in variants.items()
+        if len(data) < len(content) * MIN_COMPRESSION_RATIO
+    }
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Хранилище статики с хэшем содержимого в имени файла и заранее сжатыми копиями.
+
+    После обработки collectstatic для каждого сжимаемого файла (и исходного,
+    и с хэшем в имени) рядом записываются .gz и, если установлен brotli, .br.
+
+    Если манифеста нет (collectstatic не запускался) или файла нет в
+    манифесте, {% static %} возвращает исходное имя вместо ошибки.
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        # Без записи в манифесте хэш посчитался бы по файлу, которого с таким именем в STATIC_ROOT нет
+        if self.hash_key(self.clean_name(urlsplit(unquote(name)).path.strip())) not in self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if Path(name).suffix.lower() not in COMPRESSIBLE_EXTENSIONS or not self.exists(name):
+                continue
+            with self.open(name) as original:
+                content = original.read()
+            for suffix, data in _compress(content).items():
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self._save(name + suffix, ContentFile(data))
+
+
+class StaticAsset:
+    """
+    Файл из STATIC_ROOT и его сжатые копии.
+    """
+
+    def __init__(self, path, variants, immutable):
+        self.path = path
+        self.variants = variants
+        self.immutable = immutable
+        stat = path.stat()
+        self.content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        self.last_modified = http_date(stat.st_mtime)
+        self.etag = f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+
+
+def _etag(asset, encoding):
+    # У сжатых вариантов разное содержимое, поэтому и ETag у них свой
+    return asset.etag if encoding is None else f'{asset.etag[:-1]}-{encoding}"'
+
+
+def _accepted_encodings(header):
+    accepted = set()
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+class StaticIndex:
+    """
+    Перечень файлов STATIC_ROOT, построенный один раз: после collectstatic файлы не меняются.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.assets = {}
+        manifest = self.root / ManifestStaticFilesStorage.manifest_name
+        try:
+            hashed = set(json.loads(manifest.read_text(encoding="utf-8")).get("paths", {}).values())
+        except (OSError, ValueError):
+            hashed = set()
+        if not self.root.is_dir():
+            return
+        for directory, _, files in os.walk(self.root):
+            for filename in files:
+                path = Path(directory) / filename
+                if path.suffix in (".gz", ".br") or path.name == manifest.name:
+                    continue
+                name = path.relative_to(self.root).as_posix()
+                variants = {
+                    encoding: path.with_name(path.name + suffix)
+                    for encoding, suffix in ENCODINGS
+                    if path.with_name(path.name + suffix).is_file()
+                }
+                self.assets[name] = StaticAsset(path, variants, name in hashed)
+
+    def choose(self, asset, accept_encoding):
+        """
+        Возвращает путь к файлу и Content-Encoding наилучшего варианта, который принимает клиент.
+        """
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding, _ in ENCODINGS:
+            if encoding in asset.variants and encoding in accepted:
+                return asset.variants[encoding], encoding
+        return asset.path, None
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """
+    Возвращает перечень файлов текущего STATIC_ROOT (строится при первом обращении).
+    """
+    global _index
+    root = Path(settings.STATIC_ROOT) if settings.STATIC_ROOT else None
+    if root is None:
+        return None
+    with _index_lock:
+        if _index is None or _index.root != root:
+            _index = StaticIndex(root)
+        return _index
+
+
+class StaticFilesMiddleware:
+    """
+    Отдаёт собранную статику из STATIC_ROOT без отдельного веб-сервера (WSGI и ASGI).
+
+    Выбирает br или gzip по Accept-Encoding. Файлы с хэшем в имени кэшируются
+    браузером на STATIC_IMMUTABLE_MAX_AGE секунд с пометкой immutable, файлы
+    без хэша — на STATIC_MAX_AGE секунд с проверкой по ETag. Запросы к
+    отсутствующим файлам передаются дальше по цепочке.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _find(self, request):
+        if request.method not in ("GET", "HEAD") or not settings.STATIC_URL:
+            return None
+        prefix = "/" + settings.STATIC_URL.lstrip("/")
+        if not request.path.startswith(prefix):
+            return None
+        index = get_index()
+        if index is None:
+            return None
+        return index.assets.get(request.path[len(prefix):])
+
+    def _headers(self, response, asset, encoding):
+        response["Content-Type"] = asset.content_type
+        response["Last-Modified"] = asset.last_modified
+        response["ETag"] = _etag(asset, encoding)
+        if asset.immutable:
+            max_age = getattr(settings, "STATIC_IMMUTABLE_MAX_AGE", 31536000)
+            response["Cache-Control"] = f"public, max-age={max_age}, immutable"
+        else:
+            response["Cache-Control"] = f"public, max-age={getattr(settings, 'STATIC_MAX_AGE', 60)}"
+        if encoding:
+            response["Content-Encoding"] = encoding
+        if asset.variants:
+            patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+    def _prepare(self, request, asset):
+        """
+        Выбирает вариант файла; для повторного запроса с тем же ETag возвращает готовый ответ 304.
+        """
+        path, encoding = get_index().choose(asset, request.headers.get("Accept-Encoding", ""))
+        if request.headers.get("If-None-Match") == _etag(asset, encoding):
+            return path, encoding, self._headers(HttpResponseNotModified(), asset, encoding)
+        if request.method == "HEAD":
+            response = HttpResponse()
+            response["Content-Length"] = path.stat().st_size
+            return path, encoding, self._headers(response, asset, encoding)
+        return path, encoding, None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        asset = self._find(request)
+        if asset is None:
+            return self.get_response(request)
+        path, encoding, response = self._prepare(request, asset)
+        if response is None:
+            # FileResponse позволяет WSGI-серверу отдать файл через sendfile
+            response = self._headers(FileResponse(open(path, "rb"), filename=asset.path.name), asset, encoding)
+        return response
+
+    async def __acall__(self, request):
+        asset = self._find(request)
+        if asset is None:
+            return await self.get_response(request)
+        path, encoding, response = self._prepare(request, asset)
+        if response is None:
+            # Файл читается целиком за один переход в поток: синхронный итератор
+            # FileResponse обработчик ASGI всё равно собрал бы в список
+            content = await sync_to_async(path.read_bytes, thread_sensitive=False)()
+            response = self._headers(HttpResponse(content), asset, encoding)
+        return response
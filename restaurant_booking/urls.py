@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include
 from reservations import views as reservation_views
+from .metrics import metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -8,5 +9,6 @@ urlpatterns = [
     path("tables/", include("tables.urls")),
     path("users/", include("users.urls")),
     path("accounts/", include("accounts.urls")),
+    path("metrics", metrics_view, name="metrics"),
     path("", reservation_views.home, name="home"),
 ]
@@ -1,7 +1,10 @@
 from django.shortcuts import render
+from reservations.cache import TABLE_CATALOG_VERSION_KEY
+from reservations.page_cache import cache_anonymous_page
 from .models import Table
 
 
+@cache_anonymous_page(versions=[TABLE_CATALOG_VERSION_KEY])
 def table_list(request):
     tables = Table.objects.all()
     return render(request, "tables/table_list.html", {"tables": tables})